@@ -32,8 +32,13 @@ def classFactory(iface):  # pylint: disable=invalid-name
     :type iface: QgsInterface
     """
     #
-    from .tellae_services import TellaeServices
+    from tellae.utils.profiler import STARTUP_PROFILER
 
-    return TellaeServices(iface)
+    # profile the plugin startup from its load
+    STARTUP_PROFILER.begin()
+    with STARTUP_PROFILER.phase("classFactory"):
+        from .tellae_services import TellaeServices
+
+        return TellaeServices(iface)
 
 from tellae.utils.i18n import tr
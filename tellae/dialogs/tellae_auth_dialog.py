@@ -8,11 +8,17 @@ from qgis.PyQt.QtWidgets import QDialogButtonBox, QDialog
 from qgis.PyQt.QtCore import Qt
 from tellae.services.auth import init_auth, try_new_indents
 from tellae.tellae_store import TELLAE_STORE
+from tellae.utils.profiler import STARTUP_PROFILER
 from tellae.services.auth import get_apikey_from_cache
 
 
-# This loads your .ui file so that PyQt can populate your plugin with the elements from Qt Designer
-FORM_CLASS, _ = uic.loadUiType(os.path.join(os.path.dirname(__file__), "tellae_auth.ui"))
+try:
+    # use the UI class generated at build time (see the Makefile 'ui' target)
+    from tellae.dialogs.ui_tellae_auth import Ui_AuthDialog as FORM_CLASS
+except ImportError:
+    # This loads your .ui file so that PyQt can populate your plugin with the elements from Qt Designer
+    with STARTUP_PROFILER.phase("uic.loadUiType tellae_auth.ui"):
+        FORM_CLASS, _ = uic.loadUiType(os.path.join(os.path.dirname(__file__), "tellae_auth.ui"))
 
 
 class TellaeAuthDialog(QtWidgets.QDialog, FORM_CLASS):
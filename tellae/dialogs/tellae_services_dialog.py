@@ -31,12 +31,25 @@ from qgis.PyQt.QtGui import QIcon, QPixmap
 from qgis.core import Qgis
 
 from tellae.tellae_store import TELLAE_STORE
-
-from tellae.panels import LayersPanel, FlowsPanel, NetworkPanel, ConfigPanel, AboutPanel
+from tellae.utils.profiler import STARTUP_PROFILER
+
+from tellae.panels import (
+    LayersPanel,
+    FlowsPanel,
+    NetworkPanel,
+    ConfigPanel,
+    AboutPanel,
+    QuickSearchPanel,
+)
 from tellae.utils.utils import log
 
-# This loads your .ui file so that PyQt can populate your plugin with the elements from Qt Designer
-FORM_CLASS, _ = uic.loadUiType(os.path.join(os.path.dirname(__file__), "main_window.ui"))
+try:
+    # use the UI class generated at build time (see the Makefile 'ui' target)
+    from tellae.dialogs.ui_main_window import Ui_ui_main_window as FORM_CLASS
+except ImportError:
+    # This loads your .ui file so that PyQt can populate your plugin with the elements from Qt Designer
+    with STARTUP_PROFILER.phase("uic.loadUiType main_window.ui"):
+        FORM_CLASS, _ = uic.loadUiType(os.path.join(os.path.dirname(__file__), "main_window.ui"))
 
 
 class TellaeServicesDialog(QtWidgets.QDialog, FORM_CLASS):
@@ -58,6 +71,7 @@ class TellaeServicesDialog(QtWidgets.QDialog, FORM_CLASS):
         self.network_panel = NetworkPanel(self)
         self.config_panel = ConfigPanel(self)
         self.about_panel = AboutPanel(self)
+        self.quick_search_panel = QuickSearchPanel(self)
 
         self.progress_count = 0
 
@@ -82,6 +96,7 @@ class TellaeServicesDialog(QtWidgets.QDialog, FORM_CLASS):
         self.network_panel.setup()
         self.config_panel.setup()
         self.about_panel.setup()
+        self.quick_search_panel.setup()
 
     def set_menu_icons(self):
         item = self.menu_widget.item(0)
@@ -124,8 +139,8 @@ class TellaeServicesDialog(QtWidgets.QDialog, FORM_CLASS):
         # log exception message
         log(str(exc), Qgis.MessageLevel.Critical)
 
-        # log exception trace
-        log(str(traceback.format_exc()), Qgis.MessageLevel.Critical)
+        # log exception trace (exception may be signaled outside of its except block)
+        log("".join(traceback.format_exception(exc)), Qgis.MessageLevel.Critical)
 
     def display_message_bar(
         self,
@@ -0,0 +1,126 @@
+from tellae.utils.search_index import SearchIndex
+
+# kinds of searched items, in the order of the search results
+LAYER = "layer"
+PROVIDER = "provider"
+DATASET = "dataset"
+DATABASE_GTFS = "database_gtfs"
+PROJECT_GTFS = "project_gtfs"
+SPATIAL_DATA = "spatial_data"
+FLOWS = "flows"
+
+KINDS = [LAYER, PROVIDER, DATASET, DATABASE_GTFS, PROJECT_GTFS, SPATIAL_DATA, FLOWS]
+
+
+def theme_tag(theme):
+    """
+    Tag of the layers of a theme.
+
+    :param theme: translated theme name
+
+    :return: tag
+    """
+    return ("theme", theme)
+
+
+class CatalogEntry:
+    """
+    A searched item, along with its indexed text fields.
+    """
+
+    def __init__(self, kind, key, item, name, details="", tags=()):
+        """
+        :param kind: kind of the item, one of KINDS
+        :param key: id of the item among the items of its kind
+        :param item: catalog item (layer summary item, GTFS, binary...)
+        :param name: name of the item
+        :param details: secondary text of the item (provider, network...)
+        :param tags: additional tags of the item
+        """
+        self.kind = kind
+        self.key = key
+        self.item = item
+        self.name = name
+        self.details = details
+        self.tags = tuple(tags)
+
+    @property
+    def doc_id(self):
+        return self.kind, self.key
+
+    @property
+    def fields(self):
+        return {"name": self.name, "details": self.details}
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, CatalogEntry)
+            and self.doc_id == other.doc_id
+            and self.fields == other.fields
+            and self.tags == other.tags
+        )
+
+
+class CatalogSearch:
+    """
+    Search index of all the catalogs: layers, datasets and providers, database and
+    project GTFS, project spatial data and flows.
+
+    Each kind of item is updated independently, only re-indexing the items that changed.
+    """
+
+    def __init__(self):
+        self.index = SearchIndex({"name": 2, "details": 1})
+
+        # indexed entries {kind: {key: CatalogEntry}}
+        self._entries = {kind: dict() for kind in KINDS}
+
+    def update(self, kind, entries):
+        """
+        Set the entries of a kind of item.
+
+        Entries are ranked in the given order among results with the same score.
+
+        :param kind: kind of the entries
+        :param entries: list of CatalogEntry
+        """
+        previous = self._entries[kind]
+        current = {entry.key: entry for entry in entries}
+
+        for key in previous.keys() - current.keys():
+            self.index.remove((kind, key))
+
+        kind_rank = KINDS.index(kind)
+        for position, entry in enumerate(entries):
+            order = (kind_rank, position)
+            if previous.get(entry.key) == entry:
+                self.index.set_order(entry.doc_id, order)
+            else:
+                self.index.add(entry.doc_id, entry.fields, tags=(kind,) + entry.tags, order=order)
+
+        self._entries[kind] = current
+
+    def clear(self, kind):
+        """
+        Remove the entries of a kind of item.
+
+        :param kind: kind of the entries
+        """
+        self.update(kind, [])
+
+    def get(self, kind, key) -> CatalogEntry | None:
+        return self._entries[kind].get(key)
+
+    def search(self, query, tag=None, limit=None) -> list:
+        """
+        Search the catalog entries matching the query.
+
+        :param query: query text, an empty query matches all entries
+        :param tag: only return entries with this tag (kind or additional tag)
+        :param limit: maximum number of results
+
+        :return: list of CatalogEntry, best matches first
+        """
+        return [
+            self._entries[kind][key] for kind, key in self.index.search(query, tag=tag, limit=limit)
+        ]
@@ -14,8 +14,11 @@ from .layer_item import LayerItem
 from tellae.models.layers.layer_source import (
     QgsLayerSource,
     GeojsonSource,
+    GeopackageSource,
     SharkSource,
     VectorTileGeojsonSource,
+    VIEWPORT_MAX_SCALE,
+    geometry_class_count,
 )
 from tellae.utils import RequestsException, MinZoomException, EmptyLayerException, tr, log
 import traceback
@@ -119,6 +122,13 @@ class QgsKiteLayer(LayerItem):
     def is_vector(self):
         return self.source.is_vector()
 
+    @property
+    def split_geometries(self) -> list | None:
+        """
+        Geometry classes in which the source features are split, None if they are not.
+        """
+        return None
+
     @property
     def geometry_type(self) -> Qgis.GeometryType | None:
         if self.qgis_layer is None:
@@ -141,11 +151,18 @@ class QgsKiteLayer(LayerItem):
 
     def _init_source(self) -> QgsLayerSource:
         if self.source_type == "geojson":
+            # dict data is written to a GeoPackage, without serializing it, unless
+            # a layer that is not split contains several geometry classes
+            if isinstance(self.data, dict) and (
+                self.split_geometries is not None
+                or geometry_class_count(self.data.get("features", [])) <= 1
+            ):
+                return GeopackageSource(self)
             return GeojsonSource(self)
         elif self.source_type == "shark":
             return SharkSource(self)
         elif self.source_type == "vector":
-            if TELLAE_STORE.get_current_scale() > 2000000:
+            if TELLAE_STORE.get_current_scale() > VIEWPORT_MAX_SCALE:
                 raise MinZoomException
             return VectorTileGeojsonSource(self)
         else:
@@ -276,6 +293,10 @@ class QgsKiteLayer(LayerItem):
             QgsProject.instance().addMapLayer(self.qgis_layer)
 
     def _on_layer_added(self):
+        # sub-layers share the source of their parent, which releases it
+        if self.parent_layer is None:
+            self.source.release()
+
         # display a popup if verbose
         self.signal_successful_layer_add()
 
@@ -3,6 +3,8 @@ from qgis.core import (
     QgsProject,
 )
 from .layer_item import LayerItem
+from tellae.services.layers import signal_layer_add_error
+from tellae.utils.ui_scheduler import UI_SCHEDULER
 from tellae import tr
 
 
@@ -55,10 +57,23 @@ class LayerGroup(LayerItem):
     def add_to_qgis(self):
         """
         Add all layers of the group to Qgis.
+
+        Layers are added one at a time by the UI scheduler, so that QGIS stays responsive.
         """
-        for layer in self._layers:
-            layer.add_to_qgis()
 
-        self.popup(
-            tr("Les couches '{}' ont été ajoutées avec succès").format(self.name), Qgis.MessageLevel.Success
+        def add_layers():
+            for layer in self._layers:
+                layer.add_to_qgis()
+                yield
+
+        def on_done():
+            self.popup(
+                tr("Les couches '{}' ont été ajoutées avec succès").format(self.name), Qgis.MessageLevel.Success
+            )
+
+        UI_SCHEDULER.submit(
+            f"add {self.name}",
+            add_layers(),
+            on_done=on_done,
+            on_error=lambda e: signal_layer_add_error(self.name, e),
         )
@@ -1,22 +1,86 @@
-import tempfile
+import os
+import math
 from abc import ABC, abstractmethod
 import urllib.parse
 
+from osgeo import gdal
+from qgis.PyQt.QtCore import QVariant, QTimer
 from qgis.core import (
+    Qgis,
+    QgsApplication,
+    QgsTask,
     QgsProject,
+    QgsFeature,
+    QgsField,
+    QgsFields,
+    QgsGeometry,
+    QgsPointXY,
+    QgsWkbTypes,
     QgsVectorLayer,
+    QgsVectorFileWriter,
     QgsVectorTileLayer,
     QgsCoordinateTransform,
     QgsCoordinateReferenceSystem,
+    QgsRectangle,
 )
 
-from tellae.utils import log, RequestsException
-from tellae.utils.contexts import LayerDownloadContext
+from tellae.utils import log, RequestsException, EmptyLayerException
+from tellae.utils.contexts import LayerDownloadContext, LayerDownloadBatch
 from tellae.tellae_store import TELLAE_STORE
-from tellae.utils.requests import request, request_whale
-from tellae.services.layers import signal_layer_add_error
+from tellae.utils.requests import request, request_whale_shared
+from tellae.utils.layer_files import LAYER_FILES
+from tellae.utils.ui_scheduler import UI_SCHEDULER
+from tellae.utils.tile_cache import TILE_CACHE
+from tellae.utils.tile_grid import (
+    MAX_LATITUDE,
+    grid_zoom,
+    tiles_in_bbox,
+    tiles_around,
+    tile_bbox,
+    tile_count,
+    tile_distance,
+    bbox_intersects,
+)
+from tellae.services.layers import signal_layer_add_error, get_shark_layer, get_table_tilejson
+from tellae.services.usage import record_usage, SHARK_USAGE
+from tellae.services.prefetch import CELL_PREFETCHER
 import json
 
+# GeoJSON data larger than this is converted to an indexed GeoPackage before loading (bytes)
+CONVERSION_MIN_SIZE = 2 * 1024 * 1024
+
+# name of the layer in the converted GeoPackage files
+GPKG_LAYER_NAME = "data"
+
+# GeoJSON geometry types of each geometry class
+GEOMETRY_CLASSES = {
+    "Point": ("Point", "MultiPoint"),
+    "LineString": ("LineString", "MultiLineString"),
+    "Polygon": ("Polygon", "MultiPolygon"),
+}
+
+# QGIS geometry type of each geometry class
+GEOMETRY_CLASS_TYPES = {
+    "Point": Qgis.GeometryType.Point,
+    "LineString": Qgis.GeometryType.Line,
+    "Polygon": Qgis.GeometryType.Polygon,
+}
+
+# number of features added to a memory layer at once
+MEMORY_BATCH_SIZE = 5000
+
+# maximum map scale at which the features of the viewport are loaded
+VIEWPORT_MAX_SCALE = 2000000
+
+# delay between the last map extent change and the loading of the new cells (ms)
+VIEWPORT_DEBOUNCE_DELAY = 300
+
+# maximum number of grid cells requested for a map extent
+VIEWPORT_MAX_CELLS = 64
+
+# number of features kept by a viewport source before the farthest cells are evicted
+VIEWPORT_FEATURES_BUDGET = 200000
+
 
 class QgsLayerSource(ABC):
 
@@ -82,6 +146,22 @@ class QgsLayerSource(ABC):
         """
         raise NotImplementedError
 
+    def release(self):
+        """
+        Signal that the layers of the source were added to QGIS.
+        """
+        pass
+
+    def has_geometry(self, geometry) -> bool:
+        """
+        Tell if the source may contain features of the given geometry class.
+
+        :param geometry: geometry class ("Point", "LineString", "Polygon")
+
+        :return: boolean
+        """
+        return True
+
     def error_handler(self, exception):
         """
         Handle errors encountered during the pipeline.
@@ -104,6 +184,13 @@ class GeojsonSource(QgsLayerSource):
         # path to the temporary file containing the geojson source
         self.path = ""
 
+        # OGR data sources of the QGIS layers (the geojson file or its GeoPackage conversion)
+        # {None: data source} or, if split by geometry, {geometry class: data source}
+        self.datasources = dict()
+
+        # running GeoPackage conversion
+        self._conversion_task = None
+
     def is_vector(self):
         return False
 
@@ -111,9 +198,12 @@ class GeojsonSource(QgsLayerSource):
         if isinstance(self.layer.data, str):
             # if the data is an url, make a web request
             self.make_layer_request()
+        elif isinstance(self.layer.data, bytes):
+            # if the data is raw GeoJSON, write it as is
+            self.store_geojson_data(self.layer.data)
         elif isinstance(self.layer.data, dict):
             # if the data is a dict
-            self.store_geojson_data(json.dumps(self.layer.data).encode("utf-8"))
+            self.store_geojson_data(json.dumps(self.layer.data).encode("utf-8"), self.layer.data)
         else:
             raise ValueError(f"Unsupported type for GeojsonSource data: {type(self.layer.data)}")
 
@@ -135,20 +225,87 @@ class GeojsonSource(QgsLayerSource):
         except Exception as e:
             self.error_handler(e)
 
-    def store_geojson_data(self, data: bytes):
+    def store_geojson_data(self, data: bytes, geojson=None):
+        """
+        Write the GeoJSON data to the layer files, then mark the source as prepared.
+
+        :param data: GeoJSON bytes
+        :param geojson: parsed GeoJSON, if available
+        """
         self.data = data
 
         self.create_temp_file()
 
+        self.datasources = {None: self.path}
+
+        geometries = self.layer.split_geometries
+
+        # parsing a large GeoJSON is slow and it has no spatial index
+        if len(data) >= CONVERSION_MIN_SIZE:
+            self.convert_to_geopackage(geometries, geojson)
+            return
+
+        if geometries is not None:
+            if geojson is None:
+                # the bytes must be parsed to be split, which is not done on the GUI thread
+                self.convert_to_geopackage(geometries, convert=False)
+                return
+
+            self.datasources = split_geojson_by_geometry(geojson, self.path, geometries)
+
         self._mark_as_prepared()
 
+    def convert_to_geopackage(self, geometries=None, geojson=None, convert=True):
+        """
+        Convert the GeoJSON file to GeoPackage files with a spatial index in a background task,
+        then mark the source as prepared.
+
+        The GeoJSON file is loaded if the conversion fails.
+
+        :param geometries: geometry classes in which features are split, if any
+        :param geojson: parsed GeoJSON, if available
+        :param convert: if False, the file is only split by geometry class in the task
+        """
+
+        def on_finished(exception, result=None):
+            self._conversion_task = None
+
+            if exception is None and result is not None:
+                self.datasources = result
+
+                # layers are read from the GeoPackage (or split) files only
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+            else:
+                log(f"Could not prepare the files of '{self.layer_name}': {exception}", "WARNING")
+
+            try:
+                self._mark_as_prepared()
+            except Exception as e:
+                self.error_handler(e)
+
+        self._conversion_task = QgsTask.fromFunction(
+            f"Conversion de la couche '{self.layer_name}'",
+            prepare_geopackage_files,
+            self.data if geojson is None else geojson,
+            self.path,
+            geometries,
+            convert,
+            on_finished=on_finished,
+        )
+        QgsApplication.taskManager().addTask(self._conversion_task)
+
     def create_temp_file(self):
         try:
             file_path = self.path
             if file_path == "":
-                file = tempfile.NamedTemporaryFile(suffix=".geojson")
-                file.close()
-                file_path = file.name
+                file_path = LAYER_FILES.new_file(".geojson")
+
+            # keep the file until its layers are added to the project
+            LAYER_FILES.pin(file_path)
+
             with open(file_path, "wb") as f:
                 f.write(self.data)
         except FileNotFoundError:
@@ -158,50 +315,726 @@ class GeojsonSource(QgsLayerSource):
 
         self.path = file_path
 
+        # make room for the new file
+        LAYER_FILES.evict()
+
+    def release(self):
+        LAYER_FILES.unpin(self.path)
+
+    def has_geometry(self, geometry) -> bool:
+        return None in self.datasources or geometry in self.datasources
+
     def _create_qgis_layer_instance(self, geometry=None, name=None):
         name = self.layer_name if name is None else name
 
-        data = self.path
+        if geometry in self.datasources:
+            # file already split by geometry
+            data = self.datasources[geometry]
+        else:
+            data = self.datasources[None]
+            if geometry is not None:
+                data = f"{data}|geometrytype={geometry}"
+
+        return QgsVectorLayer(data, name, "ogr")
+
+
+def split_geojson_by_geometry(geojson, geojson_path, geometries) -> dict:
+    """
+    Split the features of a GeoJSON by geometry class, in a single pass.
+
+    A GeoJSON file is written next to the source file for each geometry class containing
+    features. Features without geometry or of other types are ignored.
+
+    :param geojson: parsed GeoJSON, or GeoJSON bytes
+    :param geojson_path: path of the source GeoJSON file
+    :param geometries: geometry classes ("Point", "LineString", "Polygon")
+
+    :return: dict {geometry class: file path} of the non-empty classes
+    """
+    if isinstance(geojson, (bytes, str)):
+        geojson = json.loads(geojson)
+
+    features = group_features_by_geometry(geojson.get("features", []), geometries)
+
+    # other members of the collection (crs...) are kept
+    members = {key: value for key, value in geojson.items() if key != "features"}
+
+    base_path = os.path.splitext(geojson_path)[0]
+    paths = dict()
+    for geometry, geometry_features in features.items():
+        if not geometry_features:
+            continue
+        path = f"{base_path}.{geometry.lower()}.geojson"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({**members, "features": geometry_features}, f)
+        paths[geometry] = path
+
+    return paths
+
+
+def geometry_class_count(features) -> int:
+    """
+    Count the geometry classes of GeoJSON features.
+
+    :param features: list of GeoJSON features
+
+    :return: number of geometry classes
+    """
+    geometry_classes = {
+        geometry_type: geometry
+        for geometry, geometry_types in GEOMETRY_CLASSES.items()
+        for geometry_type in geometry_types
+    }
+
+    return len(
+        {geometry_classes.get((feature.get("geometry") or {}).get("type")) for feature in features}
+        - {None}
+    )
+
+
+def group_features_by_geometry(features, geometries=None) -> dict:
+    """
+    Group GeoJSON features by geometry class, in a single pass.
+
+    Features without geometry or of other types are ignored.
+
+    :param features: list of GeoJSON features
+    :param geometries: geometry classes to keep, all classes by default
+
+    :return: dict {geometry class: list of features}, in order of first appearance
+    """
+    if geometries is None:
+        geometries = list(GEOMETRY_CLASSES)
+
+    geometry_classes = {
+        geometry_type: geometry
+        for geometry in geometries
+        for geometry_type in GEOMETRY_CLASSES[geometry]
+    }
+
+    groups = dict()
+    for feature in features:
+        geometry = geometry_classes.get((feature.get("geometry") or {}).get("type"))
         if geometry is not None:
-            data = f"{data}|geometrytype={geometry}"
+            groups.setdefault(geometry, []).append(feature)
+
+    return groups
+
+
+def prepare_geopackage_files(task, geojson, geojson_path, geometries=None, convert=True) -> dict:
+    """
+    Convert a GeoJSON to GeoPackage files with a spatial index, split by geometry class if requested.
+
+    Runs in a QgsTask thread.
+
+    :param task: running QgsTask
+    :param geojson: parsed GeoJSON, or GeoJSON bytes
+    :param geojson_path: path of the GeoJSON file
+    :param geometries: geometry classes in which features are split, if any
+    :param convert: if False, the split GeoJSON files are returned without conversion
+
+    :return: dict of OGR data sources, by geometry class or None if not split
+    """
+    if geometries is None:
+        geojson_paths = {None: geojson_path}
+    else:
+        geojson_paths = split_geojson_by_geometry(geojson, geojson_path, geometries)
+
+    if not convert:
+        return geojson_paths
+
+    datasources = dict()
+    for geometry, path in geojson_paths.items():
+        gpkg_path = os.path.splitext(path)[0] + ".gpkg"
+        convert_geojson_to_geopackage(path, gpkg_path)
+        datasources[geometry] = f"{gpkg_path}|layername={GPKG_LAYER_NAME}"
+
+        # split files are only used for the conversion
+        if path != geojson_path:
+            os.remove(path)
+
+    return datasources
+
+
+def convert_geojson_to_geopackage(geojson_path, gpkg_path):
+    """
+    Convert a GeoJSON file to a GeoPackage layer with a spatial index.
+
+    :param geojson_path: path of the GeoJSON file
+    :param gpkg_path: path of the GeoPackage file, overwritten if it exists
+
+    :return: path of the GeoPackage file
+    """
+    options = gdal.VectorTranslateOptions(
+        format="GPKG",
+        accessMode="overwrite",
+        layerName=GPKG_LAYER_NAME,
+        layerCreationOptions=["SPATIAL_INDEX=YES"],
+    )
+    dataset = gdal.VectorTranslate(gpkg_path, geojson_path, options=options)
+    if dataset is None:
+        raise RuntimeError(gdal.GetLastErrorMsg())
+
+    # close the dataset to flush it to disk
+    dataset = None
+
+    return gpkg_path
+
+
+class MemorySource(QgsLayerSource):
+    """
+    A source building memory layers directly from GeoJSON dict data.
+
+    The data is neither serialized nor parsed again: field types are inferred once
+    from the feature properties, and features are added by batches on the UI scheduler.
+    Layers that are not split by geometry keep the geometry class accepted by the layer.
+    """
+
+    # use multi geometry types, even if the first features have single geometries
+    MULTI_GEOMETRIES = False
+
+    def __init__(self, layer):
+        super().__init__(layer)
+
+        # memory layers by geometry class, or {None: layer} if the features are not split
+        self.qgis_layers = dict()
+
+        # fields and geometry class of the memory layers, by layer key
+        self.fields = dict()
+        self.geometries = dict()
+
+    def is_vector(self):
+        return False
+
+    def prepare(self):
+        groups = self.group_features(self.layer.data.get("features", []))
+
+        if not groups:
+            raise EmptyLayerException
+
+        self.create_layers(groups)
+
+        def add_features():
+            for geometry, features in groups.items():
+                for start in range(0, len(features), MEMORY_BATCH_SIZE):
+                    self.add_features(geometry, features[start : start + MEMORY_BATCH_SIZE])
+                    yield
+
+            self.finish_layers()
+
+        def on_done():
+            try:
+                self._mark_as_prepared()
+            except Exception as e:
+                self.error_handler(e)
+
+        UI_SCHEDULER.submit(
+            f"build {self.layer_name}", add_features(), on_done=on_done, on_error=self.error_handler
+        )
+
+    def layer_key(self, geometry):
+        """
+        Key of the memory layer containing the features of a geometry class.
+
+        :param geometry: geometry class
+        """
+        return geometry if self.layer.split_geometries is not None else None
+
+    def group_features(self, features) -> dict:
+        """
+        Group GeoJSON features by geometry class, keeping the classes that have a memory layer.
+
+        Before the layers are created, layers that are not split keep the geometry class
+        accepted by the layer, or the class of their first feature.
+
+        :param features: list of GeoJSON features
+
+        :return: dict {geometry class: list of features}
+        """
+        if self.qgis_layers:
+            return group_features_by_geometry(features, list(self.geometries.values()))
+
+        geometries = self.layer.split_geometries
+        groups = group_features_by_geometry(features, geometries)
+
+        if geometries is None and len(groups) > 1:
+            accepted = [
+                geometry
+                for geometry in groups
+                if GEOMETRY_CLASS_TYPES[geometry] in self.layer.ACCEPTED_GEOMETRY_TYPES
+            ]
+            geometry = accepted[0] if accepted else next(iter(groups))
+            log(f"Only the {geometry} features of '{self.layer_name}' are displayed", "WARNING")
+            groups = {geometry: groups[geometry]}
+
+        return groups
+
+    def create_layers(self, groups):
+        """
+        Create an empty memory layer for each geometry class.
+
+        :param groups: dict {geometry class: list of features}, used to infer the layer fields
+        """
+        for geometry, features in groups.items():
+            key = self.layer_key(geometry)
+            self.fields[key] = infer_fields(features)
+            self.geometries[key] = geometry
+            self.qgis_layers[key] = create_memory_layer(
+                self.layer_name,
+                geometry,
+                features,
+                self.fields[key],
+                multi=True if self.MULTI_GEOMETRIES else None,
+            )
+
+    def add_features(self, geometry, features) -> list:
+        """
+        Add GeoJSON features to the memory layer of their geometry class.
+
+        :param geometry: geometry class of the features
+        :param features: list of GeoJSON features
+
+        :return: list of added QgsFeature, with their feature ids
+        """
+        key = self.layer_key(geometry)
+        qgis_layer = self.qgis_layers[key]
+        multi = QgsWkbTypes.isMultiType(qgis_layer.wkbType())
+
+        _, added = qgis_layer.dataProvider().addFeatures(
+            [memory_feature(feature, self.fields[key], multi) for feature in features]
+        )
+
+        return added
+
+    def finish_layers(self):
+        """
+        Called once all the features are added.
+        """
+        for qgis_layer in self.qgis_layers.values():
+            qgis_layer.updateExtents()
+
+    def has_geometry(self, geometry) -> bool:
+        return None in self.qgis_layers or geometry in self.qgis_layers
+
+    def _create_qgis_layer_instance(self, geometry=None, name=None):
+        qgis_layer = self.qgis_layers.get(geometry, self.qgis_layers.get(None))
+
+        if name is not None:
+            qgis_layer.setName(name)
+
+        return qgis_layer
+
+
+class GeopackageSource(MemorySource):
+    """
+    A source writing GeoJSON dict data directly to GeoPackage files.
+
+    Features are built as for memory layers, then written by batches to files of
+    the layer files directory, so that the layers are kept when the QGIS project
+    is saved and reopened.
+    """
+
+    def __init__(self, layer):
+        super().__init__(layer)
+
+        # path of the GeoPackage file, split classes are written next to it
+        self.path = ""
+
+        # OGR data sources of the QGIS layers, by layer key
+        self.datasources = dict()
+
+        # open file writers, and whether they write multi geometries, by layer key
+        self._writers = dict()
+        self._multi = dict()
+
+    def create_layers(self, groups):
+        """
+        Create a GeoPackage file for each geometry class.
+
+        :param groups: dict {geometry class: list of features}, used to infer the layer fields
+        """
+        self.path = LAYER_FILES.new_file(".gpkg")
+
+        # keep the files until their layers are added to the project
+        LAYER_FILES.pin(self.path)
+
+        base_path = os.path.splitext(self.path)[0]
+        for geometry, features in groups.items():
+            key = self.layer_key(geometry)
+            path = self.path if key is None else f"{base_path}.{geometry.lower()}.gpkg"
+
+            self.fields[key] = infer_fields(features)
+            self.geometries[key] = geometry
+            geometry_type = layer_geometry_type(geometry, features)
+            self._multi[key] = geometry_type.startswith("Multi")
+            self._writers[key] = create_geopackage_writer(path, geometry_type, self.fields[key])
+            self.datasources[key] = f"{path}|layername={GPKG_LAYER_NAME}"
+
+    def add_features(self, geometry, features) -> list:
+        """
+        Write GeoJSON features to the file of their geometry class.
+
+        :param geometry: geometry class of the features
+        :param features: list of GeoJSON features
+
+        :return: list of written QgsFeature
+        """
+        key = self.layer_key(geometry)
+        writer = self._writers[key]
+
+        qgs_features = [
+            memory_feature(feature, self.fields[key], self._multi[key]) for feature in features
+        ]
+        if not writer.addFeatures(qgs_features):
+            raise RuntimeError(writer.errorMessage())
+
+        return qgs_features
+
+    def finish_layers(self):
+        # deleting the writers closes the files
+        for writer in self._writers.values():
+            writer.flushBuffer()
+        self._writers.clear()
+        self._multi.clear()
+
+        # make room for the new files
+        LAYER_FILES.evict()
+
+    def release(self):
+        # files of a failed preparation are closed
+        self._writers.clear()
+        self._multi.clear()
+
+        LAYER_FILES.unpin(self.path)
+
+    def has_geometry(self, geometry) -> bool:
+        return None in self.datasources or geometry in self.datasources
+
+    def _create_qgis_layer_instance(self, geometry=None, name=None):
+        name = self.layer_name if name is None else name
+        data = self.datasources.get(geometry, self.datasources.get(None))
 
         return QgsVectorLayer(data, name, "ogr")
 
 
+def infer_fields(features) -> list:
+    """
+    Infer the field types of GeoJSON features from their properties.
+
+    Integer and float properties give numeric fields, other values are stored as strings.
+
+    :param features: list of GeoJSON features
+
+    :return: list of (field name, QVariant type), in order of first appearance
+    """
+    kinds = dict()
+    for feature in features:
+        for key, value in (feature.get("properties") or {}).items():
+            key_kinds = kinds.setdefault(key, set())
+            if value is None:
+                continue
+            elif isinstance(value, bool):
+                key_kinds.add(bool)
+            elif isinstance(value, int):
+                key_kinds.add(int)
+            elif isinstance(value, float):
+                key_kinds.add(float)
+            else:
+                key_kinds.add(str)
+
+    fields = []
+    for key, key_kinds in kinds.items():
+        if key_kinds == {bool}:
+            field_type = QVariant.Bool
+        elif key_kinds == {int}:
+            field_type = QVariant.LongLong
+        elif key_kinds and key_kinds <= {int, float}:
+            field_type = QVariant.Double
+        else:
+            field_type = QVariant.String
+        fields.append((key, field_type))
+
+    return fields
+
+
+def layer_geometry_type(geometry, features, multi=None) -> str:
+    """
+    Geometry type of a layer containing features of a geometry class.
+
+    :param geometry: geometry class ("Point", "LineString", "Polygon")
+    :param features: GeoJSON features of the layer
+    :param multi: whether to use the multi geometry type, by default
+        if any of the features is a multi geometry
+
+    :return: geometry type name, for instance "MultiPolygon"
+    """
+    if multi is None:
+        multi = any(feature["geometry"]["type"].startswith("Multi") for feature in features)
+
+    return f"Multi{geometry}" if multi else geometry
+
+
+def create_memory_layer(name, geometry, features, fields, multi=None) -> QgsVectorLayer:
+    """
+    Create an empty memory layer for features of a geometry class.
+
+    :param name: layer name
+    :param geometry: geometry class ("Point", "LineString", "Polygon")
+    :param features: GeoJSON features of the layer
+    :param fields: list of (field name, QVariant type)
+    :param multi: whether to use the multi geometry type, by default
+        if any of the features is a multi geometry
+
+    :return: QgsVectorLayer using the memory provider
+    """
+    geometry_type = layer_geometry_type(geometry, features, multi)
+
+    qgis_layer = QgsVectorLayer(f"{geometry_type}?crs=EPSG:4326", name, "memory")
+    qgis_layer.dataProvider().addAttributes(
+        [QgsField(field_name, field_type) for field_name, field_type in fields]
+    )
+    qgis_layer.updateFields()
+
+    return qgis_layer
+
+
+def create_geopackage_writer(path, geometry_type, fields) -> QgsVectorFileWriter:
+    """
+    Create a GeoPackage file with an empty layer, and open it for writing.
+
+    :param path: path of the GeoPackage file, overwritten if it exists
+    :param geometry_type: geometry type name, for instance "MultiPolygon"
+    :param fields: list of (field name, QVariant type)
+
+    :return: QgsVectorFileWriter, the file is closed when it is deleted
+    """
+    qgs_fields = QgsFields()
+    for field_name, field_type in fields:
+        qgs_fields.append(QgsField(field_name, field_type))
+
+    options = QgsVectorFileWriter.SaveVectorOptions()
+    options.driverName = "GPKG"
+    options.layerName = GPKG_LAYER_NAME
+    options.layerOptions = ["SPATIAL_INDEX=YES"]
+
+    writer = QgsVectorFileWriter.create(
+        path,
+        qgs_fields,
+        QgsWkbTypes.parseType(geometry_type),
+        QgsCoordinateReferenceSystem("EPSG:4326"),
+        QgsProject.instance().transformContext(),
+        options,
+    )
+    if writer.hasError() != QgsVectorFileWriter.NoError:
+        raise RuntimeError(writer.errorMessage())
+
+    return writer
+
+
+def memory_feature(feature, fields, multi=False) -> QgsFeature:
+    """
+    Build a QgsFeature from a GeoJSON feature.
+
+    :param feature: GeoJSON feature
+    :param fields: list of (field name, QVariant type) of the layer
+    :param multi: whether the layer geometries are multi geometries
+
+    :return: QgsFeature
+    """
+    properties = feature.get("properties") or {}
+
+    attributes = []
+    for field_name, field_type in fields:
+        value = properties.get(field_name)
+        if value is not None and field_type == QVariant.String and not isinstance(value, str):
+            value = json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+        attributes.append(value)
+
+    geometry = geojson_geometry(feature["geometry"])
+    if multi:
+        geometry.convertToMultiType()
+
+    qgs_feature = QgsFeature()
+    qgs_feature.setGeometry(geometry)
+    qgs_feature.setAttributes(attributes)
+
+    return qgs_feature
+
+
+def geojson_geometry(geometry) -> QgsGeometry:
+    """
+    Build a QgsGeometry from a GeoJSON geometry, without serializing it.
+
+    :param geometry: GeoJSON geometry dict
+
+    :return: QgsGeometry
+    """
+    geometry_type = geometry["type"]
+    coordinates = geometry["coordinates"]
+
+    def points(positions):
+        return [QgsPointXY(position[0], position[1]) for position in positions]
+
+    if geometry_type == "Point":
+        return QgsGeometry.fromPointXY(QgsPointXY(coordinates[0], coordinates[1]))
+    elif geometry_type == "MultiPoint":
+        return QgsGeometry.fromMultiPointXY(points(coordinates))
+    elif geometry_type == "LineString":
+        return QgsGeometry.fromPolylineXY(points(coordinates))
+    elif geometry_type == "MultiLineString":
+        return QgsGeometry.fromMultiPolylineXY([points(line) for line in coordinates])
+    elif geometry_type == "Polygon":
+        return QgsGeometry.fromPolygonXY([points(ring) for ring in coordinates])
+    elif geometry_type == "MultiPolygon":
+        return QgsGeometry.fromMultiPolygonXY(
+            [[points(ring) for ring in polygon] for polygon in coordinates]
+        )
+    else:
+        raise ValueError(f"Unsupported GeoJSON geometry type '{geometry_type}'")
+
+
 class SharkSource(GeojsonSource):
 
     def get_url(self):
         return f"/shark/layers/geojson/{self.layer.data}"
 
     def prepare(self):
+        # record layer usage for prefetching
+        record_usage(SHARK_USAGE, self.layer.data, main_dataset=self.layer.main_dataset)
+
         with LayerDownloadContext(self.layer_name, self.on_request_success) as ctx:
-            request_whale(
-                self.get_url(), handler=ctx.handler, error_handler=ctx.error_handler, to_json=False
+            get_shark_layer(
+                self.layer.data,
+                self.layer.main_dataset,
+                handler=ctx.handler,
+                error_handler=ctx.error_handler,
             )
 
 
-class VectorTileGeojsonSource(SharkSource):
+def viewport_bbox() -> list:
+    """
+    Bounding box of the map canvas extent, in EPSG:4326.
 
-    def get_url(self) -> str:
-        # evaluate bbox
-        rect = TELLAE_STORE.tellae_services.iface.mapCanvas().extent()
-        bbox = [rect.xMinimum(), rect.yMinimum(), rect.xMaximum(), rect.yMaximum()]
+    :return: [lon_min, lat_min, lon_max, lat_max]
+    """
+    rect = TELLAE_STORE.tellae_services.iface.mapCanvas().extent()
+    bbox = [rect.xMinimum(), rect.yMinimum(), rect.xMaximum(), rect.yMaximum()]
+
+    # reproject if necessary
+    project = QgsProject.instance()
+    current_crs = project.crs()
+    if current_crs.authid() != "EPSG:4326":
+        transform = QgsCoordinateTransform(
+            current_crs, QgsCoordinateReferenceSystem("EPSG:4326"), project
+        )
 
-        # reproject if necessary
-        project = QgsProject.instance()
-        current_crs = project.crs()
-        if current_crs.authid() != "EPSG:4326":
-            transform = QgsCoordinateTransform(
-                current_crs, QgsCoordinateReferenceSystem("EPSG:4326"), project
-            )
+        minimum = transform.transform(rect.xMinimum(), rect.yMinimum())
+        maximum = transform.transform(rect.xMaximum(), rect.yMaximum())
+
+        bbox = [minimum.x(), minimum.y(), maximum.x(), maximum.y()]
+
+    return bbox
+
+
+def tilejson_bounds(tilejson) -> list | None:
+    """
+    Bounds of the data described by a TileJSON.
+
+    :param tilejson: TileJSON dict, or None
+
+    :return: [lon_min, lat_min, lon_max, lat_max], None if unknown
+    """
+    if tilejson is None or len(tilejson.get("bounds") or []) != 4:
+        return None
+
+    return tilejson["bounds"]
+
+
+def feature_key(feature):
+    """
+    Identify a GeoJSON feature, so that it is recognized in several responses.
+
+    Features without id are identified by their content.
+
+    :param feature: GeoJSON feature
+
+    :return: hashable key
+    """
+    if feature.get("id") is not None:
+        return feature["id"]
+
+    return hash(json.dumps(feature, sort_keys=True))
+
+
+class VectorTileGeojsonSource(MemorySource):
+    """
+    A source loading the features of a Shark layer around the map viewport.
+
+    Features are requested by cells of a quadtree grid, whose zoom level is chosen
+    from the map extent when the layer is added. When the map extent changes, only
+    the newly visible cells are requested and their features are appended to the
+    memory layers, features found in several cells being added once. Above a number
+    of features, the cells farthest from the viewport are evicted. Cell responses are
+    kept in the tile cache, so that visited areas are loaded without network requests,
+    and cells outside the data bounds given by the table TileJSON are not requested.
+    """
+
+    # features of the next cells may have multi geometries
+    MULTI_GEOMETRIES = True
 
-            minimum = transform.transform(rect.xMinimum(), rect.yMinimum())
-            maximum = transform.transform(rect.xMaximum(), rect.yMaximum())
+    def __init__(self, layer):
+        super().__init__(layer)
+
+        # zoom level of the grid cells
+        self.zoom = None
+
+        # bounds of the table data, from its TileJSON
+        self.bounds = None
+
+        # keys of the features of the loaded cells {cell: set of feature keys}
+        self.cells = dict()
+
+        # cells being requested, and cells whose features are being added
+        self._requested = set()
+        self._loading = set()
 
-            bbox = [minimum.x(), minimum.y(), maximum.x(), maximum.y()]
+        # loaded features {feature key: [layer key, QGIS feature id, number of cells containing it]}
+        self._features = dict()
 
-        # url parameters
-        params = {"bbox": f"{','.join([str(coord) for coord in bbox])}"}
+        # center of the visible cells at the last viewport load, giving the panning direction
+        self._last_center = None
+
+        # responses of the first cells [(cell, features)], loaded together
+        self._initial_responses = None
+
+        # progress and errors of the cell requests
+        self._downloads = LayerDownloadBatch(self.layer_name)
+
+        # the cells are loaded once the map extent stops changing
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(VIEWPORT_DEBOUNCE_DELAY)
+        self._timer.timeout.connect(self.load_viewport)
+
+    def get_url(self, bbox) -> str:
+        params = {"bbox": ",".join([str(coord) for coord in bbox]), **self.url_params()}
+
+        return f"/shark/layers/geojson/{self.layer.data}?{urllib.parse.urlencode(params)}"
+
+    @property
+    def cache_key(self) -> str:
+        """
+        Key of the layer in the tile cache: table, selected properties and filter.
+        """
+        return f"{self.layer.data}?{urllib.parse.urlencode(self.url_params())}"
+
+    def url_params(self) -> dict:
+        """
+        Parameters of the layer requests, except the bbox.
+
+        :return: dict of url parameters
+        """
+        params = dict()
 
         # evaluate selected properties
 
@@ -238,7 +1071,329 @@ class VectorTileGeojsonSource(SharkSource):
             params["filter_key"] = mapbox_filter[1][1]
             params["filter_values"] = f"{','.join(mapbox_filter[2][1])}"
 
-        return f"/shark/layers/geojson/{self.layer.data}?{urllib.parse.urlencode(params)}"
+        return params
+
+    def prepare(self):
+        def on_tilejson(tilejson):
+            self.bounds = tilejson_bounds(tilejson)
+            on_done()
+
+        def on_error(exception):
+            log(
+                f"Could not get the TileJSON of '{self.layer_name}', cells are not bounded: {exception}",
+                "WARNING",
+            )
+            on_done()
+
+        def on_done():
+            try:
+                self.request_initial_cells()
+            except Exception as e:
+                self.error_handler(e)
+
+        get_table_tilejson(self.layer.data, self.layer.main_dataset, on_tilejson, on_error)
+
+    def request_initial_cells(self):
+        bbox = viewport_bbox()
+        self.zoom = grid_zoom(bbox)
+        cells = tiles_in_bbox(bbox, self.zoom)
+
+        # the layers are created once all the first cells are loaded, some may be cached
+        self._initial_responses = []
+        self._requested.update(cells)
+        for cell in cells:
+            self.request_cell(cell)
+
+    def visible_cells(self) -> list | None:
+        """
+        Cells of the grid intersecting the map extent.
+
+        :return: list of (z, x, y) cells, None if there are too many
+        """
+        bbox = viewport_bbox()
+        if tile_count(bbox, self.zoom) > VIEWPORT_MAX_CELLS:
+            return None
+
+        return tiles_in_bbox(bbox, self.zoom)
+
+    def load_viewport(self):
+        """
+        Request the visible cells that are not loaded yet.
+        """
+        if not self.qgis_layers or TELLAE_STORE.get_current_scale() > VIEWPORT_MAX_SCALE:
+            return
+
+        cells = self.visible_cells()
+        if cells is None:
+            log(f"Too many cells visible for '{self.layer_name}', new features are not loaded")
+            return
+
+        for cell in cells:
+            if cell not in self.cells and cell not in self._requested:
+                self.request_cell(cell)
+
+        # warm the tile cache with the cells likely to be displayed next
+        CELL_PREFETCHER.prefetch(self, self.predicted_cells(cells))
+
+    def predicted_cells(self, visible) -> list:
+        """
+        Cells likely to be displayed after the next map move, most likely first.
+
+        They surround the visible cells, up to the extent visible after zooming out
+        one level, with one more ring in the panning direction. Zooming in only
+        displays visible cells, as the grid zoom level is fixed.
+
+        :param visible: visible (z, x, y) cells
+
+        :return: list of (z, x, y) cells
+        """
+        xs = [cell[1] for cell in visible]
+        ys = [cell[2] for cell in visible]
+        center = ((min(xs) + max(xs)) / 2, (min(ys) + max(ys)) / 2)
+
+        # panning direction since the last viewport load
+        direction = (0, 0)
+        if self._last_center is not None:
+            direction = tuple(
+                (center[i] > self._last_center[i]) - (center[i] < self._last_center[i])
+                for i in range(2)
+            )
+        self._last_center = center
+
+        # zooming out one level doubles the extent
+        rings = max(1, math.ceil(max(max(xs) - min(xs) + 1, max(ys) - min(ys) + 1) / 2))
+
+        return [cell for cell in tiles_around(visible, rings, direction) if self.has_data(cell)]
+
+    def has_data(self, cell) -> bool:
+        """
+        Tell if a cell intersects the bounds of the table data.
+
+        :param cell: (z, x, y) cell
+
+        :return: boolean, True if the bounds are unknown
+        """
+        return self.bounds is None or bbox_intersects(tile_bbox(cell), self.bounds)
+
+    def request_cell(self, cell):
+        """
+        Request the features of a grid cell.
+
+        :param cell: (z, x, y) cell
+        """
+        self._requested.add(cell)
+
+        # cells outside the data bounds are empty
+        if not self.has_data(cell):
+            self._requested.discard(cell)
+            self.on_cell_loaded(cell, [])
+            return
+
+        # cells downloaded recently are read from the tile cache
+        content = TILE_CACHE.get(self.cache_key, cell)
+        if content is not None:
+            self._requested.discard(cell)
+            self.on_cell_loaded(cell, json.loads(content).get("features", []))
+            return
+
+        def on_success(result):
+            self._requested.discard(cell)
+            CELL_PREFETCHER.interactive_request_ended()
+            try:
+                content = result["content"]
+                if content is None:
+                    raise RequestsException("Empty response")
+
+                TILE_CACHE.put(self.cache_key, cell, content)
+                self.on_cell_loaded(cell, json.loads(content).get("features", []))
+            except Exception as e:
+                self.error_handler(e)
+
+        def on_error(result):
+            self._requested.discard(cell)
+            CELL_PREFETCHER.interactive_request_ended()
+            # the cell is requested again on the next extent change
+            if self._initial_responses is not None and not self._requested:
+                self.on_initial_cells_loaded()
+
+        CELL_PREFETCHER.interactive_request_started()
+
+        # a single progress and error message for the cells of a map extent
+        handler, error_handler = self._downloads.add_request(on_success, on_error)
+
+        # layers requesting the same cell, and the prefetch, share the response
+        try:
+            request_whale_shared(
+                self.get_url(tile_bbox(cell)), handler=handler, error_handler=error_handler
+            )
+        except Exception as e:
+            error_handler(e)
+
+    def on_cell_loaded(self, cell, features):
+        if self._initial_responses is not None:
+            self._initial_responses.append((cell, features))
+            if not self._requested:
+                self.on_initial_cells_loaded()
+            return
+
+        # the layers were removed
+        if not self.qgis_layers:
+            return
+
+        UI_SCHEDULER.submit(f"load {self.layer_name} {cell}", self.load_cell(cell, features))
+
+    def on_initial_cells_loaded(self):
+        responses = self._initial_responses
+        self._initial_responses = None
+
+        # download errors are already signaled
+        if not responses:
+            return
+
+        groups = self.group_features([feature for _, features in responses for feature in features])
+        if not groups:
+            self.error_handler(EmptyLayerException())
+            return
+
+        self.create_layers(groups)
+
+        def load_cells():
+            for cell, features in responses:
+                yield from self.load_cell(cell, features)
+
+        def on_done():
+            try:
+                self._mark_as_prepared()
+                self.start()
+            except Exception as e:
+                self.error_handler(e)
+
+        UI_SCHEDULER.submit(
+            f"build {self.layer_name}", load_cells(), on_done=on_done, on_error=self.error_handler
+        )
+
+    def load_cell(self, cell, features):
+        """
+        Add the features of a cell that are not loaded yet, by batches.
+
+        :param cell: (z, x, y) cell
+        :param features: GeoJSON features of the cell
+
+        :return: generator whose iterations add a batch of features
+        """
+        self._loading.add(cell)
+        keys = self.cells.setdefault(cell, set())
+
+        for geometry, group in self.group_features(features).items():
+            for start in range(0, len(group), MEMORY_BATCH_SIZE):
+                # the layer was removed
+                if self.layer_key(geometry) not in self.qgis_layers:
+                    break
+
+                new_features = []
+                for feature in group[start : start + MEMORY_BATCH_SIZE]:
+                    key = feature_key(feature)
+                    if key in keys:
+                        continue
+                    keys.add(key)
+                    if key in self._features:
+                        self._features[key][2] += 1
+                    else:
+                        new_features.append((key, feature))
+
+                added = self.add_features(geometry, [feature for _, feature in new_features])
+                for (key, _), qgs_feature in zip(new_features, added):
+                    self._features[key] = [self.layer_key(geometry), qgs_feature.id(), 1]
+
+                yield
+
+        self._loading.discard(cell)
+
+        self.evict()
+
+        for qgis_layer in self.qgis_layers.values():
+            qgis_layer.updateExtents()
+            qgis_layer.triggerRepaint()
+
+    def evict(self):
+        """
+        Evict the cells farthest from the map extent until the features fit the budget.
+
+        Visible cells and cells being loaded are kept.
+        """
+        if len(self._features) <= VIEWPORT_FEATURES_BUDGET:
+            return
+
+        bbox = viewport_bbox()
+        center = ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+        center_cell = tiles_in_bbox([*center, *center], self.zoom)[0]
+        visible = set(self.visible_cells() or [])
+
+        cells = [cell for cell in self.cells if cell not in visible and cell not in self._loading]
+        cells.sort(key=lambda cell: tile_distance(cell, center_cell), reverse=True)
+
+        for cell in cells:
+            if len(self._features) <= VIEWPORT_FEATURES_BUDGET:
+                break
+            self.evict_cell(cell)
+
+    def evict_cell(self, cell):
+        """
+        Remove the features of a cell that are not in other loaded cells.
+
+        :param cell: (z, x, y) cell
+        """
+        deleted = dict()
+        for key in self.cells.pop(cell):
+            feature = self._features[key]
+            feature[2] -= 1
+            if feature[2] == 0:
+                del self._features[key]
+                deleted.setdefault(feature[0], []).append(feature[1])
+
+        for layer_key, feature_ids in deleted.items():
+            if layer_key in self.qgis_layers:
+                self.qgis_layers[layer_key].dataProvider().deleteFeatures(feature_ids)
+
+    def start(self):
+        """
+        Load the new cells when the map extent changes, until the layers are removed.
+        """
+        TELLAE_STORE.tellae_services.iface.mapCanvas().extentsChanged.connect(self._timer.start)
+
+        for key, qgis_layer in self.qgis_layers.items():
+            qgis_layer.willBeDeleted.connect(lambda key=key: self.on_layer_deleted(key))
+
+        # prefetch the cells around the viewport
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+        CELL_PREFETCHER.prefetch(self, [])
+        try:
+            TELLAE_STORE.tellae_services.iface.mapCanvas().extentsChanged.disconnect(
+                self._timer.start
+            )
+        except TypeError:
+            pass
+
+        self.cells = dict()
+        self._features = dict()
+
+    def on_layer_deleted(self, key):
+        self.qgis_layers.pop(key, None)
+        self.fields.pop(key, None)
+        self.geometries.pop(key, None)
+
+        if not self.qgis_layers:
+            self.stop()
+
+    def release(self):
+        # layers without features were not added to the project
+        project_layers = QgsProject.instance().mapLayers()
+        for key, qgis_layer in list(self.qgis_layers.items()):
+            if qgis_layer.id() not in project_layers:
+                self.on_layer_deleted(key)
 
 
 class VectorTileSource(QgsLayerSource):
@@ -249,6 +1404,9 @@ class VectorTileSource(QgsLayerSource):
 
         self.uri = None
 
+        # Martin TileJSON of the table, None if it could not be fetched
+        self.tilejson = None
+
     def evaluate_uri(self):
         whale_endpoint = TELLAE_STORE.whale_endpoint
         auth_cfg = TELLAE_STORE.authCfg
@@ -300,17 +1458,59 @@ class VectorTileSource(QgsLayerSource):
         # build final uri (with url type and auth config)
         uri = f"url={martin_url}&type=xyz&authcfg={auth_cfg}"
 
+        # zoom levels served by the source, higher levels overzoom the max zoom tiles
+        if self.tilejson is not None:
+            if "minzoom" in self.tilejson:
+                uri += f"&zmin={self.tilejson['minzoom']}"
+            if "maxzoom" in self.tilejson:
+                uri += f"&zmax={self.tilejson['maxzoom']}"
+
         return uri
 
     def is_vector(self):
         return True
 
     def prepare(self):
-        # store url
-        self.uri = self.evaluate_uri()
+        def on_tilejson(tilejson):
+            self.tilejson = tilejson
+            on_done()
+
+        def on_error(exception):
+            log(
+                f"Could not get the TileJSON of '{self.layer_name}', tiles are not bounded: {exception}",
+                "WARNING",
+            )
+            on_done()
 
-        # signal source as ready
-        self._mark_as_prepared()
+        def on_done():
+            try:
+                # store url
+                self.uri = self.evaluate_uri()
+
+                # signal source as ready
+                self._mark_as_prepared()
+            except Exception as e:
+                self.error_handler(e)
+
+        get_table_tilejson(self.layer.data, self.layer.main_dataset, on_tilejson, on_error)
 
     def _create_qgis_layer_instance(self):
-        return QgsVectorTileLayer(self.uri, self.layer_name)
+        qgis_layer = QgsVectorTileLayer(self.uri, self.layer_name)
+
+        # the xyz provider has no bounds parameter, the extent is used to zoom on the layer
+        bounds = tilejson_bounds(self.tilejson)
+        if bounds is not None:
+            # bounds are in EPSG:4326, latitudes are clamped to the web mercator limits
+            lon_min, lat_min, lon_max, lat_max = bounds
+            rectangle = QgsRectangle(
+                lon_min,
+                max(lat_min, -MAX_LATITUDE),
+                lon_max,
+                min(lat_max, MAX_LATITUDE),
+            )
+            transform = QgsCoordinateTransform(
+                QgsCoordinateReferenceSystem("EPSG:4326"), qgis_layer.crs(), QgsProject.instance()
+            )
+            qgis_layer.setExtent(transform.transformBoundingBox(rectangle))
+
+        return qgis_layer
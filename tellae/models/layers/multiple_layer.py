@@ -6,6 +6,7 @@ from qgis.core import (
     QgsVectorTileBasicRendererStyle,
 )
 from .layer_group import LayerGroup
+from tellae.utils.ui_scheduler import UI_SCHEDULER
 
 
 class MultipleLayer(QgsKiteLayer, ABC):
@@ -51,6 +52,10 @@ class MultipleLayer(QgsKiteLayer, ABC):
 
     sub_layer_specs = classmethod(sub_layer_specs)
 
+    @property
+    def split_geometries(self):
+        return [layer.source_parameters["geometry"] for layer in self.sub_layers]
+
     def _setup(self):
         super()._setup()
 
@@ -59,10 +64,20 @@ class MultipleLayer(QgsKiteLayer, ABC):
 
     def on_source_prepared(self):
 
-        for layer in self.sub_layers:
-            layer.on_source_prepared()
-
-        self._on_layer_added()
+        # sub-layers are created and styled one at a time by the UI scheduler
+        def add_sub_layers():
+            for layer in self.sub_layers:
+                # geometry classes without features are skipped
+                if self.source.has_geometry(layer.source_parameters["geometry"]):
+                    layer.on_source_prepared()
+                yield
+
+        UI_SCHEDULER.submit(
+            f"add {self.name}",
+            add_sub_layers(),
+            on_done=self._on_layer_added,
+            on_error=self.source.error_handler,
+        )
 
     # paint methods
 
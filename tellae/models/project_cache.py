@@ -0,0 +1,150 @@
+from collections import OrderedDict
+
+from tellae.utils.utils import get_binary_name
+
+# number of projects kept in the cache
+PROJECT_CACHE_SIZE = 5
+
+
+class ProjectCacheEntry:
+    """
+    A project document, along with the data derived from it.
+
+    Sorted binary lists and hash indexes are evaluated on first use.
+    """
+
+    def __init__(self, project, gtfs_list=None, validators=None):
+        # project document
+        self.project = project
+
+        # HTTP validators of the project document response
+        self.validators = validators or dict()
+
+        # GTFS list of the project, None if not known yet
+        self.gtfs_list = gtfs_list
+
+        # binaries sorted by name {attribute: sorted list}
+        self._sorted_data = dict()
+
+        # index of the binaries in the project document {attribute: {hash: index}}
+        self._hash_indexes = dict()
+
+    def sorted_data(self, attribute) -> list:
+        """
+        Get the sorted list of binaries for the given attribute.
+
+        :param attribute: project property, one of ["spatial_data", "flows", "gtfs"]
+
+        :return: sorted list of binaries
+        """
+        if attribute not in self._sorted_data:
+            self._sorted_data[attribute] = sorted(
+                self.project[attribute],
+                key=lambda x: get_binary_name(x, with_extension=False),
+            )
+
+        return self._sorted_data[attribute]
+
+    def binary_index(self, binary_hash, attribute) -> int:
+        """
+        Get the index of a binary in the project document.
+
+        :param binary_hash: hash of the binary
+        :param attribute: project property containing the binary
+
+        :return: binary index, -1 if not found
+        """
+        if attribute not in self._hash_indexes:
+            self._hash_indexes[attribute] = {
+                binary["hash"]: index for index, binary in enumerate(self.project[attribute])
+            }
+
+        return self._hash_indexes[attribute].get(binary_hash, -1)
+
+
+class ProjectCache:
+    """
+    Least recently used cache of the opened projects.
+    """
+
+    def __init__(self, max_size=PROJECT_CACHE_SIZE):
+        self.max_size = max_size
+
+        # entries by project uuid, least recently used first
+        self._entries = OrderedDict()
+
+        # GTFS lists received before their project document, by project uuid
+        self._pending_gtfs_lists = OrderedDict()
+
+    def get(self, uuid) -> ProjectCacheEntry | None:
+        """
+        Get the cache entry of a project, and mark it as recently used.
+
+        :param uuid: project uuid
+
+        :return: ProjectCacheEntry, or None if the project is not cached
+        """
+        entry = self._entries.get(uuid)
+        if entry is not None:
+            self._entries.move_to_end(uuid)
+
+        return entry
+
+    def set_project(self, project, validators=None) -> ProjectCacheEntry:
+        """
+        Store a project document in the cache.
+
+        The existing entry (and its derived data) is kept if the document did not change.
+
+        :param project: project document
+        :param validators: HTTP validators of the document response, keep previous ones if None
+
+        :return: ProjectCacheEntry of the project
+        """
+        uuid = project["uuid"]
+        entry = self.get(uuid)
+
+        if entry is None or entry.project != project:
+            entry = ProjectCacheEntry(
+                project,
+                None if entry is None else entry.gtfs_list,
+                None if entry is None else entry.validators,
+            )
+            self._entries[uuid] = entry
+            self._entries.move_to_end(uuid)
+
+        if validators is not None:
+            entry.validators = validators
+
+        # the GTFS list may have been received first
+        if uuid in self._pending_gtfs_lists:
+            entry.gtfs_list = self._pending_gtfs_lists.pop(uuid)
+
+        # evict least recently used projects
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+        return entry
+
+    def set_gtfs_list(self, uuid, gtfs_list):
+        """
+        Store the GTFS list of a project.
+
+        If the project document is not cached yet, the list is kept until it is stored.
+
+        :param uuid: project uuid
+        :param gtfs_list: GTFS list of the project
+        """
+        entry = self._entries.get(uuid)
+        if entry is not None:
+            entry.gtfs_list = gtfs_list
+            return
+
+        self._pending_gtfs_lists[uuid] = gtfs_list
+        self._pending_gtfs_lists.move_to_end(uuid)
+        while len(self._pending_gtfs_lists) > self.max_size:
+            self._pending_gtfs_lists.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self._pending_gtfs_lists.clear()
@@ -3,3 +3,4 @@ from .flows_panel import FlowsPanel
 from .network_panel import NetworkPanel
 from .config_panel import ConfigPanel
 from .about_panel import AboutPanel
+from .search_panel import QuickSearchPanel
@@ -1,9 +1,33 @@
 from tellae.panels.base_panel import BasePanel
+from tellae.utils.profiler import STARTUP_PROFILER
+from tellae.utils.watchdog import WATCHDOG
+from tellae.utils.ui_scheduler import UI_SCHEDULER
 
 
 class AboutPanel(BasePanel):
 
     def setup(self):
-        pass
         # set about text with version number
         # self.dlg.about_plugin.setText(ABOUT_PLUGIN)
+
+        self.update_diagnostics()
+
+        # refresh the diagnostics each time the tab is displayed
+        self.dlg.stacked_panels_widget.currentChanged.connect(self.on_tab_changed)
+
+    def on_tab_changed(self, index):
+        if index == self.store.Tabs.about:
+            self.update_diagnostics()
+
+    def update_diagnostics(self):
+        """
+        Display the timings of the last plugin startups and UI tasks, and the main
+        thread stalls if the watchdog is enabled.
+        """
+        diagnostics = STARTUP_PROFILER.report()
+        if UI_SCHEDULER.stats:
+            diagnostics += "\n\nUI tasks\n\n" + UI_SCHEDULER.report()
+        if WATCHDOG.running or WATCHDOG.offenders:
+            diagnostics += "\n\nMain thread stalls\n\n" + WATCHDOG.report()
+
+        self.dlg.diagnostics_text.setPlainText(diagnostics)
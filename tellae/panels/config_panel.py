@@ -1,6 +1,18 @@
 from tellae.panels.base_panel import BasePanel
 from tellae.services.project import select_project, get_project_name
 from tellae.utils.utils import log
+from tellae.utils.task_group import TaskGroup
+from tellae.utils.settings import (
+    get_setting,
+    set_setting,
+    PREFETCH_PROJECT_SETTING,
+    STALL_WATCHDOG_SETTING,
+)
+from tellae.utils.watchdog import WATCHDOG
+from tellae.utils.file_cache import FILE_CACHE
+from tellae.utils.tile_cache import TILE_CACHE
+from tellae.utils.layer_files import LAYER_FILES
+from tellae.services.prefetch import PREFETCHER
 from tellae import tr
 
 class ConfigPanel(BasePanel):
@@ -20,6 +32,18 @@ class ConfigPanel(BasePanel):
         # add listener on project reload button
         self.dlg.reloadProjectBtn.clicked.connect(self.reload_project)
 
+        # project prefetch option
+        self.dlg.prefetchProjectCheckBox.setChecked(get_setting(PREFETCH_PROJECT_SETTING))
+        self.dlg.prefetchProjectCheckBox.toggled.connect(self.on_prefetch_project_toggled)
+
+        # main thread stall watchdog option
+        self.dlg.stallWatchdogCheckBox.setChecked(get_setting(STALL_WATCHDOG_SETTING))
+        self.dlg.stallWatchdogCheckBox.toggled.connect(self.on_stall_watchdog_toggled)
+
+        # local cache usage, refreshed each time the tab is displayed
+        self.dlg.clearCacheButton.clicked.connect(self.clear_cache)
+        self.dlg.stacked_panels_widget.currentChanged.connect(self.on_tab_changed)
+
     def set_auth_button_text(self, user):
         if user is None:
             text = tr("Se connecter")
@@ -33,9 +57,12 @@ class ConfigPanel(BasePanel):
 
         # set list of layers
         self.selector_listener_deactivated = True
+        self.dlg.projectSelector.clear()
         self.dlg.projectSelector.addItems(names)
         if "SEP" in self.store.projects:
             self.dlg.projectSelector.insertSeparator(self.store.projects.index("SEP"))
+        if self.store.current_project is not None:
+            self.dlg.projectSelector.setCurrentText(self.store.current_project_name)
         self.selector_listener_deactivated = False
 
     def select_project_with_index(self, index):
@@ -45,18 +72,63 @@ class ConfigPanel(BasePanel):
         if index == -1:
             raise ValueError(f"Could not find the project with name")
 
-        self.dlg.start_progress(tr("Récupération des données du projet"))
-        select_project(self.store.projects[index]["uuid"])
-        self.dlg.end_progress()
+        self._select_project(self.store.projects[index]["uuid"])
 
     def reload_project(self):
         if self.store.current_project is not None:
-            self.dlg.start_progress(tr("Récupération des données du projet"))
-            select_project(self.store.current_project["uuid"])
-            self.dlg.end_progress()
+            self._select_project(self.store.current_project["uuid"])
+
+    def _select_project(self, uuid):
+        self.dlg.start_progress(tr("Récupération des données du projet"))
+
+        task_group = TaskGroup(
+            "project",
+            on_finished=lambda _: self.dlg.end_progress(),
+            on_task_error=self.dlg.message_bar_from_exception,
+        )
+        select_project(uuid, task_group)
+        task_group.close()
+
+    def on_prefetch_project_toggled(self, checked):
+        set_setting(PREFETCH_PROJECT_SETTING, checked)
+
+        # start (or cancel) the prefetch of the current project right away
+        if self.store.current_project is not None:
+            PREFETCHER.prefetch_project(self.store.current_project)
+
+    def on_stall_watchdog_toggled(self, checked):
+        set_setting(STALL_WATCHDOG_SETTING, checked)
+
+        if checked:
+            WATCHDOG.start()
+        else:
+            WATCHDOG.stop()
+
+    def on_tab_changed(self, index):
+        if index == self.store.Tabs.config:
+            self.update_cache_usage()
+
+    def update_cache_usage(self):
+        self.dlg.cacheUsageLabel.setText(
+            tr(
+                "Cache local : {:.0f} Mo de données téléchargées, {:.0f} Mo de tuiles, "
+                "{:.0f} Mo de fichiers de couches"
+            ).format(FILE_CACHE.size / 1e6, TILE_CACHE.usage() / 1e6, LAYER_FILES.usage() / 1e6)
+        )
+
+    def clear_cache(self):
+        # files of the loaded layers are kept
+        FILE_CACHE.clear()
+        TILE_CACHE.clear()
+        LAYER_FILES.clear()
+
+        self.dlg.layers_panel.update_cache_indicators()
+        self.dlg.flows_panel.update_cache_indicators()
+        self.update_cache_usage()
 
     def on_project_update(self):
-        self.dlg.projectDescription.setText(self.store.current_project.get("description", ""))
+        project = self.store.current_project or dict()
+        self.dlg.projectDescription.setText(project.get("description", ""))
         self.selector_listener_deactivated = True
         self.dlg.projectSelector.setCurrentText(self.store.current_project_name)
         self.selector_listener_deactivated = False
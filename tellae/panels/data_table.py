@@ -1,77 +1,304 @@
-from qgis.PyQt.QtWidgets import QPushButton, QTableWidgetItem, QTableWidget
-from PyQt5.QtWidgets import QStyle
+from qgis.PyQt.QtCore import (
+    Qt,
+    QEvent,
+    QSize,
+    QModelIndex,
+    QAbstractTableModel,
+    QSortFilterProxyModel,
+)
+from qgis.PyQt.QtWidgets import (
+    QAbstractItemView,
+    QApplication,
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionButton,
+)
+
+# role of the values used to sort the columns
+SORT_ROLE = Qt.UserRole
+
+
+def _same_item(item, other):
+    return item is other or item == other
+
+
+class DataTableModel(QAbstractTableModel):
+    """
+    Table model of a list of items, whose columns are described by headers.
+
+    Cell texts are evaluated when displayed for the first time, then cached.
+    Columns are sorted by the raw values given by the "sort" function of their
+    header, or by their texts.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.headers = []
+
+        self.items = []
+
+        # evaluated cell texts, by row then column (None if not evaluated)
+        self._texts = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self.text(index.row(), index.column())
+        elif role == Qt.TextAlignmentRole:
+            return self.headers[index.column()].get("align")
+        elif role == SORT_ROLE:
+            header = self.headers[index.column()]
+            if "sort" in header:
+                return header["sort"](self.items[index.row()])
+            return self.text(index.row(), index.column())
+
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation != Qt.Horizontal or section >= len(self.headers):
+            return None
+
+        if role == Qt.DisplayRole:
+            return self.headers[section]["text"]
+        elif role == Qt.ToolTipRole:
+            return self.headers[section].get("tooltip")
+
+        return None
+
+    def text(self, row, col):
+        """
+        Get the text of a cell, evaluating it if needed.
+
+        :param row: row index
+        :param col: column index
+
+        :return: cell text, None for button columns
+        """
+        texts = self._texts[row]
+        if texts is None:
+            texts = [None] * len(self.headers)
+            self._texts[row] = texts
+
+        if texts[col] is None:
+            header = self.headers[col]
+            item = self.items[row]
+            if "slot" in header:
+                return None
+            elif callable(header["value"]):
+                texts[col] = header["value"](item)
+            else:
+                texts[col] = item[header["value"]]
+
+        return texts[col]
+
+    def set_headers(self, headers):
+        self.beginResetModel()
+        self.headers = headers
+        self._texts = [None] * len(self.items)
+        self.endResetModel()
+
+    def set_items(self, items):
+        """
+        Set the items of the table.
+
+        Only the rows that differ from the current items are updated: the common
+        leading and trailing items are kept, with their evaluated texts.
+
+        :param items: list of items
+        """
+        old_items = self.items
+        min_length = min(len(old_items), len(items))
+
+        # rows that did not change at the start and at the end of the table
+        start = 0
+        while start < min_length and _same_item(old_items[start], items[start]):
+            start += 1
+        end = 0
+        while end < min_length - start and _same_item(old_items[-1 - end], items[-1 - end]):
+            end += 1
+
+        # number of rows in between, the first ones are replaced
+        old_count = len(old_items) - start - end
+        new_count = len(items) - start - end
+        replaced = min(old_count, new_count)
+
+        if old_count > new_count:
+            self.beginRemoveRows(QModelIndex(), start + replaced, start + old_count - 1)
+            self.items = items
+            del self._texts[start + replaced : start + old_count]
+            self.endRemoveRows()
+        elif new_count > old_count:
+            self.beginInsertRows(QModelIndex(), start + replaced, start + new_count - 1)
+            self.items = items
+            self._texts[start + replaced : start + replaced] = [None] * (new_count - old_count)
+            self.endInsertRows()
+        else:
+            self.items = items
+
+        if replaced > 0:
+            self._texts[start : start + replaced] = [None] * replaced
+            self.dataChanged.emit(
+                self.index(start, 0), self.index(start + replaced - 1, len(self.headers) - 1)
+            )
+
+    def refresh_column(self, col):
+        """
+        Evaluate the texts of a column again.
+
+        :param col: column index
+        """
+        for texts in self._texts:
+            if texts is not None:
+                texts[col] = None
+
+        if self.items:
+            self.dataChanged.emit(self.index(0, col), self.index(len(self.items) - 1, col))
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """
+    Delegate painting a push button in each cell of a column.
+
+    Buttons are only painted, so that no widget is created per row.
+    """
+
+    def __init__(self, parent, icon, handler):
+        """
+        :param parent: table view
+        :param icon: button icon
+        :param handler: function called with the source row index of the clicked button
+        """
+        super().__init__(parent)
+
+        self.icon = icon
+        self.handler = handler
+
+        # index of the button being pressed
+        self._pressed = None
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(1, 1, -1, -1)
+        button.icon = self.icon
+        button.iconSize = QSize(16, 16)
+        button.state = QStyle.State_Enabled
+        if self._pressed == (index.row(), index.column()):
+            button.state |= QStyle.State_Sunken
+        else:
+            button.state |= QStyle.State_Raised
+
+        style = option.widget.style() if option.widget is not None else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            self._pressed = (index.row(), index.column())
+            return True
+        elif event.type() == QEvent.MouseButtonRelease and self._pressed is not None:
+            clicked = self._pressed == (index.row(), index.column()) and option.rect.contains(
+                event.pos()
+            )
+            self._pressed = None
+            if clicked:
+                self.handler(model.mapToSource(index).row())
+            return True
+
+        return False
 
 
 class DataTable:
 
-    def __init__(self, parent_panel, table_widget):
+    def __init__(self, parent_panel, table_view):
 
         self.parent_panel = parent_panel
 
-        self.table_widget = table_widget
+        self.table_widget = table_view
 
         # total table length is 791, scroll bar is 16 => header width must total to 775
         self._headers = None
 
+        # index of the column focused when showing a row (first text column)
+        self.name_column = 0
+
+        # items model, displayed through a proxy so that columns can be sorted
+        self.model = DataTableModel(self.table_widget)
+        self.proxy = QSortFilterProxyModel(self.table_widget)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setSortRole(SORT_ROLE)
+        self.table_widget.setModel(self.proxy)
+
+        # keep items order until a column header is clicked
+        self.table_widget.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table_widget.setSortingEnabled(True)
+
         # disable table edition
-        self.table_widget.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table_widget.setEditTriggers(QAbstractItemView.NoEditTriggers)
 
     @property
     def headers(self):
         return self._headers
 
+    @property
+    def items(self):
+        return self.model.items
+
     def set_headers(self, headers):
 
         self._headers = headers
 
-        # set number of columns
-        self.table_widget.setColumnCount(len(self._headers))
+        self.model.set_headers(headers)
+
+        self.name_column = next(
+            (col for col, header in enumerate(headers) if "slot" not in header), 0
+        )
 
-        # populate headers
-        self.table_widget.setHorizontalHeaderLabels([header["text"] for header in self._headers])
+        # set column widths and button delegates
         for col, header in enumerate(self._headers):
             if "width" in header:
                 self.table_widget.setColumnWidth(col, header["width"])
-            if "tooltip" in header:
-                self.table_widget.horizontalHeaderItem(col).setToolTip(header["tooltip"])
+            if "slot" in header:
+                self.table_widget.setItemDelegateForColumn(col, header["slot"])
 
     def fill_table_with_items(self, items):
+        self.model.set_items(items)
 
-        # set number of rows and columns
-        self.table_widget.setRowCount(len(items))
+    def refresh_column(self, col):
+        """
+        Evaluate the cells of a column again, for instance when their value depends on a state.
 
-        # populate table cells
-        for row, layer in enumerate(items):
-            for col, header in enumerate(self._headers):
-                # evaluate its content depending on the row and column
-                if "slot" in header:
-                    header["slot"](self.table_widget, row, col, layer, header)
-                    continue
-                elif callable(header["value"]):
-                    text = header["value"](layer)
-                else:
-                    text = layer[header["value"]]
+        :param col: column index
+        """
+        self.model.refresh_column(col)
 
-                # create a table cell
-                cell = QTableWidgetItem(text)
+    def show_row(self, row):
+        """
+        Scroll the table to the given row and focus it.
 
-                # set cell text and tooltip
-                # cell.setText(text)
-                cell.setToolTip(text)
-
-                # set text alignment
-                if "align" in header:
-                    cell.setTextAlignment(header["align"])
-
-                # put the cell in the table
-                self.table_widget.setItem(row, col, cell)
+        :param row: row index
+        """
+        index = self.proxy.mapFromSource(self.model.index(row, self.name_column))
+        self.table_widget.scrollTo(index, QAbstractItemView.PositionAtTop)
+        self.table_widget.setCurrentIndex(index)
+        self.table_widget.setFocus()
 
     def table_button_slot(self, handler, icon="SP_DialogSaveButton"):
+        """
+        Create the delegate of a button column.
+
+        :param handler: function called with the index of the clicked item
+        :param icon: name of the QStyle standard icon of the buttons
 
-        def button_maker(table_widget, row_ix, col_ix, _, __):
-            btn = QPushButton(table_widget)
-            btn.setIcon(self.parent_panel.dlg.style().standardIcon(getattr(QStyle, icon)))
-            btn.clicked.connect(lambda state, x=row_ix: handler(x))
-            table_widget.setCellWidget(row_ix, col_ix, btn)
+        :return: ButtonDelegate, to be set as the "slot" of the column header
+        """
+        icon = self.parent_panel.dlg.style().standardIcon(getattr(QStyle, icon))
 
-        return button_maker
+        return ButtonDelegate(self.table_widget, icon, handler)
@@ -4,11 +4,16 @@ from tellae.utils.utils import get_binary_name, log
 from tellae.utils.constants import TELLAE_PRIMARY_COLOR
 from tellae.utils.contexts import LayerDownloadContext
 from tellae.models.layers import StarlingLayer, FlowmapLayers
-from tellae.services.project import get_project_binary_from_hash
+from tellae.services.project import get_project_binary_from_hash, is_binary_cached
 from tellae.models.flowmap_data import FlowmapData
+from qgis.PyQt.QtCore import Qt
 from tellae import tr
 
 
+# column of the project table indicating cached binaries
+CACHE_COLUMN = 2
+
+
 class FlowsPanel(BasePanel):
 
     def __init__(self, main_dialog):
@@ -23,7 +28,14 @@ class FlowsPanel(BasePanel):
                 {
                     "text": tr("Nom"),
                     "value": lambda x: get_binary_name(x, with_extension=False),
-                    "width": 715,
+                    "width": 655,
+                },
+                {
+                    "text": tr("Cache"),
+                    "value": lambda x: "✓" if is_binary_cached(x) else "",
+                    "width": 60,
+                    "align": Qt.AlignCenter,
+                    "tooltip": tr("Données disponibles en cache local"),
                 },
             ]
         )
@@ -75,10 +87,13 @@ class FlowsPanel(BasePanel):
                 "flows",
                 handler=ctx.handler,
                 error_handler=ctx.error_handler,
-                to_json=True,
+                to_json=False,
             )
 
     # project tab
 
     def on_project_update(self):
         self.project_flows_table.fill_table_with_items(self.store.get_project_data("flows"))
+
+    def update_cache_indicators(self):
+        self.project_flows_table.refresh_column(CACHE_COLUMN)
@@ -4,11 +4,18 @@ from tellae.utils.contexts import LayerDownloadContext
 from tellae.utils.utils import get_binary_name, log
 from tellae.models.layers.add import add_database_layer
 from tellae.models.layers import GeojsonLayer
-from tellae.services.project import get_project_binary_from_hash
-from qgis.PyQt.QtCore import Qt
+from tellae.services.project import get_project_binary_from_hash, is_binary_cached
+from qgis.PyQt.QtCore import Qt, QTimer
 from tellae import tr
 
 
+# column of the project table indicating cached binaries
+CACHE_COLUMN = 2
+
+# delay between the last keystroke and the layers search (ms)
+SEARCH_DEBOUNCE_DELAY = 150
+
+
 class LayersPanel(BasePanel):
 
     def __init__(self, main_dialog):
@@ -25,6 +32,11 @@ class LayersPanel(BasePanel):
         self.database_layers_table = DataTable(self, self.dlg.tableWidget)
         self.project_layers_table = DataTable(self, self.dlg.projectLayersTable)
 
+        # the search is made once the user stops typing
+        self.search_timer = QTimer()
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_DELAY)
+
     def setup(self):
         # set default tab to 0
         self.dlg.add_layers_tab.setCurrentIndex(0)
@@ -34,6 +46,7 @@ class LayersPanel(BasePanel):
 
         # add listener to search bar
         self.dlg.layer_search_bar.textChanged.connect(self.on_search_update)
+        self.search_timer.timeout.connect(self.update_database_layers_table)
 
         # set database table headers
         button_slot = self.database_layers_table.table_button_slot(self.add_database_layer)
@@ -46,6 +59,9 @@ class LayersPanel(BasePanel):
                     "value": lambda x: self.store.datasets_summary[x["main_dataset"]].get(
                         "date", ""
                     ),
+                    "sort": lambda x: int(
+                        self.store.datasets_summary[x["main_dataset"]].get("date") or 0
+                    ),
                     "width": 80,
                     "align": Qt.AlignCenter,
                 },
@@ -67,7 +83,14 @@ class LayersPanel(BasePanel):
                 {
                     "text": tr("Nom"),
                     "value": lambda x: get_binary_name(x, with_extension=False),
-                    "width": 715,
+                    "width": 655,
+                },
+                {
+                    "text": tr("Cache"),
+                    "value": lambda x: "✓" if is_binary_cached(x) else "",
+                    "width": 60,
+                    "align": Qt.AlignCenter,
+                    "tooltip": tr("Données disponibles en cache local"),
                 },
             ]
         )
@@ -76,8 +99,8 @@ class LayersPanel(BasePanel):
         # update stored value
         self.search_text = search_text
 
-        # update layers table
-        self.update_database_layers_table()
+        # update layers table when the user stops typing
+        self.search_timer.start()
 
     def on_theme_update(self, new_theme):
         # update selected theme
@@ -86,6 +109,26 @@ class LayersPanel(BasePanel):
         # update layers table
         self.update_database_layers_table()
 
+    def set_filters(self, selected_theme, search_text):
+        """
+        Set the theme and search text filters, and update the layers table right away.
+
+        :param selected_theme: theme name, or "Tous"
+        :param search_text: searched text
+        """
+        self.dlg.themeSelector.blockSignals(True)
+        self.dlg.themeSelector.setCurrentText(selected_theme)
+        self.dlg.themeSelector.blockSignals(False)
+        self.selected_theme = selected_theme
+
+        self.dlg.layer_search_bar.blockSignals(True)
+        self.dlg.layer_search_bar.setText(search_text)
+        self.dlg.layer_search_bar.blockSignals(False)
+        self.search_text = search_text
+        self.search_timer.stop()
+
+        self.update_database_layers_table()
+
     # actions
 
     def add_spatial_data(self, row_idx):
@@ -93,6 +136,7 @@ class LayersPanel(BasePanel):
         name = get_binary_name(binary, with_extension=False)
 
         def handler(result):
+            # the GeoJSON bytes are written to the layer file without being parsed
             GeojsonLayer(data=result["content"], name=name).add_to_qgis()
 
         with LayerDownloadContext(name, handler) as ctx:
@@ -101,7 +145,7 @@ class LayersPanel(BasePanel):
                 "spatial_data",
                 handler=ctx.handler,
                 error_handler=ctx.error_handler,
-                to_json=True,
+                to_json=False,
             )
 
     def add_database_layer(self, index):
@@ -112,12 +156,17 @@ class LayersPanel(BasePanel):
     # database tab
 
     def fill_theme_selector(self):
-        # set list of layers
+        # set list of layers (without triggering theme updates)
+        self.dlg.themeSelector.blockSignals(True)
+        self.dlg.themeSelector.clear()
         self.dlg.themeSelector.addItems([tr("Tous")] + self.store.themes)
+        self.dlg.themeSelector.blockSignals(False)
 
-        # set default selection
-        # to "all"
-        self.dlg.themeSelector.setCurrentText(tr("Tous"))
+        # keep the selected theme if it still exists,
+        # otherwise set default selection to "all"
+        if self.selected_theme not in self.store.themes:
+            self.selected_theme = tr("Tous")
+        self.dlg.themeSelector.setCurrentText(self.selected_theme)
 
     def update_database_layers_table(self):
         # get list of layers to display
@@ -130,3 +179,6 @@ class LayersPanel(BasePanel):
 
     def on_project_update(self):
         self.project_layers_table.fill_table_with_items(self.store.get_project_data("spatial_data"))
+
+    def update_cache_indicators(self):
+        self.project_layers_table.refresh_column(CACHE_COLUMN)
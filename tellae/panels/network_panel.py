@@ -3,6 +3,7 @@ from tellae.panels.data_table import DataTable
 from tellae.utils.contexts import LayerDownloadContext, LayerInitContext
 from tellae.utils.utils import log
 from tellae.models.layers import GtfsLayers
+from tellae.models import catalog_search
 from tellae.services.network import get_gtfs_routes_and_stops, gtfs_date_to_datetime
 from qgis.PyQt.QtCore import Qt
 from qgis.core import Qgis
@@ -49,6 +50,7 @@ class NetworkPanel(BasePanel):
             {
                 "text": tr("Période"),
                 "value": lambda x: f'{gtfs_date_to_datetime(x["start_date"])} - {gtfs_date_to_datetime(x["end_date"])}' if x["start_date"] is not None else "",
+                "sort": lambda x: x["start_date"] or "",
                 "width": 180,
                 "align": Qt.AlignCenter,
             },
@@ -59,14 +61,9 @@ class NetworkPanel(BasePanel):
         if text == "":
             gtfs_list = self.store.database_gtfs_list
         else:
-            text_lower = text.lower()
-            gtfs_list = [
-                x
-                for x in self.store.database_gtfs_list
-                if text_lower in x["name"].lower()
-                or text_lower in x["network_name"].lower()
-                or text_lower in (x["moa"]["name"] if x["moa"] else x["moa_name"]).lower()
-            ]
+            # search networks by name, network name and AOM
+            entries = self.store.catalog_search.search(text, tag=catalog_search.DATABASE_GTFS)
+            gtfs_list = [entry.item for entry in entries]
 
         return gtfs_list
 
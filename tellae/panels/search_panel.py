@@ -0,0 +1,146 @@
+from tellae.panels.base_panel import BasePanel
+from tellae.models import catalog_search
+from qgis.PyQt.QtCore import QTimer
+from tellae import tr
+
+
+# delay between the last keystroke and the quick search (ms)
+SEARCH_DEBOUNCE_DELAY = 150
+
+# maximum number of displayed results
+QUICK_SEARCH_MAX_RESULTS = 20
+
+KIND_LABELS = {
+    catalog_search.LAYER: tr("Calque"),
+    catalog_search.PROVIDER: tr("Source"),
+    catalog_search.DATASET: tr("Jeu de données"),
+    catalog_search.DATABASE_GTFS: tr("Réseau"),
+    catalog_search.PROJECT_GTFS: tr("Réseau du projet"),
+    catalog_search.SPATIAL_DATA: tr("Calque du projet"),
+    catalog_search.FLOWS: tr("Flux du projet"),
+}
+
+
+class QuickSearchPanel(BasePanel):
+    """
+    Search box over all the catalogs, jumping to the panel row of the selected result.
+    """
+
+    def __init__(self, main_dialog):
+
+        super().__init__(main_dialog)
+
+        # displayed search results
+        self.results = []
+
+        # the search is made once the user stops typing
+        self.search_timer = QTimer()
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_DELAY)
+
+    def setup(self):
+        self.dlg.quick_search_results.hide()
+
+        self.dlg.quick_search_bar.textChanged.connect(lambda _: self.search_timer.start())
+        self.dlg.quick_search_bar.returnPressed.connect(lambda: self.on_result_activated(0))
+        self.search_timer.timeout.connect(self.update_results)
+        self.dlg.quick_search_results.itemActivated.connect(
+            lambda item: self.on_result_activated(self.dlg.quick_search_results.row(item))
+        )
+        self.dlg.quick_search_results.itemClicked.connect(
+            lambda item: self.on_result_activated(self.dlg.quick_search_results.row(item))
+        )
+
+    def update_results(self):
+        text = self.dlg.quick_search_bar.text()
+
+        if text.strip() == "":
+            self.results = []
+        else:
+            self.results = self.store.catalog_search.search(text, limit=QUICK_SEARCH_MAX_RESULTS)
+
+        self.dlg.quick_search_results.clear()
+        self.dlg.quick_search_results.addItems([self._result_label(entry) for entry in self.results])
+        self.dlg.quick_search_results.setVisible(text.strip() != "")
+
+    def on_result_activated(self, index):
+        # evaluate pending searches
+        if self.search_timer.isActive():
+            self.search_timer.stop()
+            self.update_results()
+
+        if index >= len(self.results):
+            return
+
+        entry = self.results[index]
+
+        # close the search
+        self.dlg.quick_search_bar.clear()
+        self.search_timer.stop()
+        self.update_results()
+
+        self.show_entry(entry)
+
+    def show_entry(self, entry):
+        """
+        Display the panel tab containing the entry, and scroll to its row.
+
+        :param entry: CatalogEntry
+        """
+        layers_panel = self.dlg.layers_panel
+        network_panel = self.dlg.network_panel
+
+        if entry.kind in [catalog_search.LAYER, catalog_search.DATASET]:
+            self._set_tab(self.store.Tabs.layers, self.dlg.add_layers_tab, 0)
+            layers_panel.set_filters(tr("Tous"), "")
+            if entry.kind == catalog_search.LAYER:
+                row = self._find_row(layers_panel.database_layers_table, lambda x: x is entry.item)
+            else:
+                row = self._find_row(
+                    layers_panel.database_layers_table,
+                    lambda x: x["main_dataset"] == entry.key,
+                )
+            layers_panel.database_layers_table.show_row(row)
+        elif entry.kind == catalog_search.PROVIDER:
+            self._set_tab(self.store.Tabs.layers, self.dlg.add_layers_tab, 0)
+            layers_panel.set_filters(tr("Tous"), entry.key)
+        elif entry.kind == catalog_search.SPATIAL_DATA:
+            self._set_tab(self.store.Tabs.layers, self.dlg.add_layers_tab, 1)
+            table = layers_panel.project_layers_table
+            table.show_row(self._find_row(table, lambda x: x["hash"] == entry.key))
+        elif entry.kind == catalog_search.FLOWS:
+            self._set_tab(self.store.Tabs.flows)
+            table = self.dlg.flows_panel.project_flows_table
+            table.show_row(self._find_row(table, lambda x: x["hash"] == entry.key))
+        elif entry.kind == catalog_search.DATABASE_GTFS:
+            self._set_tab(self.store.Tabs.network, self.dlg.add_network_tab, 0)
+            self.dlg.network_search_bar.clear()
+            table = network_panel.database_network_table
+            table.show_row(self._find_row(table, lambda x: x["uuid"] == entry.key))
+        elif entry.kind == catalog_search.PROJECT_GTFS:
+            self._set_tab(self.store.Tabs.network, self.dlg.add_network_tab, 1)
+            table = network_panel.project_network_table
+            table.show_row(self._find_row(table, lambda x: x["uuid"] == entry.key))
+        else:
+            raise ValueError(f"Unknown search entry kind '{entry.kind}'")
+
+    def _set_tab(self, tab, sub_tab_widget=None, sub_tab=None):
+        self.store.set_tab(tab, update_menu_widget=True)
+        if sub_tab_widget is not None:
+            sub_tab_widget.setCurrentIndex(sub_tab)
+
+    @staticmethod
+    def _find_row(table, predicate):
+        for row, item in enumerate(table.items):
+            if predicate(item):
+                return row
+
+        return 0
+
+    @staticmethod
+    def _result_label(entry):
+        label = f"{KIND_LABELS[entry.kind]} : {entry.name or entry.details}"
+        if entry.name and entry.details:
+            label += f" ({entry.details})"
+
+        return label
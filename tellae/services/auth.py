@@ -1,10 +1,19 @@
 from tellae.tellae_store import TELLAE_STORE
-from tellae.utils import log, InternalError, tr
+from tellae.utils import log, InternalError, RequestsException, tr
 from tellae.utils.requests import request_whale, message_from_request_error
 from tellae.utils.contexts import ProgressContext
-from tellae.services.project import update_project_list, select_project
+from tellae.utils.task_group import TaskGroup
+from tellae.utils.profiler import STARTUP_PROFILER, READY_PHASE
+from tellae.services.project import update_project_list, select_project, update_current_project
 from tellae.services.layers import init_layers_table
 from tellae.services.network import init_database_gtfs_list
+from tellae.services.snapshot import (
+    restore_user_snapshot,
+    remove_user_snapshot,
+    save_store_snapshot,
+)
+from tellae.services.prefetch import PREFETCHER
+from tellae.services.refresh import REFRESH_SCHEDULER
 from qgis.core import (
     QgsApplication,
     QgsAuthMethodConfig,
@@ -18,6 +27,9 @@ AWS_TELLAE_DEV_CONFIG = "AWS-Tellae-dev"
 AWS_TELLAE_TMP_CONFIG = "AWS-Tellae-tmp"
 AWS_REGION = "fr-north-1"
 
+# tasks of the store initialisation
+STORE_TASKS = ["layers_table", "database_gtfs"]
+
 
 # authentication actions
 
@@ -87,6 +99,21 @@ def _try_existing_indents():
 
 
 def _login(handler=None, error_handler=None, set_indents=False):
+    # display the last known user data while waiting for the login
+    cached_user = None
+    if not TELLAE_STORE.authenticated:
+        cached_user = restore_user_snapshot()
+
+    # with a cached user, request the user data and the store data without waiting for the login
+    task_group = None
+    if cached_user is not None:
+        task_group = _create_login_task_group()
+        on_auth_done = task_group.start_task("auth")
+        try:
+            _start_login_tasks(cached_user, task_group)
+        finally:
+            task_group.close()
+
     # create full success callback
     def full_handler(result):
         # handler specific to login type
@@ -94,7 +121,13 @@ def _login(handler=None, error_handler=None, set_indents=False):
             handler(result)
 
         # actions that happen on successful login
-        _on_login(result["content"])
+        if cached_user is None:
+            _on_login(result["content"])
+        else:
+            try:
+                _on_login_revalidated(result["content"], cached_user, task_group)
+            finally:
+                on_auth_done()
 
         # set indents in auth dialog
         if set_indents:
@@ -104,16 +137,78 @@ def _login(handler=None, error_handler=None, set_indents=False):
         if error_handler:
             error_handler(result)
 
+        # remove the cached user data, the error is displayed in the auth dialog
+        if cached_user is not None:
+            _rollback_login()
+            on_auth_done(RequestsException(message_from_request_error(result)))
+
         # display error message in auth dialog
         TELLAE_STORE.auth_dialog.display_error_message(message_from_request_error(result))
         # show authentication dialog
         TELLAE_STORE.auth_dialog.change_page_and_show()
 
     # make request to whale /auth/me service
-    request_whale("/auth/me", handler=full_handler, error_handler=full_error_handler)
+    login_phase = STARTUP_PROFILER.start_phase("_login")
+
+    def profiled_handler(result):
+        login_phase.end()
+        with STARTUP_PROFILER.phase("_on_login"):
+            full_handler(result)
+
+    def profiled_error_handler(result):
+        login_phase.end()
+        full_error_handler(result)
+
+    request_whale("/auth/me", handler=profiled_handler, error_handler=profiled_error_handler)
 
 
 def _on_login(user):
+    _update_user_data(user)
+
+    # request the user data and store data concurrently
+    task_group = _create_login_task_group()
+    try:
+        _start_login_tasks(user, task_group)
+    finally:
+        task_group.close()
+
+
+def _on_login_revalidated(user, cached_user, task_group):
+    """
+    Update the user data displayed from the snapshot with the login response.
+
+    :param user: authenticated user
+    :param cached_user: user restored from the snapshot
+    :param task_group: TaskGroup of the login requests
+    """
+    if user == cached_user:
+        return
+
+    _update_user_data(user)
+
+    # the project requests already made are ignored if the selected project changed
+    if user["kite"]["project"] != cached_user["kite"]["project"]:
+        try:
+            select_project(user["kite"]["project"], task_group)
+        except Exception as e:
+            TELLAE_STORE.main_dialog.message_bar_from_exception(e)
+
+
+def _rollback_login():
+    """
+    Remove the user data displayed from the snapshot after an authentication failure.
+    """
+    # the snapshot would display the rejected user again on the next start
+    remove_user_snapshot()
+
+    TELLAE_STORE.reset_user()
+
+    TELLAE_STORE.main_dialog.config_panel.set_auth_button_text(None)
+    TELLAE_STORE.main_dialog.config_panel.fill_project_selector()
+    update_current_project(None)
+
+
+def _update_user_data(user):
     with ProgressContext(tr("Récupération des données utilisateur")):
         # update stored used
         update_user(user)
@@ -121,13 +216,56 @@ def _on_login(user):
         # update project list
         update_project_list()
 
+
+def _create_login_task_group():
+    TELLAE_STORE.main_dialog.start_progress(tr("Initialisation des données Tellae"))
+
+    return TaskGroup(
+        "login",
+        on_finished=_on_login_tasks_finished,
+        on_task_error=TELLAE_STORE.main_dialog.message_bar_from_exception,
+    )
+
+
+def _start_login_tasks(user, task_group):
+    try:
         # select project stored in user
-        select_project(user["kite"]["project"])
+        select_project(user["kite"]["project"], task_group)
+
+        # if store is not initiated, do it now
+        if not TELLAE_STORE.store_initiated:
+            init_store(task_group)
+    except Exception as e:
+        TELLAE_STORE.main_dialog.message_bar_from_exception(e)
+
+
+def _on_login_tasks_finished(task_group):
+    # the cached user was rejected, the session does not start
+    if "auth" in task_group.errors:
+        TELLAE_STORE.main_dialog.end_progress()
+        STARTUP_PROFILER.add_note("Authentication failed")
+        STARTUP_PROFILER.end()
+        return
+
+    if any(task in task_group.timings for task in STORE_TASKS):
+        _on_store_initiated(task_group)
 
-    # if store is not initiated, do it now
-    if not TELLAE_STORE.store_initiated:
-        with ProgressContext(tr("Initialisation des données Tellae")) as progress_context:
-            init_store(progress_context)
+    # keep the user data and synchronised catalogs for the next plugin start
+    save_store_snapshot()
+
+    # download the layers likely to be used in the session
+    PREFETCHER.schedule()
+
+    # keep the catalogs and the project up to date during the session
+    REFRESH_SCHEDULER.start()
+
+    TELLAE_STORE.main_dialog.end_progress()
+
+    # end of the plugin startup
+    STARTUP_PROFILER.add_note(task_group.summary())
+    STARTUP_PROFILER.end_phase(READY_PHASE)
+    STARTUP_PROFILER.end()
+    TELLAE_STORE.main_dialog.about_panel.update_diagnostics()
 
 
 def _create_or_update_auth_config(name, key, secret):
@@ -205,27 +343,30 @@ def update_user(user):
     TELLAE_STORE.main_dialog.config_panel.set_auth_button_text(user)
 
 
-def init_store(progress_context):
+def init_store(task_group):
     """
     Initialise the plugin store with static data from Whale.
+
+    Store requests are made concurrently as tasks of the given group,
+    and each panel is filled as soon as its data is received.
+
+    :param task_group: TaskGroup to which the store requests are added
     """
     if not TELLAE_STORE.authenticated:
         raise InternalError("Trying to initiate store without being authenticated")
 
-    errors = False
-
     # get database layers
-    try:
-        init_layers_table()
-    except Exception as e:
-        progress_context.signal_error_without_interrupting(e)
-        errors = True
+    init_layers_table(
+        task_group.start_task(
+            "layers_table", "Erreur lors de la récupération de la table des calques"
+        )
+    )
 
     # get database networks
-    try:
-        init_database_gtfs_list()
-    except Exception as e:
-        progress_context.signal_error_without_interrupting(e)
-        errors = True
+    init_database_gtfs_list(
+        task_group.start_task("database_gtfs", "Erreur lors de la récupération de la base de GTFS")
+    )
+
 
-    TELLAE_STORE.store_initiated = not errors
+def _on_store_initiated(task_group):
+    TELLAE_STORE.store_initiated = not any(task in task_group.errors for task in STORE_TASKS)
@@ -1,53 +1,286 @@
 from tellae.utils.utils import (
     log,
+    merge_sorted_items,
 )
 from tellae.utils import RequestsException, MinZoomException, EmptyLayerException, tr
-from tellae.utils.requests import request_whale
+from tellae.utils.requests import request_whale, cached_result
+from tellae.utils.file_cache import FILE_CACHE
 from tellae.tellae_store import TELLAE_STORE, THEMES_TRANSLATION
+from tellae.services.sync import (
+    LAYERS_ENTRY,
+    DATASETS_ENTRY,
+    request_whale_if_modified,
+    get_snapshot_entry,
+    set_snapshot_entry,
+    diff_items,
+)
 from qgis.core import (
     Qgis,
 )
 import traceback
+import hashlib
+import json
 
+# tables whose TileJSON could not be obtained during the session {table: exception}
+_TILEJSON_FAILURES = dict()
 
-def init_layers_table():
-    try:
-        # get database layers table
-        db_layers_table = request_whale("/shark/layers/table", blocking=True)["content"]
 
-        # filter visible layers
-        layers = [layer for layer in db_layers_table if layer["visible"]]
+def init_layers_table(on_done):
+    """
+    Request the layers table and the datasets summary concurrently, then update the store
+    and fill the layers panel once both are received.
+
+    :param on_done: callback called at the end, with the exception that occurred if any
+    """
+    responses = dict()
+
+    def on_response(name):
+        def handler(content, validators):
+            responses[name] = (content, validators)
+
+            # wait for both tables
+            if len(responses) < 2:
+                return
+
+            try:
+                _on_layers_table_received(*responses["layers"], *responses["datasets"])
+            except Exception as e:
+                on_done(e)
+            else:
+                on_done()
+
+        return handler
+
+    def error_handler(result):
+        on_done(result["exception"])
+
+    # get database layers and datasets tables (None if they did not change since last sync)
+    request_whale_if_modified(
+        "/shark/layers/table", LAYERS_ENTRY, on_response("layers"), error_handler
+    )
+    request_whale_if_modified(
+        "/shark/datasets/summary", DATASETS_ENTRY, on_response("datasets"), error_handler
+    )
+
+
+def _on_layers_table_received(
+    db_layers_table, layers_validators, dataset_table, datasets_validators
+):
+    # nothing changed since the displayed tables
+    if (
+        db_layers_table is None
+        and dataset_table is None
+        and TELLAE_STORE.layer_summary
+        and get_snapshot_entry(LAYERS_ENTRY)["locale"] == TELLAE_STORE.locale
+    ):
+        return
+
+    # update store
+    update_layer_summary(db_layers_table, dataset_table)
+
+    # update catalog snapshot
+    set_snapshot_entry(
+        DATASETS_ENTRY, list(TELLAE_STORE.datasets_summary.values()), datasets_validators
+    )
+    set_snapshot_entry(
+        LAYERS_ENTRY, TELLAE_STORE.layer_summary, layers_validators, locale=TELLAE_STORE.locale
+    )
 
-        # evaluate list of themes
-        themes = list(set([theme for layer in layers for theme in layer["themes"]]))
-        themes = [THEMES_TRANSLATION.get(theme, theme) for theme in themes]
+    # fill UI using results
+    TELLAE_STORE.main_dialog.layers_panel.fill_theme_selector()
+    TELLAE_STORE.main_dialog.layers_panel.update_database_layers_table()
 
-        # update store
-        TELLAE_STORE.layer_summary = layers
-        TELLAE_STORE.themes = sorted(themes)
 
-        # get dataset table
-        dataset_table = request_whale("/shark/datasets/summary", blocking=True)["content"]
-        datasets = {dataset["id"]: dataset for dataset in dataset_table}
+def update_layer_summary(db_layers_table, dataset_table):
+    """
+    Update the layer summary, themes and datasets summary of the store.
+
+    Tables that did not change since the last synchronisation are given as None
+    and read from the catalog snapshot. When possible, changes are merged into
+    the sorted layer summary of the snapshot instead of sorting the whole table.
+
+    :param db_layers_table: Whale layers table, or None if not modified
+    :param dataset_table: Whale datasets summary, or None if not modified
+    """
+    layers_entry = get_snapshot_entry(LAYERS_ENTRY)
+    datasets_entry = get_snapshot_entry(DATASETS_ENTRY)
+
+    # update datasets and evaluate which ones changed
+    if dataset_table is None:
+        dataset_table = datasets_entry["items"]
+        changed_datasets = set()
+    else:
+        changed, removed_ids = diff_items(datasets_entry["items"], dataset_table)
+        changed_datasets = {dataset["id"] for dataset in changed} | set(removed_ids)
+
+    TELLAE_STORE.datasets_summary = {dataset["id"]: dataset for dataset in dataset_table}
+
+    # filter visible layers
+    if db_layers_table is None:
+        layers = layers_entry["items"]
+    else:
+        layers = [layer for layer in db_layers_table if layer["visible"]]
 
-        TELLAE_STORE.datasets_summary = datasets
+    # code that needs both tables to be set
 
-        # code that needs both tables to be set
+    # sort layers table by name and date (desc)
+    if not layers_entry["items"] or layers_entry["locale"] != TELLAE_STORE.locale:
+        # no sorted version of the table is available
+        layers = sorted(layers, key=layer_sort_key)
+    else:
+        changed, removed_ids = diff_items(layers_entry["items"], layers)
 
-        # sort layers table by name and date (desc)
-        TELLAE_STORE.layer_summary = sorted(
-            TELLAE_STORE.layer_summary,
-            key=lambda x: (
-                x["name"][TELLAE_STORE.locale],
-                -int(TELLAE_STORE.datasets_summary[x["main_dataset"]].get("date", 0)),
-            ),
+        # layers whose main dataset changed may move in the table
+        changed_ids = {layer["id"] for layer in changed}
+        changed += [
+            layer
+            for layer in layers
+            if layer["main_dataset"] in changed_datasets and layer["id"] not in changed_ids
+        ]
+
+        layers = merge_sorted_items(
+            layers_entry["items"], changed, removed_ids, key=layer_sort_key
         )
 
-        # fill UI using results
-        TELLAE_STORE.main_dialog.layers_panel.fill_theme_selector()
-        TELLAE_STORE.main_dialog.layers_panel.update_database_layers_table()
-    except Exception as e:
-        raise ValueError("Erreur lors de la récupération de la table des calques") from e
+    # evaluate list of themes
+    themes = list(set([theme for layer in layers for theme in layer["themes"]]))
+    themes = [THEMES_TRANSLATION.get(theme, theme) for theme in themes]
+
+    TELLAE_STORE.layer_summary = layers
+    TELLAE_STORE.themes = sorted(themes)
+
+    # index the layers for the catalog search
+    TELLAE_STORE.index_layer_summary()
+
+
+def layer_sort_key(layer):
+    """
+    Sort key of the layer summary: by name, then by main dataset date (desc).
+
+    :param layer: layer summary item
+
+    :return: sort key
+    """
+    return (
+        layer["name"][TELLAE_STORE.locale],
+        -int(TELLAE_STORE.datasets_summary[layer["main_dataset"]].get("date", 0)),
+    )
+
+
+def get_shark_layer(table, main_dataset, handler, error_handler=None):
+    """
+    Get the GeoJSON bytes of a Shark layer, from the local cache if it is up to date.
+
+    Fetched layers are stored in the cache, versioned by their main dataset summary.
+
+    :param table: Shark table of the layer
+    :param main_dataset: main dataset of the layer
+    :param handler: handler called with the request result on success
+    :param error_handler: handler called on request fail
+    """
+    key = shark_cache_key(table)
+    version = shark_cache_version(main_dataset)
+
+    # layers without dataset information are not cached
+    if version is not None:
+        content = FILE_CACHE.get(key, version)
+        if content is not None:
+            handler(cached_result(content))
+            return
+
+    def cache_handler(result):
+        if version is not None and result["content"]:
+            FILE_CACHE.put(key, result["content"], version)
+        handler(result)
+
+    request_whale(
+        f"/shark/layers/geojson/{table}",
+        handler=cache_handler,
+        error_handler=error_handler,
+        to_json=False,
+    )
+
+
+def shark_cache_key(table) -> str:
+    return f"shark:{table}"
+
+
+def get_table_tilejson(table, main_dataset, handler, error_handler=None):
+    """
+    Get the Martin TileJSON of a Shark table, from the local cache if it is up to date.
+
+    The TileJSON is cached like the Shark layers, versioned by the main dataset summary.
+    Failures are remembered for the session, so that the TileJSON is not requested again.
+
+    :param table: Shark table
+    :param main_dataset: main dataset of the table
+    :param handler: handler called with the TileJSON dict on success
+    :param error_handler: handler called with an Exception on fail
+    """
+    key = f"tilejson:{table}"
+    version = shark_cache_version(main_dataset)
+
+    if table in _TILEJSON_FAILURES:
+        if error_handler is not None:
+            error_handler(_TILEJSON_FAILURES[table])
+        return
+
+    def on_failure(exception):
+        _TILEJSON_FAILURES[table] = exception
+        if error_handler is not None:
+            error_handler(exception)
+
+    if version is not None:
+        content = FILE_CACHE.get(key, version)
+        if content is not None:
+            try:
+                tilejson = json.loads(content)
+                if not isinstance(tilejson, dict):
+                    raise ValueError("TileJSON is not an object")
+            except ValueError as e:
+                # request the TileJSON again
+                log(f"Invalid cached TileJSON of '{table}': {e}", "WARNING")
+                FILE_CACHE.remove(key)
+            else:
+                handler(tilejson)
+                return
+
+    def cache_handler(result):
+        try:
+            tilejson = json.loads(result["content"])
+            if not isinstance(tilejson, dict):
+                raise ValueError("TileJSON is not an object")
+        except (TypeError, ValueError) as e:
+            log(f"Invalid TileJSON of '{table}': {e}", "WARNING")
+            on_failure(e)
+            return
+
+        # only valid TileJSON are cached
+        if version is not None:
+            FILE_CACHE.put(key, result["content"], version)
+        handler(tilejson)
+
+    request_whale(
+        f"/martin/{table}",
+        handler=cache_handler,
+        error_handler=lambda result: on_failure(result["exception"]),
+        to_json=False,
+    )
+
+
+def shark_cache_version(main_dataset) -> str | None:
+    """
+    Evaluate the version of a cached Shark layer, from the summary of its main dataset.
+
+    :param main_dataset: main dataset id
+
+    :return: version string, or None if the dataset is unknown
+    """
+    dataset = TELLAE_STORE.datasets_summary.get(main_dataset)
+    if dataset is None:
+        return None
+
+    return hashlib.md5(json.dumps(dataset, sort_keys=True).encode("utf-8")).hexdigest()
 
 
 def signal_layer_add_error(layer_name, exception):
@@ -1,37 +1,124 @@
 from tellae.tellae_store import TELLAE_STORE
 from tellae.utils import log
+from tellae.utils.utils import merge_sorted_items
 from tellae.utils.requests import request_whale, request_whale_with_continuation_token
+from tellae.services.sync import (
+    DATABASE_GTFS_ENTRY,
+    get_snapshot_entry,
+    set_snapshot_entry,
+    needs_full_sync,
+)
 import copy
 import datetime
 
 
-def init_database_gtfs_list():
-    try:
-        gtfs_list = get_gtfs_graphql("")
-        gtfs_list = [gtfs for gtfs in gtfs_list if gtfs["project"] is None and gtfs["public"]]
+def init_database_gtfs_list(on_done):
+    """
+    Request the database GTFS list, then update the store and fill the network panel.
 
-        # set result in store
-        TELLAE_STORE.database_gtfs_list = gtfs_list
+    :param on_done: callback called at the end, with the exception that occurred if any
+    """
+    entry = get_snapshot_entry(DATABASE_GTFS_ENTRY)
+    full_sync = needs_full_sync(entry)
 
-        # update ux
-        TELLAE_STORE.main_dialog.network_panel.update_database_network_list()
-    except Exception as e:
-        raise ValueError("Erreur lors de la récupération de la base de GTFS") from e
+    def handler(gtfs_list):
+        try:
+            if full_sync:
+                gtfs_list = [gtfs for gtfs in gtfs_list if is_database_gtfs(gtfs)]
+            else:
+                # merge updates in the sorted list, removing the ones that are not listed anymore
+                changed = [gtfs for gtfs in gtfs_list if is_database_gtfs(gtfs)]
+                removed_ids = [gtfs["uuid"] for gtfs in gtfs_list if not is_database_gtfs(gtfs)]
+                gtfs_list = merge_sorted_items(
+                    entry["items"], changed, removed_ids, key=gtfs_sort_key, id_key="uuid"
+                )
 
+            # update catalog snapshot
+            set_snapshot_entry(DATABASE_GTFS_ENTRY, gtfs_list, full_sync=full_sync)
 
-def update_project_gtfs_list():
-    try:
-        project_gtfs = get_gtfs_graphql(f"project='{TELLAE_STORE.current_project['uuid']}'")
+            # update ux if the list changed
+            if gtfs_list != TELLAE_STORE.database_gtfs_list:
+                TELLAE_STORE.set_database_gtfs_list(gtfs_list)
+                TELLAE_STORE.main_dialog.network_panel.update_database_network_list()
+        except Exception as e:
+            on_done(e)
+        else:
+            on_done()
 
-        # set result in store
-        TELLAE_STORE.project_gtfs_list = project_gtfs
+    if full_sync:
+        query = ""
+    else:
+        # only request the networks updated since the last synchronisation
+        last_update = max(gtfs["_lastUpdate"] or "" for gtfs in entry["items"])
+        query = f"_lastUpdate>'{last_update}'"
 
-        # update ux
-        TELLAE_STORE.main_dialog.network_panel.update_project_network_list()
-    except Exception as e:
-        raise ValueError("Erreur lors de la récupération des GTFS de l'utilisateur") from e
+    get_gtfs_graphql(
+        query,
+        keep_deprecated=not full_sync,
+        handler=handler,
+        error_handler=lambda result: on_done(result["exception"]),
+    )
+
+
+def is_database_gtfs(gtfs):
+    """
+    Tell if the GTFS is part of the public network database.
+
+    :param gtfs: GTFS item
+
+    :return: boolean
+    """
+    return gtfs["project"] is None and gtfs["public"] and not gtfs["deprecated"]
+
+
+def update_project_gtfs_list(project_uuid, on_done):
+    """
+    Request the GTFS list of the project, then update the store and fill the network panel.
+
+    :param project_uuid: uuid of the project
+    :param on_done: callback called at the end, with the exception that occurred if any
+    """
+
+    def handler(project_gtfs):
+        try:
+            TELLAE_STORE.project_cache.set_gtfs_list(project_uuid, project_gtfs)
+
+            # ignore responses of projects that are not selected anymore,
+            # and lists that did not change since they were displayed
+            if (
+                project_uuid == TELLAE_STORE.requested_project_uuid
+                and project_gtfs != TELLAE_STORE.project_gtfs_list
+            ):
+                # set result in store
+                TELLAE_STORE.set_project_gtfs_list(project_gtfs)
+
+                # update ux
+                TELLAE_STORE.main_dialog.network_panel.update_project_network_list()
+        except Exception as e:
+            on_done(e)
+        else:
+            on_done()
+
+    get_gtfs_graphql(
+        f"project='{project_uuid}'",
+        handler=handler,
+        error_handler=lambda result: on_done(result["exception"]),
+    )
 
-def get_gtfs_graphql(query: str):
+
+def get_gtfs_graphql(query: str, keep_deprecated=False, handler=None, error_handler=None):
+    """
+    Request the GTFS list matching the query, sorted by name and date.
+
+    The request is blocking, unless a handler is provided.
+
+    :param query: GraphQL query filter
+    :param keep_deprecated: whether to keep the deprecated GTFS in the list
+    :param handler: handler called with the GTFS list on request success
+    :param error_handler: handler called on request fail
+
+    :return: GTFS list for blocking requests, None otherwise
+    """
     final_query = """
              query Q {
                  PublicTransports(query:"$query"){
@@ -86,24 +173,49 @@ def get_gtfs_graphql(query: str):
                }
          """.replace("$query", query)
 
-    gtfs_list = request_whale(
+    def process_results(result):
+        gtfs_list = result["content"]["data"]["PublicTransports"]["results"]
+        if not keep_deprecated:
+            gtfs_list = [gtfs for gtfs in gtfs_list if not gtfs["deprecated"]]
+
+        # sort by name and date
+        return sorted(gtfs_list, key=gtfs_sort_key)
+
+    def async_handler(result):
+        try:
+            gtfs_list = process_results(result)
+        except Exception as e:
+            # signal unexpected responses as request errors
+            result["exception"] = e
+            if error_handler is not None:
+                error_handler(result)
+        else:
+            handler(gtfs_list)
+
+    result = request_whale(
         "/graphql",
         method="POST",
         headers={"content-type": "application/json"},
         body={"query": final_query},
-        blocking=True,
-    )["content"]["data"]["PublicTransports"]["results"]
-    gtfs_list = [gtfs for gtfs in gtfs_list if not gtfs["deprecated"]]
-
-    # sort by name and date
-    gtfs_list = sorted(
-        gtfs_list,
-        key=lambda x: datetime.datetime.strptime(x.get("start_date", "1990-01-01") or "1990-01-01", "%Y-%M-%d"),
-        reverse=True,
+        handler=None if handler is None else async_handler,
+        error_handler=error_handler,
+        blocking=handler is None,
     )
-    gtfs_list = sorted(gtfs_list, key=lambda x: x["name"])
 
-    return gtfs_list
+    if handler is None:
+        return process_results(result)
+
+
+def gtfs_sort_key(gtfs):
+    """
+    Sort key of the GTFS lists: by name, then by start date (desc).
+
+    :param gtfs: GTFS item
+
+    :return: sort key
+    """
+    start_date = datetime.datetime.strptime(gtfs.get("start_date") or "1990-01-01", "%Y-%m-%d")
+    return gtfs["name"], -start_date.toordinal()
 
 def get_gtfs_routes_and_stops(gtfs_uuid, handler, error_handler):
 
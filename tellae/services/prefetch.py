@@ -0,0 +1,426 @@
+"""
+Predictive prefetch of the layers used in most sessions.
+
+After login, the items most likely to be loaded (according to the local usage
+statistics) are downloaded into the local cache. Downloads are made one at a time,
+with a pause between them, so that they do not compete with user requests.
+Prefetch stops when its bandwidth or disk budget is reached, and is skipped on
+metered or slow connections.
+
+If enabled in the settings, the binaries of the selected project are also prefetched,
+before the predicted items. They are not limited by the bandwidth budget.
+
+The cells around the map viewport are also prefetched into the tile cache for the
+layers loaded by viewport, as long as no interactive cell request is pending.
+"""
+
+import time
+
+from qgis.PyQt.QtCore import QTimer
+
+from tellae.tellae_store import TELLAE_STORE
+from tellae.utils.utils import log
+from tellae.utils.file_cache import FILE_CACHE
+from tellae.utils.tile_cache import TILE_CACHE
+from tellae.utils.requests import request_whale_shared
+from tellae.utils.tile_grid import tile_bbox
+from tellae.utils.settings import get_setting, PREFETCH_PROJECT_SETTING
+from tellae.services.usage import get_likely_items, SHARK_USAGE, BINARY_USAGE
+from tellae.services.layers import get_shark_layer, shark_cache_key, shark_cache_version
+from tellae.services.project import download_project_binary, binary_cache_key, cache_project_binary
+
+# maximum number of prefetched items
+PREFETCH_MAX_ITEMS = 15
+
+# project attributes whose binaries are prefetched, by priority
+PROJECT_PREFETCH_ATTRIBUTES = ["spatial_data", "flows"]
+
+# delay before starting the prefetch, and between two downloads (ms)
+PREFETCH_START_DELAY = 5000
+PREFETCH_INTERVAL = 500
+
+# maximum volume downloaded by the prefetch in a session (bytes)
+PREFETCH_BANDWIDTH_BUDGET = 200 * 1024 * 1024
+
+# the prefetch does not fill the cache beyond this size (bytes)
+PREFETCH_DISK_BUDGET = 1024 * 1024 * 1024
+
+# prefetch stops if a download is slower than this (bytes/s)
+PREFETCH_MIN_THROUGHPUT = 250 * 1024
+
+# throughput is only evaluated on downloads larger than this (bytes)
+THROUGHPUT_MIN_SIZE = 512 * 1024
+
+# maximum number of cells prefetched around the viewport of a layer
+CELL_PREFETCH_MAX_CELLS = 32
+
+# delay between the last interactive cell request and the cells prefetch, and between two downloads (ms)
+CELL_PREFETCH_DELAY = 1000
+CELL_PREFETCH_INTERVAL = 200
+
+# the connection type is evaluated again after this delay (seconds)
+METERED_CHECK_INTERVAL = 300
+
+# last evaluation of the connection type (time, is metered)
+_METERED_CHECK = None
+
+
+class PrefetchJob:
+    """
+    A prefetch download.
+    """
+
+    def __init__(self, run, project_binary=False):
+        # function making the download, called with (handler, error_handler)
+        self.run = run
+
+        # whether the job downloads a binary of the selected project
+        self.project_binary = project_binary
+
+
+class Prefetcher:
+    """
+    Sequential, low priority download of the most likely used items.
+    """
+
+    def __init__(self):
+        # pending prefetch jobs
+        self._queue = []
+
+        self._running = False
+
+        # volume downloaded in the session
+        self._downloaded = 0
+
+        # incremented on stop, so that responses of stopped jobs are ignored
+        self._generation = 0
+
+        # whether the predicted items were added to the queue
+        self._predicted = False
+
+    @property
+    def running(self):
+        return self._running
+
+    def schedule(self):
+        """
+        Start the prefetch after a delay, leaving the network to the login requests.
+        """
+        QTimer.singleShot(PREFETCH_START_DELAY, self.start)
+
+    def start(self):
+        """
+        Evaluate the items to prefetch and start downloading them.
+        """
+        # predicted items are evaluated once per session
+        if self._predicted or not TELLAE_STORE.authenticated:
+            return
+
+        if is_metered_connection():
+            log("Metered connection, layers prefetch is skipped")
+            return
+
+        self._predicted = True
+        self._queue += self._evaluate_jobs()
+        self._run_queue()
+
+    def prefetch_project(self, project):
+        """
+        Prefetch the binaries of the given project, if enabled in the settings.
+
+        Binaries are downloaded by attribute priority, smallest first.
+        Pending binaries of the previous project are dropped.
+
+        :param project: selected project document
+        """
+        self._queue = [job for job in self._queue if not job.project_binary]
+
+        if not get_setting(PREFETCH_PROJECT_SETTING) or is_metered_connection():
+            return
+
+        jobs = []
+        for priority, attribute in enumerate(PROJECT_PREFETCH_ATTRIBUTES):
+            for binary in project.get(attribute, []):
+                if FILE_CACHE.is_cached(binary_cache_key(binary["hash"])):
+                    continue
+                sort_key = (priority, binary.get("size", 0))
+                job = self._project_binary_job(binary["hash"], attribute, project["uuid"])
+                jobs.append((sort_key, job))
+
+        jobs.sort(key=lambda x: x[0])
+        self._queue = [job for _, job in jobs] + self._queue
+        self._run_queue()
+
+    def _run_queue(self):
+        if self._running or not self._queue:
+            return
+
+        log(f"Prefetching {len(self._queue)} layers")
+        self._running = True
+        self._next()
+
+    def stop(self, reason=None):
+        """
+        Stop the prefetch, ignoring the pending downloads.
+
+        :param reason: reason logged if provided
+        """
+        if reason is not None and self._running:
+            log(f"Layers prefetch stopped: {reason}")
+
+        self._running = False
+        self._queue = []
+        self._generation += 1
+
+    def _evaluate_jobs(self):
+        jobs = []
+        for usage in get_likely_items(PREFETCH_MAX_ITEMS):
+            if usage["kind"] == SHARK_USAGE:
+                job = self._shark_job(usage)
+            elif usage["kind"] == BINARY_USAGE:
+                job = self._binary_job(usage)
+            else:
+                job = None
+
+            if job is not None:
+                jobs.append(job)
+
+        return jobs
+
+    def _shark_job(self, usage):
+        table = usage["id"]
+        main_dataset = usage["params"].get("main_dataset")
+
+        # only cache layers that can be validated
+        version = shark_cache_version(main_dataset)
+        if version is None or FILE_CACHE.is_cached(shark_cache_key(table), version):
+            return None
+
+        def job(handler, error_handler):
+            get_shark_layer(table, main_dataset, handler, error_handler)
+
+        return PrefetchJob(job)
+
+    def _binary_job(self, usage):
+        binary_hash = usage["id"]
+        attribute = usage["params"].get("attribute")
+
+        # only prefetch binaries of the current project
+        project = TELLAE_STORE.current_project
+        if (
+            project is None
+            or usage["params"].get("project") != project["uuid"]
+            or binary_hash not in [binary["hash"] for binary in project.get(attribute, [])]
+            or FILE_CACHE.is_cached(binary_cache_key(binary_hash))
+        ):
+            return None
+
+        return PrefetchJob(self._project_binary_job(binary_hash, attribute, project["uuid"]).run)
+
+    def _project_binary_job(self, binary_hash, attribute, project_uuid):
+        def job(handler, error_handler):
+            # the selected project changed meanwhile
+            project = TELLAE_STORE.current_project
+            if project is None or project["uuid"] != project_uuid:
+                raise ValueError("Project binary is not part of the selected project anymore")
+
+            def cache_handler(result):
+                cache_project_binary(binary_hash, result["content"])
+                handler(result)
+
+            download_project_binary(binary_hash, attribute, cache_handler, error_handler)
+
+        return PrefetchJob(job, project_binary=True)
+
+    def _next(self):
+        if not self._running:
+            return
+
+        if not self._queue:
+            log(f"Layers prefetch ended, {self._downloaded / 1e6:.1f} MB downloaded")
+            self._running = False
+            return
+
+        job = self._queue.pop(0)
+
+        if not job.project_binary and self._downloaded >= PREFETCH_BANDWIDTH_BUDGET:
+            self.stop("bandwidth budget reached")
+            return
+
+        if FILE_CACHE.size >= PREFETCH_DISK_BUDGET:
+            self.stop("disk budget reached")
+            return
+        generation = self._generation
+        start = time.perf_counter()
+
+        def handler(result):
+            if generation != self._generation:
+                return
+
+            size = len(result["content"] or b"")
+            self._downloaded += size
+
+            # stop on slow connections
+            duration = time.perf_counter() - start
+            if size >= THROUGHPUT_MIN_SIZE and size / duration < PREFETCH_MIN_THROUGHPUT:
+                self.stop("slow connection")
+                return
+
+            QTimer.singleShot(PREFETCH_INTERVAL, self._next)
+
+        def error_handler(result):
+            if generation != self._generation:
+                return
+
+            log(f"Error while prefetching layer: {result['exception']}", "WARNING")
+            QTimer.singleShot(PREFETCH_INTERVAL, self._next)
+
+        try:
+            job.run(handler, error_handler)
+        except Exception as e:
+            log(f"Error while prefetching layer: {e}", "WARNING")
+            QTimer.singleShot(PREFETCH_INTERVAL, self._next)
+
+
+class CellPrefetcher:
+    """
+    Low priority download of the grid cells likely to be displayed next.
+
+    Cells are downloaded one at a time into the tile cache. Pending cells are dropped
+    as soon as an interactive cell request is made.
+    """
+
+    def __init__(self):
+        # pending (source, cell) downloads, most likely first
+        self._queue = []
+
+        self._running = False
+
+        # number of pending interactive cell requests
+        self._interactive = 0
+
+        # volume downloaded in the session
+        self._downloaded = 0
+
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._next)
+
+    def prefetch(self, source, cells):
+        """
+        Replace the pending cells of a source.
+
+        :param source: VectorTileGeojsonSource instance
+        :param cells: (z, x, y) cells, most likely first
+        """
+        self._queue = [job for job in self._queue if job[0] is not source]
+
+        if is_metered_connection() or self._downloaded >= PREFETCH_BANDWIDTH_BUDGET:
+            return
+
+        cache_key = source.cache_key
+        cells = [
+            cell
+            for cell in cells
+            if cell not in source.cells and not TILE_CACHE.contains(cache_key, cell)
+        ]
+        self._queue += [(source, cell) for cell in cells[:CELL_PREFETCH_MAX_CELLS]]
+
+        if not self._running and self._interactive == 0:
+            self._timer.start(CELL_PREFETCH_DELAY)
+
+    def interactive_request_started(self):
+        """
+        Signal an interactive cell request, which stops the prefetch.
+        """
+        self._interactive += 1
+        self._queue = []
+        self._timer.stop()
+
+    def interactive_request_ended(self):
+        self._interactive -= 1
+
+        if self._interactive == 0 and self._queue and not self._running:
+            self._timer.start(CELL_PREFETCH_DELAY)
+
+    def stop(self):
+        self._queue = []
+        self._timer.stop()
+
+    def _next(self):
+        self._running = False
+
+        if self._interactive > 0 or not self._queue:
+            return
+
+        if self._downloaded >= PREFETCH_BANDWIDTH_BUDGET:
+            log("Cells prefetch stopped: bandwidth budget reached")
+            self._queue = []
+            return
+
+        source, cell = self._queue.pop(0)
+
+        # the layers of the source were removed, or the cell was loaded meanwhile
+        if not source.qgis_layers or cell in source.cells:
+            self._timer.start(0)
+            return
+
+        cache_key = source.cache_key
+        self._running = True
+
+        def handler(result):
+            content = result["content"] or b""
+            self._downloaded += len(content)
+            if content:
+                TILE_CACHE.put(cache_key, cell, content)
+            self._timer.start(CELL_PREFETCH_INTERVAL)
+
+        def error_handler(result):
+            log(f"Error while prefetching cell {cell}: {result['exception']}", "WARNING")
+            self._timer.start(CELL_PREFETCH_INTERVAL)
+
+        try:
+            request_whale_shared(
+                source.get_url(tile_bbox(cell)), handler=handler, error_handler=error_handler
+            )
+        except Exception as e:
+            log(f"Error while prefetching cell {cell}: {e}", "WARNING")
+            self._timer.start(CELL_PREFETCH_INTERVAL)
+
+
+def is_metered_connection() -> bool:
+    """
+    Tell if the default network connection is a mobile (potentially metered) one.
+
+    The connection type is evaluated at most once every METERED_CHECK_INTERVAL.
+
+    :return: boolean, False if the connection type cannot be evaluated
+    """
+    global _METERED_CHECK
+
+    now = time.monotonic()
+    if _METERED_CHECK is None or now - _METERED_CHECK[0] > METERED_CHECK_INTERVAL:
+        _METERED_CHECK = (now, _evaluate_metered_connection())
+
+    return _METERED_CHECK[1]
+
+
+def _evaluate_metered_connection():
+    try:
+        from qgis.PyQt.QtNetwork import QNetworkConfiguration, QNetworkConfigurationManager
+    except ImportError:
+        # bearer management is not available in Qt6
+        return False
+
+    bearer = QNetworkConfigurationManager().defaultConfiguration().bearerTypeFamily()
+
+    return bearer in (
+        QNetworkConfiguration.Bearer2G,
+        QNetworkConfiguration.Bearer3G,
+        QNetworkConfiguration.Bearer4G,
+    )
+
+
+PREFETCHER = Prefetcher()
+
+CELL_PREFETCHER = CellPrefetcher()
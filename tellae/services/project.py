@@ -1,10 +1,14 @@
 from tellae.tellae_store import TELLAE_STORE
 from tellae.utils import log, tr
-from tellae.utils.requests import request_whale, RequestsException
+from tellae.utils.requests import cached_result, RequestsException
+from tellae.utils.file_cache import FILE_CACHE
 from tellae.utils.exceptions import InternalError
 from tellae.services.whale import download_from_binaries
 from tellae.services.network import update_project_gtfs_list
+from tellae.services.sync import request_whale_conditional
+from tellae.services.usage import record_usage, BINARY_USAGE
 from qgis.core import Qgis
+import json
 
 
 PROJECT_NAME_LABELS = [
@@ -46,39 +50,138 @@ def update_project_list():
         raise ValueError("Erreur lors de la récupération de la liste des projets") from e
 
 
-def select_project(uuid: str):
+def select_project(uuid: str, task_group):
+    """
+    Request the project document and the project GTFS list concurrently, then update the store and panels.
+
+    The document of a cached project is revalidated with a conditional request, and the
+    panels and the prefetch are only updated if it changed or if it is not displayed.
+
+    :param uuid: uuid of the selected project
+    :param task_group: TaskGroup to which the project requests are added
+    """
     # check existence
     # project_uuids = [project.get("uuid") for project in TELLAE_STORE.user["_ownedProjects"]]
     # index = project_uuids.index(uuid)
     # if index == -1:
     #     raise ValueError(f"Could not find a project matching the uuid {uuid}")
 
-    try:
-        project = request_whale(f"/projects/{uuid}", blocking=True)["content"]
+    TELLAE_STORE.requested_project_uuid = uuid
 
-        # update store
-        TELLAE_STORE.set_current_project(project)
+    # display the cached project right away, it is revalidated by the requests below
+    cached = TELLAE_STORE.project_cache.get(uuid)
+    current = TELLAE_STORE.current_project
+    switched = current is None or current["uuid"] != uuid
+    if cached is not None and cached.gtfs_list is not None and switched:
+        TELLAE_STORE.set_project_gtfs_list(cached.gtfs_list)
+        update_current_project(cached.project)
+
+    on_project_done = task_group.start_task(
+        "project", "Erreur lors de la récupération du projet"
+    )
+    on_project_gtfs_done = task_group.start_task(
+        "project_gtfs", "Erreur lors de la récupération des GTFS de l'utilisateur"
+    )
+
+    def handler(project, validators):
+        try:
+            # the cached document was not modified
+            if project is None:
+                project = cached.project
+            else:
+                TELLAE_STORE.project_cache.set_project(project, validators)
+
+            # ignore responses of projects that are not selected anymore
+            if uuid != TELLAE_STORE.requested_project_uuid:
+                return
+
+            # only update the panels if the project changed since it was displayed
+            changed = project != TELLAE_STORE.current_project
+            if changed:
+                update_current_project(project)
+
+            if switched or changed:
+                # download the project binaries in background, if enabled
+                # (imported here as the prefetch service depends on this module)
+                from tellae.services.prefetch import PREFETCHER
+
+                PREFETCHER.prefetch_project(project)
+        except Exception as e:
+            on_project_done(e)
+        else:
+            on_project_done()
+
+    request_whale_conditional(
+        f"/projects/{uuid}",
+        dict() if cached is None else cached.validators,
+        handler=handler,
+        error_handler=lambda result: on_project_done(result["exception"]),
+    )
 
-        # update project gtfs list
-        update_project_gtfs_list()
+    # update project gtfs list
+    update_project_gtfs_list(uuid, on_project_gtfs_done)
 
-        # update project data tables
-        TELLAE_STORE.main_dialog.layers_panel.on_project_update()
-        TELLAE_STORE.main_dialog.flows_panel.on_project_update()
-        TELLAE_STORE.main_dialog.network_panel.on_project_update()
 
-        # update project name labels
-        for label_id in PROJECT_NAME_LABELS:
-            getattr(TELLAE_STORE.main_dialog, label_id).setText(f"Projet: {TELLAE_STORE.current_project_name}")
+def update_current_project(project):
+    # update store
+    TELLAE_STORE.set_current_project(project)
 
+    # update project data tables
+    TELLAE_STORE.main_dialog.layers_panel.on_project_update()
+    TELLAE_STORE.main_dialog.flows_panel.on_project_update()
+    TELLAE_STORE.main_dialog.network_panel.on_project_update()
 
-        # update project info in config panel
-        TELLAE_STORE.main_dialog.config_panel.on_project_update()
-    except Exception as e:
-        raise ValueError("Erreur lors de la récupération du projet") from e
+    # update project name labels
+    for label_id in PROJECT_NAME_LABELS:
+        getattr(TELLAE_STORE.main_dialog, label_id).setText(f"Projet: {TELLAE_STORE.current_project_name}")
+
+    # update project info in config panel
+    TELLAE_STORE.main_dialog.config_panel.on_project_update()
 
 
 def get_project_binary_from_hash(binary_hash, attribute, handler, error_handler=None, to_json=True):
+    """
+    Get a binary of the current project, from the local cache if available.
+
+    Binaries are identified by the hash of their content, so cached binaries never expire.
+
+    :param binary_hash: hash of the binary
+    :param attribute: project attribute containing the binary
+    :param handler: handler called with the request result on success
+    :param error_handler: handler called on request fail
+    :param to_json: convert the binary content to json
+    """
+    project_uuid = TELLAE_STORE.current_project["uuid"]
+
+    # record binary usage for prefetching
+    record_usage(BINARY_USAGE, binary_hash, attribute=attribute, project=project_uuid)
+
+    def content_handler(result):
+        if to_json:
+            result["content"] = json.loads(result["content"])
+        handler(result)
+
+    content = FILE_CACHE.get(binary_cache_key(binary_hash))
+    if content is not None:
+        content_handler(cached_result(content))
+        return
+
+    def cache_handler(result):
+        cache_project_binary(binary_hash, result["content"])
+        content_handler(result)
+
+    download_project_binary(binary_hash, attribute, cache_handler, error_handler)
+
+
+def download_project_binary(binary_hash, attribute, handler, error_handler=None):
+    """
+    Download the raw content of a binary of the current project.
+
+    :param binary_hash: hash of the binary
+    :param attribute: project attribute containing the binary
+    :param handler: handler called with the request result on success
+    :param error_handler: handler called on request fail
+    """
     project_uuid = TELLAE_STORE.current_project["uuid"]
     index = get_binary_index_from_hash(binary_hash, attribute)
     if index == -1:
@@ -88,13 +191,33 @@ def get_project_binary_from_hash(binary_hash, attribute, handler, error_handler=
         f"projects/{project_uuid}/{attribute}/{index}",
         handler=handler,
         error_handler=error_handler,
-        to_json=to_json,
+        to_json=False,
     )
 
 
+def binary_cache_key(binary_hash) -> str:
+    return f"binary:{binary_hash}"
+
+
+def is_binary_cached(binary) -> bool:
+    return FILE_CACHE.is_cached(binary_cache_key(binary["hash"]))
+
+
+def cache_project_binary(binary_hash, content: bytes):
+    """
+    Store a project binary in the local cache and update the cache indicators of the panels.
+
+    :param binary_hash: hash of the binary
+    :param content: binary content
+    """
+    FILE_CACHE.put(binary_cache_key(binary_hash), content)
+
+    TELLAE_STORE.main_dialog.layers_panel.update_cache_indicators()
+    TELLAE_STORE.main_dialog.flows_panel.update_cache_indicators()
+
+
 def get_binary_index_from_hash(binary_hash, attribute):
-    hashes = [binary["hash"] for binary in TELLAE_STORE.current_project[attribute]]
-    return hashes.index(binary_hash)
+    return TELLAE_STORE.current_project_entry.binary_index(binary_hash, attribute)
 
 
 def get_project_name(project):
@@ -0,0 +1,137 @@
+"""
+Periodic background refresh of the catalogs and of the current project.
+
+Each refresh job runs at an interval read from the settings, with a random jitter.
+Refreshes use the same requests as the login (conditional requests for the catalogs and
+the project document), so the tables are only updated when their data changed. A refresh
+is postponed while QGIS is rendering the map or while a user-initiated load is in progress.
+"""
+
+import random
+
+from qgis.PyQt.QtCore import QTimer
+
+from tellae.tellae_store import TELLAE_STORE
+from tellae.utils.utils import log
+from tellae.utils.task_group import TaskGroup
+from tellae.utils.settings import get_setting, CATALOG_REFRESH_SETTING, PROJECT_REFRESH_SETTING
+from tellae.services.layers import init_layers_table
+from tellae.services.network import init_database_gtfs_list
+from tellae.services.project import select_project
+from tellae.services.snapshot import save_store_snapshot
+
+# relative jitter applied to the refresh intervals
+REFRESH_JITTER = 0.1
+
+# delay before retrying a postponed refresh (ms)
+POSTPONED_REFRESH_DELAY = 30 * 1000
+
+
+class RefreshJob:
+    """
+    A periodic refresh.
+    """
+
+    def __init__(self, name, interval_setting, run):
+        """
+        :param name: job name, used in logs
+        :param interval_setting: name of the setting containing the interval in minutes
+        :param run: function starting the refresh requests as tasks of the given TaskGroup
+        """
+        self.name = name
+
+        self.interval_setting = interval_setting
+
+        self.run = run
+
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+
+
+class RefreshScheduler:
+    """
+    Scheduler of the background refresh jobs.
+    """
+
+    def __init__(self):
+        self._jobs = []
+
+    def add_job(self, name, interval_setting, run):
+        job = RefreshJob(name, interval_setting, run)
+        job.timer.timeout.connect(lambda: self._on_timeout(job))
+        self._jobs.append(job)
+
+    def start(self):
+        """
+        (Re)start the refresh timers.
+        """
+        for job in self._jobs:
+            self._schedule(job)
+
+    def stop(self):
+        for job in self._jobs:
+            job.timer.stop()
+
+    def _schedule(self, job):
+        interval = get_setting(job.interval_setting)
+        if interval <= 0:
+            return
+
+        jitter = random.uniform(-REFRESH_JITTER, REFRESH_JITTER)
+        job.timer.start(int(interval * 60 * 1000 * (1 + jitter)))
+
+    def _on_timeout(self, job):
+        if not TELLAE_STORE.store_initiated or not TELLAE_STORE.authenticated:
+            self._schedule(job)
+            return
+
+        # do not compete with rendering or user requests
+        if self._is_busy():
+            job.timer.start(POSTPONED_REFRESH_DELAY)
+            return
+
+        def on_finished(task_group):
+            # keep refreshed data for the next plugin start
+            save_store_snapshot()
+            self._schedule(job)
+
+        task_group = TaskGroup(
+            f"refresh {job.name}",
+            on_finished=on_finished,
+            on_task_error=lambda e: log(f"Error during {job.name} refresh: {e}", "WARNING"),
+        )
+        try:
+            job.run(task_group)
+        except Exception as e:
+            log(f"Error during {job.name} refresh: {e}", "WARNING")
+        finally:
+            task_group.close()
+
+    @staticmethod
+    def _is_busy():
+        return (
+            TELLAE_STORE.tellae_services.iface.mapCanvas().isDrawing()
+            or TELLAE_STORE.main_dialog.progress_count > 0
+        )
+
+
+def _refresh_catalogs(task_group):
+    init_layers_table(task_group.start_task("layers_table"))
+    init_database_gtfs_list(task_group.start_task("database_gtfs"))
+
+
+def _refresh_project(task_group):
+    project = TELLAE_STORE.current_project
+    if project is None:
+        return
+
+    # selecting the project again would cancel a selection made by the user meanwhile
+    if TELLAE_STORE.requested_project_uuid != project["uuid"]:
+        return
+
+    select_project(project["uuid"], task_group)
+
+
+REFRESH_SCHEDULER = RefreshScheduler()
+REFRESH_SCHEDULER.add_job("catalogs", CATALOG_REFRESH_SETTING, _refresh_catalogs)
+REFRESH_SCHEDULER.add_job("project", PROJECT_REFRESH_SETTING, _refresh_project)
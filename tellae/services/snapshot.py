@@ -0,0 +1,120 @@
+"""
+Snapshot of the store, used to populate the plugin as soon as it is opened.
+
+Catalog data (layers, datasets, database GTFS) is restored from the catalog snapshot
+kept for incremental synchronisation. User data (user profile, last selected project)
+is stored in a separate snapshot, keyed by the authentication config it was saved with.
+Restored data is then revalidated by the requests made at login.
+"""
+
+from tellae.tellae_store import TELLAE_STORE
+from tellae.utils.utils import log
+from tellae.utils.local_storage import read_json_file, write_json_file
+from tellae.services.sync import (
+    LAYERS_ENTRY,
+    DATABASE_GTFS_ENTRY,
+    get_snapshot_entry,
+    save_catalog_snapshot,
+)
+from tellae.services.layers import update_layer_summary
+from tellae.services.project import update_project_list, update_current_project
+
+USER_SNAPSHOT = "user"
+
+
+def save_store_snapshot():
+    """
+    Write the store snapshot to the local storage.
+    """
+    # catalog data is saved with its synchronisation info
+    save_catalog_snapshot()
+
+    if not TELLAE_STORE.authenticated:
+        return
+
+    # user snapshots are keyed by authentication config
+    snapshots = read_json_file(USER_SNAPSHOT) or dict()
+    snapshots[TELLAE_STORE.authCfg] = {
+        "whale_endpoint": TELLAE_STORE.whale_endpoint,
+        "user": TELLAE_STORE.user,
+        "current_project": TELLAE_STORE.current_project,
+        "project_gtfs_list": TELLAE_STORE.project_gtfs_list,
+    }
+    write_json_file(USER_SNAPSHOT, snapshots)
+
+
+def restore_catalog_snapshot():
+    """
+    Populate the store and the catalog tables from the catalog snapshot.
+    """
+    try:
+        # layers table
+        if get_snapshot_entry(LAYERS_ENTRY)["items"]:
+            update_layer_summary(None, None)
+            TELLAE_STORE.main_dialog.layers_panel.fill_theme_selector()
+            TELLAE_STORE.main_dialog.layers_panel.update_database_layers_table()
+
+        # database networks
+        gtfs_list = get_snapshot_entry(DATABASE_GTFS_ENTRY)["items"]
+        if gtfs_list:
+            TELLAE_STORE.set_database_gtfs_list(gtfs_list)
+            TELLAE_STORE.main_dialog.network_panel.update_database_network_list()
+    except Exception as e:
+        # the snapshot is only a shortcut, data will be requested anyway
+        log(f"Could not restore catalog snapshot: {e}", "WARNING")
+
+
+def get_user_snapshot():
+    """
+    Get the user snapshot saved with the current authentication config.
+
+    :return: user snapshot dict, or None if there is none
+    """
+    snapshots = read_json_file(USER_SNAPSHOT) or dict()
+    snapshot = snapshots.get(TELLAE_STORE.authCfg)
+
+    if snapshot is None or snapshot.get("whale_endpoint") != TELLAE_STORE.whale_endpoint:
+        return None
+
+    return snapshot
+
+
+def remove_user_snapshot():
+    """
+    Remove the user snapshot saved with the current authentication config.
+    """
+    snapshots = read_json_file(USER_SNAPSHOT) or dict()
+    if snapshots.pop(TELLAE_STORE.authCfg, None) is not None:
+        write_json_file(USER_SNAPSHOT, snapshots)
+
+
+def restore_user_snapshot():
+    """
+    Populate the user, its projects and the current project from the user snapshot,
+    if it was saved with the current authentication config.
+
+    The store is tagged as authenticated, until the credentials are revalidated.
+
+    :return: restored user, or None if no snapshot was restored
+    """
+    snapshot = get_user_snapshot()
+    if snapshot is None:
+        return None
+
+    try:
+        TELLAE_STORE.set_user(snapshot["user"])
+        TELLAE_STORE.main_dialog.config_panel.set_auth_button_text(snapshot["user"])
+        update_project_list()
+
+        if snapshot["current_project"] is not None:
+            TELLAE_STORE.set_project_gtfs_list(snapshot["project_gtfs_list"])
+            update_current_project(snapshot["current_project"])
+            TELLAE_STORE.project_cache.set_gtfs_list(
+                snapshot["current_project"]["uuid"], snapshot["project_gtfs_list"]
+            )
+    except Exception as e:
+        log(f"Could not restore user snapshot: {e}", "WARNING")
+        TELLAE_STORE.reset_user()
+        return None
+
+    return snapshot["user"]
@@ -0,0 +1,196 @@
+"""
+Incremental synchronisation of the Tellae catalogs.
+
+The catalogs fetched at login (layers table, datasets summary, GTFS list) are kept
+in a local snapshot, along with the HTTP validators returned by Whale. Subsequent
+synchronisations only transfer what changed since the last one, and the changes are
+merged into the previous (already sorted) lists.
+"""
+
+import datetime
+
+from tellae.utils.local_storage import read_json_file, write_json_file
+from tellae.utils.requests import request_whale, NOT_MODIFIED_STATUS
+from tellae.tellae_store import TELLAE_STORE
+
+CATALOG_SNAPSHOT = "catalog"
+
+# snapshot entries
+LAYERS_ENTRY = "layers"
+DATASETS_ENTRY = "datasets"
+DATABASE_GTFS_ENTRY = "database_gtfs"
+
+# delta requests do not report deleted items, so a full synchronisation is made periodically
+FULL_SYNC_PERIOD = datetime.timedelta(days=7)
+
+_CATALOG_SNAPSHOT = None
+
+
+def get_catalog_snapshot() -> dict:
+    """
+    Get the entries of the catalog snapshot, reading it from the local storage on first call.
+
+    :return: dict of snapshot entries
+    """
+    global _CATALOG_SNAPSHOT
+
+    if _CATALOG_SNAPSHOT is None:
+        stored = read_json_file(CATALOG_SNAPSHOT)
+
+        # ignore catalogs of other Whale instances
+        if stored is None or stored.get("whale_endpoint") != TELLAE_STORE.whale_endpoint:
+            stored = {"whale_endpoint": TELLAE_STORE.whale_endpoint, "entries": dict()}
+
+        _CATALOG_SNAPSHOT = stored
+
+    return _CATALOG_SNAPSHOT["entries"]
+
+
+def get_snapshot_entry(name) -> dict:
+    """
+    Get a snapshot entry, with its stored items and synchronisation info.
+
+    :param name: entry name
+
+    :return: entry dict
+    """
+    entry = get_catalog_snapshot().get(name, dict())
+
+    return {
+        "items": entry.get("items", []),
+        "validators": entry.get("validators", dict()),
+        "locale": entry.get("locale", None),
+        "last_full_sync": entry.get("last_full_sync", None),
+    }
+
+
+def set_snapshot_entry(name, items, validators=None, locale=None, full_sync=False):
+    """
+    Update a snapshot entry after a successful synchronisation.
+
+    :param name: entry name
+    :param items: synchronised items
+    :param validators: HTTP validators of the response, keep previous ones if None
+    :param locale: locale used to sort the items, if relevant
+    :param full_sync: whether the items come from a full synchronisation
+    """
+    entry = get_snapshot_entry(name)
+
+    entry["items"] = items
+    if validators is not None:
+        entry["validators"] = validators
+    entry["locale"] = locale
+    if full_sync:
+        entry["last_full_sync"] = datetime.datetime.now().isoformat()
+
+    get_catalog_snapshot()[name] = entry
+
+
+def save_catalog_snapshot():
+    """
+    Write the catalog snapshot to the local storage.
+    """
+    # make sure the snapshot is loaded
+    get_catalog_snapshot()
+
+    write_json_file(CATALOG_SNAPSHOT, _CATALOG_SNAPSHOT)
+
+
+def needs_full_sync(entry) -> bool:
+    """
+    Tell if a full synchronisation of the entry should be made.
+
+    :param entry: snapshot entry
+
+    :return: boolean
+    """
+    if not entry["items"] or entry["last_full_sync"] is None:
+        return True
+
+    last_full_sync = datetime.datetime.fromisoformat(entry["last_full_sync"])
+
+    return datetime.datetime.now() - last_full_sync > FULL_SYNC_PERIOD
+
+
+def request_whale_if_modified(url, entry_name, handler, error_handler=None, **kwargs):
+    """
+    Make an asynchronous Whale request, conditioned by the validators of the snapshot entry.
+
+    :param url: requested whale service
+    :param entry_name: name of the snapshot entry containing the previous response
+    :param handler: handler called with (content, validators) on request success,
+        content being None if not modified since last sync
+    :param error_handler: handler called on request fail
+    :param kwargs: see request function params
+    """
+    entry = get_snapshot_entry(entry_name)
+
+    # only send validators if the previous response is available
+    validators = entry["validators"] if entry["items"] else dict()
+
+    request_whale_conditional(url, validators, handler, error_handler, **kwargs)
+
+
+def request_whale_conditional(url, validators, handler, error_handler=None, **kwargs):
+    """
+    Make an asynchronous Whale request, conditioned by the validators of a previous response.
+
+    :param url: requested whale service
+    :param validators: HTTP validators of the previous response, see validators_from_headers
+    :param handler: handler called with (content, validators) on request success,
+        content being None if not modified since the previous response
+    :param error_handler: handler called on request fail
+    :param kwargs: see request function params
+    """
+    headers = dict(kwargs.pop("headers", None) or dict())
+    if "etag" in validators:
+        headers["If-None-Match"] = validators["etag"]
+    if "last_modified" in validators:
+        headers["If-Modified-Since"] = validators["last_modified"]
+
+    def conditional_handler(result):
+        if result["status_code"] == NOT_MODIFIED_STATUS:
+            handler(None, validators)
+        else:
+            handler(result["content"], validators_from_headers(result["headers"]))
+
+    request_whale(
+        url, headers=headers, handler=conditional_handler, error_handler=error_handler, **kwargs
+    )
+
+
+def validators_from_headers(headers) -> dict:
+    """
+    Get the HTTP validators from the response headers.
+
+    :param headers: response headers
+
+    :return: dict of validators
+    """
+    validators = dict()
+
+    if "etag" in headers:
+        validators["etag"] = headers["etag"]
+    if "last-modified" in headers:
+        validators["last_modified"] = headers["last-modified"]
+
+    return validators
+
+
+def diff_items(previous_items, items, id_key="id"):
+    """
+    Evaluate the differences between two versions of a list of items.
+
+    :param previous_items: previous list of items
+    :param items: new list of items
+    :param id_key: item property containing its id
+
+    :return: tuple (new or updated items, ids of removed items)
+    """
+    previous_by_id = {item[id_key]: item for item in previous_items}
+    new_ids = {item[id_key] for item in items}
+
+    changed = [item for item in items if previous_by_id.get(item[id_key]) != item]
+    removed_ids = [item_id for item_id in previous_by_id if item_id not in new_ids]
+
+    return changed, removed_ids
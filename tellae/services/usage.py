@@ -0,0 +1,125 @@
+"""
+Local usage statistics of the loaded layers.
+
+Each load of a Shark layer or of a project binary is recorded with its frequency,
+recency and time of day. The statistics are used to predict which items are likely
+to be loaded in the current session, in order to prefetch them.
+"""
+
+import time
+import datetime
+
+from tellae.utils.local_storage import read_json_file, write_json_file
+
+USAGE_FILE = "usage"
+
+# usage kinds
+SHARK_USAGE = "shark"
+BINARY_USAGE = "binary"
+
+# half-life of the usage scores, in days
+USAGE_HALF_LIFE = 14
+
+# usages older than this are forgotten, in days
+USAGE_RETENTION = 90
+
+_USAGE = None
+
+
+def get_usage_stats() -> dict:
+    """
+    Get the usage statistics, reading them from the local storage on first call.
+
+    :return: dict {key: usage}
+    """
+    global _USAGE
+
+    if _USAGE is None:
+        _USAGE = read_json_file(USAGE_FILE) or dict()
+
+    return _USAGE
+
+
+def record_usage(kind, item_id, **params):
+    """
+    Record the load of an item.
+
+    :param kind: usage kind, SHARK_USAGE or BINARY_USAGE
+    :param item_id: id of the item (Shark table or binary hash)
+    :param params: parameters needed to fetch the item again
+    """
+    key = usage_key(kind, item_id)
+    usage = get_usage_stats().setdefault(
+        key, {"kind": kind, "id": item_id, "count": 0, "last_used": None, "hours": [0] * 24}
+    )
+
+    usage["params"] = params
+    usage["count"] += 1
+    usage["last_used"] = time.time()
+    usage["hours"][datetime.datetime.now().hour] += 1
+
+    # forget old usages
+    stats = get_usage_stats()
+    outdated = [k for k, u in stats.items() if _days_since(u["last_used"]) > USAGE_RETENTION]
+    for outdated_key in outdated:
+        del stats[outdated_key]
+
+    write_json_file(USAGE_FILE, stats)
+
+
+def _days_since(timestamp, now=None):
+    now = time.time() if now is None else now
+    return (now - timestamp) / 86400
+
+
+def usage_key(kind, item_id) -> str:
+    return f"{kind}:{item_id}"
+
+
+def usage_score(usage, now=None) -> float:
+    """
+    Evaluate the probability-like score of an item being loaded now.
+
+    The load count is decayed with the time since the last use, and weighted by
+    the share of loads made at the current hour (and its neighbours).
+
+    :param usage: usage statistics of the item
+    :param now: evaluation timestamp, defaults to current time
+
+    :return: usage score
+    """
+    now = time.time() if now is None else now
+
+    days = _days_since(usage["last_used"], now)
+    if days > USAGE_RETENTION:
+        return 0
+
+    recency = 0.5 ** (days / USAGE_HALF_LIFE)
+
+    hour = datetime.datetime.fromtimestamp(now).hour
+    hours = usage["hours"]
+    hour_share = (hours[hour - 1] + hours[hour] + hours[(hour + 1) % 24]) / usage["count"]
+
+    return usage["count"] * recency * (1 + hour_share)
+
+
+def get_likely_items(max_items, kind=None) -> list:
+    """
+    Get the items most likely to be loaded, by decreasing score.
+
+    :param max_items: maximum number of items
+    :param kind: only return items of this usage kind
+
+    :return: list of usages
+    """
+    now = time.time()
+
+    scored = [
+        (usage_score(usage, now), usage)
+        for usage in get_usage_stats().values()
+        if kind is None or usage["kind"] == kind
+    ]
+    scored = [item for item in scored if item[0] > 0]
+    scored.sort(key=lambda x: x[0], reverse=True)
+
+    return [usage for _, usage in scored[:max_items]]
@@ -25,13 +25,11 @@ from qgis.PyQt.QtCore import QSettings, QTranslator, QCoreApplication
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QAction
 
-# Initialize Qt resources from file resources.py
-# Import the code for the dialog
-from tellae.dialogs.tellae_services_dialog import TellaeServicesDialog
-from tellae.dialogs.tellae_auth_dialog import TellaeAuthDialog
+# Dialogs, panels, layers and services are imported on first run, so that
+# QGIS startup does not pay for the plugin before it is used
 from tellae.tellae_store import TELLAE_STORE
-from tellae.services.auth import init_auth
 from tellae.utils import log, tr
+from tellae.utils.profiler import STARTUP_PROFILER, READY_PHASE
 from tellae.utils.i18n import setup_translation
 
 import os.path
@@ -164,13 +162,14 @@ class TellaeServices:
 
     def initGui(self):
         """Create the menu entries and toolbar icons inside the QGIS GUI."""
-        icon_path = f"{self.plugin_dir}/tellae.png"
-        self.add_action(
-            icon_path,
-            text=tr("Plugin Tellae"),
-            callback=self.run,
-            parent=self.iface.mainWindow(),
-        )
+        with STARTUP_PROFILER.phase("initGui"):
+            icon_path = f"{self.plugin_dir}/tellae.png"
+            self.add_action(
+                icon_path,
+                text=tr("Plugin Tellae"),
+                callback=self.run,
+                parent=self.iface.mainWindow(),
+            )
 
         # will be set False in run()
         self.first_start = True
@@ -181,21 +180,90 @@ class TellaeServices:
             self.iface.removePluginMenu(tr("&Tellae Services"), action)
             self.iface.removeToolBarIcon(action)
 
+        # keep the session data for the next plugin start
+        if TELLAE_STORE.main_dialog is not None:
+            from tellae.services.snapshot import save_store_snapshot
+            from tellae.services.prefetch import PREFETCHER, CELL_PREFETCHER
+            from tellae.services.refresh import REFRESH_SCHEDULER
+            from tellae.utils.file_cache import FILE_CACHE
+
+            PREFETCHER.stop()
+            CELL_PREFETCHER.stop()
+            REFRESH_SCHEDULER.stop()
+            FILE_CACHE.flush()
+            save_store_snapshot()
+
+        # store the startup profile, even if it did not reach its end
+        STARTUP_PROFILER.end()
+
+        # nothing else to release if the plugin was never opened
+        if self.first_start:
+            return
+
+        from tellae.utils.watchdog import WATCHDOG
+        from tellae.utils.layer_files import LAYER_FILES
+        from tellae.utils.tile_cache import TILE_CACHE
+
+        WATCHDOG.stop()
+        TILE_CACHE.close()
+
+        # remove the layer files of the session that are not used by the project anymore
+        try:
+            LAYER_FILES.clear_session()
+        except OSError as e:
+            log(f"Could not clean the layer files: {e}", "WARNING")
+
     def _init_dialogs(self):
         """
         Create the plugin dialogs, call their setup methods, and display the main dialog.
         """
-        # store dialogs
-        TELLAE_STORE.tellae_services = self
-        TELLAE_STORE.main_dialog = TellaeServicesDialog()
-        TELLAE_STORE.auth_dialog = TellaeAuthDialog(TELLAE_STORE.main_dialog)
+        with STARTUP_PROFILER.phase("import dialogs"):
+            from tellae.dialogs.tellae_services_dialog import TellaeServicesDialog
+            from tellae.dialogs.tellae_auth_dialog import TellaeAuthDialog
+
+        with STARTUP_PROFILER.phase("_init_dialogs"):
+            # store dialogs
+            TELLAE_STORE.tellae_services = self
+            TELLAE_STORE.main_dialog = TellaeServicesDialog()
+            TELLAE_STORE.auth_dialog = TellaeAuthDialog(TELLAE_STORE.main_dialog)
+
+            # setup dialogs
+            TELLAE_STORE.main_dialog.setup()
+            TELLAE_STORE.auth_dialog.setup()
+
+            # show the main dialog
+            TELLAE_STORE.main_dialog.show()
+
+    def _first_run(self):
+        from tellae.services.auth import init_auth
+        from tellae.services.snapshot import restore_catalog_snapshot
+
+        from tellae.utils.settings import get_setting, STALL_WATCHDOG_SETTING
+        from tellae.utils.watchdog import WATCHDOG
+
+        # measure the time until the store is initialised (ended after login)
+        STARTUP_PROFILER.start_phase(READY_PHASE)
+
+        # record the main thread stalls, if enabled
+        if get_setting(STALL_WATCHDOG_SETTING):
+            WATCHDOG.start()
 
         # setup dialogs
-        TELLAE_STORE.main_dialog.setup()
-        TELLAE_STORE.auth_dialog.setup()
+        self._init_dialogs()
+
+        # display the data of the last session, it will be revalidated after login
+        with STARTUP_PROFILER.phase("restore_catalog_snapshot"):
+            restore_catalog_snapshot()
 
-        # show the main dialog
-        TELLAE_STORE.main_dialog.show()
+        # try authentication with stored indents
+        # this will trigger the initialisation of the store
+        try:
+            with STARTUP_PROFILER.phase("init_auth"):
+                init_auth()
+        except Exception as e:
+            # if the authentication fails, display a message and open the auth dialog
+            TELLAE_STORE.auth_dialog.display_error_message(str(e))
+            TELLAE_STORE.auth_dialog.open()
 
     def run(self):
         """Run method that performs all the real work"""
@@ -205,17 +273,8 @@ class TellaeServices:
         if self.first_start:
             self.first_start = False
 
-            # setup dialogs
-            self._init_dialogs()
-
-            # try authentication with stored indents
-            # this will trigger the initialisation of the store
-            try:
-                init_auth()
-            except Exception as e:
-                # if the authentication fails, display a message and open the auth dialog
-                TELLAE_STORE.auth_dialog.display_error_message(str(e))
-                TELLAE_STORE.auth_dialog.open()
+            with STARTUP_PROFILER.phase("run"):
+                self._first_run()
         else:
             # show the dialog
             TELLAE_STORE.main_dialog.show()
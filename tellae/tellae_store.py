@@ -1,4 +1,7 @@
-from tellae.utils.utils import read_local_config, log, get_binary_name
+from tellae.utils.utils import read_local_config, get_binary_name, log
+from tellae.models.project_cache import ProjectCache
+from tellae.models import catalog_search
+from tellae.models.catalog_search import CatalogSearch, CatalogEntry, theme_tag
 from tellae.utils import tr
 import os
 from enum import IntEnum
@@ -62,9 +65,21 @@ class TellaeStore:
         # authenticated user
         self.user = {}
 
+        # user projects
+        self.projects = []
+
         # current project
         self.current_project = None
 
+        # cache entry of the current project, with its derived data
+        self.current_project_entry = None
+
+        # recently opened projects
+        self.project_cache = ProjectCache()
+
+        # uuid of the last selected project, whose data may still be loading
+        self.requested_project_uuid = None
+
         # full layer summary
         self.layer_summary = []
 
@@ -73,6 +88,9 @@ class TellaeStore:
         # data datasets summary
         self.datasets_summary = {}
 
+        # search index of the catalogs and of the current project
+        self.catalog_search = CatalogSearch()
+
         # number of custom layers
         self.nb_custom_layers = 0
 
@@ -126,30 +144,57 @@ class TellaeStore:
         self.main_dialog = tellae_services.dlg
         self.auth_dialog = tellae_services.auth
 
+    def index_layer_summary(self):
+        """
+        Update the catalog search entries of the layers, providers and datasets.
+        """
+        layers = []
+        providers = dict()
+        datasets = dict()
+        for layer in self.layer_summary:
+            dataset = self.datasets_summary[layer["main_dataset"]]
+            provider = dataset["provider_name"]
+            layers.append(
+                CatalogEntry(
+                    catalog_search.LAYER,
+                    layer["id"],
+                    layer,
+                    layer["name"][self.locale],
+                    provider,
+                    tags=[theme_tag(THEMES_TRANSLATION.get(theme, theme)) for theme in layer["themes"]],
+                )
+            )
+            providers.setdefault(
+                provider, CatalogEntry(catalog_search.PROVIDER, provider, provider, provider)
+            )
+            datasets.setdefault(
+                dataset["id"],
+                CatalogEntry(
+                    catalog_search.DATASET,
+                    dataset["id"],
+                    dataset,
+                    dataset.get("name", ""),
+                    f"{provider} {dataset.get('date', '')}",
+                ),
+            )
+
+        self.catalog_search.update(catalog_search.LAYER, layers)
+        self.catalog_search.update(
+            catalog_search.PROVIDER, sorted(providers.values(), key=lambda x: x.name)
+        )
+        self.catalog_search.update(catalog_search.DATASET, list(datasets.values()))
+
     def get_filtered_layer_summary(self, selected_theme: str, search_text: str):
         # filter layers by theme
-        if selected_theme == tr("Tous"):
-            items = self.layer_summary
-        else:
-            items = [
-                layer
-                for layer in self.layer_summary
-                if selected_theme in [THEMES_TRANSLATION[theme] for theme in layer["themes"]]
-            ]
-
-        # filter layers from search text
-        if not search_text:
-            return items
-        else:
-            return [
-                x
-                for x in items
-                if (search_text.lower() in x["name"][self.locale].lower())
-                or (
-                    search_text.lower()
-                    in self.datasets_summary[x["main_dataset"]]["provider_name"].lower()
-                )
-            ]
+        theme = None if selected_theme == tr("Tous") else selected_theme
+
+        if theme is None and not search_text:
+            return self.layer_summary
+
+        # search layers by name and provider name
+        tag = catalog_search.LAYER if theme is None else theme_tag(theme)
+
+        return [entry.item for entry in self.catalog_search.search(search_text, tag=tag)]
 
     def get_project_data(self, attribute):
         """
@@ -159,14 +204,10 @@ class TellaeStore:
 
         :return: sorted list of binaries
         """
-        data = self.current_project[attribute]
-
-        sorted_data = sorted(
-            data,
-            key=lambda x: get_binary_name(x, with_extension=False),
-        )
+        if self.current_project_entry is None:
+            return []
 
-        return sorted_data
+        return self.current_project_entry.sorted_data(attribute)
 
     def increment_nb_custom_layers(self):
         self.nb_custom_layers += 1
@@ -195,6 +236,18 @@ class TellaeStore:
         self.user = user
         self.authenticated = True
 
+    def reset_user(self):
+        self.user = {}
+        self.authenticated = False
+        self.projects = []
+        self.current_project = None
+        self.current_project_entry = None
+        self.project_cache.clear()
+        self.requested_project_uuid = None
+        self.set_project_gtfs_list([])
+        self.catalog_search.clear(catalog_search.SPATIAL_DATA)
+        self.catalog_search.clear(catalog_search.FLOWS)
+
     def set_auth_config(self, cfg_name, cfg_id):
         self.authCfg = cfg_id
         self.authName = cfg_name
@@ -203,6 +256,46 @@ class TellaeStore:
 
     def set_current_project(self, project):
         self.current_project = project
+        self.current_project_entry = None if project is None else self.project_cache.set_project(project)
+
+        # index the project binaries for the catalog search
+        for attribute in [catalog_search.SPATIAL_DATA, catalog_search.FLOWS]:
+            self.catalog_search.update(
+                attribute,
+                [
+                    CatalogEntry(
+                        attribute,
+                        binary["hash"],
+                        binary,
+                        get_binary_name(binary, with_extension=False),
+                        self.current_project_name,
+                    )
+                    for binary in self.get_project_data(attribute)
+                ],
+            )
+
+    def set_project_gtfs_list(self, gtfs_list):
+        self.project_gtfs_list = gtfs_list
+        self._index_gtfs_list(catalog_search.PROJECT_GTFS, gtfs_list)
+
+    def set_database_gtfs_list(self, gtfs_list):
+        self.database_gtfs_list = gtfs_list
+        self._index_gtfs_list(catalog_search.DATABASE_GTFS, gtfs_list)
+
+    def _index_gtfs_list(self, kind, gtfs_list):
+        self.catalog_search.update(
+            kind,
+            [
+                CatalogEntry(
+                    kind,
+                    gtfs["uuid"],
+                    gtfs,
+                    gtfs["name"],
+                    f'{gtfs["network_name"]} {gtfs["moa"]["name"] if gtfs["moa"] else gtfs["moa_name"]}',
+                )
+                for gtfs in gtfs_list
+            ],
+        )
 
     # map utils
 
@@ -0,0 +1,95 @@
+# coding=utf-8
+"""Tests of the catalog search."""
+
+import unittest
+
+from tellae.models.catalog_search import (
+    CatalogSearch,
+    CatalogEntry,
+    LAYER,
+    DATABASE_GTFS,
+    theme_tag,
+)
+
+
+def _layer(key, name, details="", theme="Transport"):
+    return CatalogEntry(LAYER, key, {"id": key}, name, details, tags=(theme_tag(theme),))
+
+
+def _gtfs(key, name, details=""):
+    return CatalogEntry(DATABASE_GTFS, key, {"uuid": key}, name, details)
+
+
+class CatalogSearchTest(unittest.TestCase):
+    """Test the incremental indexing and the ordering of the catalog entries."""
+
+    def setUp(self):
+        self.search = CatalogSearch()
+        self.search.update(LAYER, [_layer(1, "Arrêts de bus"), _layer(2, "Lignes de bus")])
+        self.search.update(DATABASE_GTFS, [_gtfs("a", "Bus de Lyon", "TCL")])
+
+    def keys(self, query, tag=None):
+        return [entry.key for entry in self.search.search(query, tag=tag)]
+
+    def test_kinds_order(self):
+        self.assertEqual(self.keys(""), [1, 2, "a"])
+
+    def test_entries_order(self):
+        self.search.update(LAYER, [_layer(2, "Lignes de bus"), _layer(1, "Arrêts de bus")])
+
+        self.assertEqual(self.keys("bus"), [2, 1, "a"])
+
+    def test_score_before_order(self):
+        # the GTFS matches the details as well
+        self.assertEqual(self.keys("bus tcl"), ["a"])
+        self.assertEqual(self.keys("arrets"), [1])
+
+    def test_tags(self):
+        self.assertEqual(self.keys("", tag=DATABASE_GTFS), ["a"])
+        self.assertEqual(self.keys("", tag=theme_tag("Transport")), [1, 2])
+
+    def test_update_changed_entry(self):
+        self.search.update(LAYER, [_layer(1, "Arrêts de tram"), _layer(2, "Lignes de bus")])
+
+        self.assertEqual(self.keys("tram"), [1])
+        self.assertEqual(self.keys("bus", tag=LAYER), [2])
+        self.assertEqual(self.search.get(LAYER, 1).name, "Arrêts de tram")
+
+    def test_update_changed_tags(self):
+        self.search.update(LAYER, [_layer(1, "Arrêts de bus", theme="Mobilité")])
+
+        self.assertEqual(self.keys("", tag=theme_tag("Transport")), [])
+        self.assertEqual(self.keys("", tag=theme_tag("Mobilité")), [1])
+
+    def test_update_removes_missing_entries(self):
+        self.search.update(LAYER, [_layer(2, "Lignes de bus")])
+
+        self.assertEqual(self.keys("bus"), [2, "a"])
+        self.assertIsNone(self.search.get(LAYER, 1))
+
+    def test_update_keeps_other_kinds(self):
+        self.search.update(LAYER, [])
+
+        self.assertEqual(self.keys(""), ["a"])
+
+    def test_unchanged_entries_are_not_reindexed(self):
+        added = []
+        add = self.search.index.add
+        self.search.index.add = lambda doc_id, *args, **kwargs: (
+            added.append(doc_id),
+            add(doc_id, *args, **kwargs),
+        )
+
+        self.search.update(LAYER, [_layer(1, "Arrêts de bus"), _layer(3, "Gares")])
+
+        self.assertEqual(added, [(LAYER, 3)])
+
+    def test_clear(self):
+        self.search.clear(DATABASE_GTFS)
+
+        self.assertEqual(self.keys("lyon"), [])
+        self.assertEqual(self.keys(""), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
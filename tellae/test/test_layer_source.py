@@ -0,0 +1,85 @@
+# coding=utf-8
+"""Tests of the layer sources."""
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from tellae.utils.layer_files import LAYER_FILES, _file_id
+from tellae.models.layers.layer_source import (
+    GeojsonSource,
+    SharkSource,
+    GeopackageSource,
+    prepare_geopackage_files,
+)
+
+
+class _Layer:
+    name = "layer"
+    data = None
+    split_geometries = None
+
+
+class ReleaseTest(unittest.TestCase):
+    """Test that the layer files are unpinned when the layers are added."""
+
+    def release(self, source_class):
+        source = source_class(_Layer())
+        source.path = "/tmp/0123456789abcdef.geojson"
+        LAYER_FILES.pin(source.path)
+
+        source.release()
+
+        return source
+
+    def test_geojson_source(self):
+        self.release(GeojsonSource)
+
+        self.assertNotIn("0123456789abcdef", LAYER_FILES._pinned)
+
+    def test_shark_source(self):
+        self.release(SharkSource)
+
+        self.assertNotIn("0123456789abcdef", LAYER_FILES._pinned)
+
+    def test_geopackage_source(self):
+        source = self.release(GeopackageSource)
+
+        self.assertNotIn(_file_id(source.path), LAYER_FILES._pinned)
+        self.assertEqual(source._writers, {})
+
+
+class PrepareFilesTest(unittest.TestCase):
+    """Test the split of GeoJSON files by geometry class."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_split_without_conversion(self):
+        geojson = {
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature", "geometry": {"type": "Point", "coordinates": [0, 0]}},
+                {"type": "Feature", "geometry": {"type": "MultiPoint", "coordinates": [[0, 0]]}},
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "LineString", "coordinates": [[0, 0], [1, 1]]},
+                },
+            ],
+        }
+        path = os.path.join(self.directory, "layer.geojson")
+
+        paths = prepare_geopackage_files(
+            None, json.dumps(geojson).encode("utf-8"), path, ["Point", "Polygon"], convert=False
+        )
+
+        self.assertEqual(paths, {"Point": os.path.join(self.directory, "layer.point.geojson")})
+        with open(paths["Point"]) as f:
+            self.assertEqual(len(json.load(f)["features"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
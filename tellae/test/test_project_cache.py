@@ -0,0 +1,66 @@
+# coding=utf-8
+"""Tests of the cache of the opened projects."""
+
+import unittest
+
+from tellae.models.project_cache import ProjectCache
+
+
+def _project(uuid, name="project"):
+    return {"uuid": uuid, "name": name, "spatial_data": [], "flows": [], "gtfs": []}
+
+
+class ProjectCacheTest(unittest.TestCase):
+    """Test the storage of the project documents and GTFS lists."""
+
+    def setUp(self):
+        self.cache = ProjectCache(max_size=2)
+
+    def test_gtfs_list_after_project(self):
+        self.cache.set_project(_project("a"))
+        self.cache.set_gtfs_list("a", [{"uuid": "g"}])
+
+        self.assertEqual(self.cache.get("a").gtfs_list, [{"uuid": "g"}])
+
+    def test_gtfs_list_before_project(self):
+        self.cache.set_gtfs_list("a", [{"uuid": "g"}])
+
+        self.assertIsNone(self.cache.get("a"))
+
+        self.cache.set_project(_project("a"))
+
+        self.assertEqual(self.cache.get("a").gtfs_list, [{"uuid": "g"}])
+
+    def test_changed_project_keeps_gtfs_list(self):
+        self.cache.set_project(_project("a"))
+        self.cache.set_gtfs_list("a", [])
+        entry = self.cache.set_project(_project("a", name="renamed"))
+
+        self.assertEqual(entry.project["name"], "renamed")
+        self.assertEqual(entry.gtfs_list, [])
+
+    def test_least_recently_used_eviction(self):
+        self.cache.set_project(_project("a"))
+        self.cache.set_project(_project("b"))
+        self.cache.get("a")
+        self.cache.set_project(_project("c"))
+
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+
+    def test_pending_gtfs_lists_are_bounded(self):
+        for uuid in "abc":
+            self.cache.set_gtfs_list(uuid, [])
+
+        self.assertIsNone(self.cache.set_project(_project("a")).gtfs_list)
+        self.assertEqual(self.cache.set_project(_project("c")).gtfs_list, [])
+
+    def test_clear(self):
+        self.cache.set_gtfs_list("a", [])
+        self.cache.clear()
+
+        self.assertIsNone(self.cache.set_project(_project("a")).gtfs_list)
+
+
+if __name__ == "__main__":
+    unittest.main()
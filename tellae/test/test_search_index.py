@@ -0,0 +1,106 @@
+# coding=utf-8
+"""Tests of the full text search index."""
+
+import unittest
+
+from tellae.utils.search_index import SearchIndex, normalize_text, tokenize
+
+
+class NormalizeTextTest(unittest.TestCase):
+    """Test the normalization of the searched texts."""
+
+    def test_accents_case_and_punctuation(self):
+        self.assertEqual(normalize_text("Réseau d'Île-de-France"), "reseau d ile de france")
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("  Gare  SNCF, 2024 "), ["gare", "sncf", "2024"])
+
+
+class SearchIndexTest(unittest.TestCase):
+    """Test the matching and ranking of the indexed documents."""
+
+    def setUp(self):
+        self.index = SearchIndex({"name": 2, "details": 1})
+        self.index.add(1, {"name": "Arrêts de bus", "details": "Keolis"}, tags=("gtfs",), order=2)
+        self.index.add(2, {"name": "Lignes de métro", "details": "RATP"}, order=1)
+        self.index.add(3, {"name": "Population", "details": "INSEE bus"}, order=0)
+
+    def test_empty_query_returns_all_documents_in_order(self):
+        self.assertEqual(self.index.search(""), [3, 2, 1])
+
+    def test_exact_match(self):
+        self.assertEqual(self.index.search("metro"), [2])
+
+    def test_prefix_match(self):
+        self.assertEqual(self.index.search("popu"), [3])
+
+    def test_exact_match_ranked_before_prefix_match(self):
+        self.index.add(4, {"name": "Busway"}, order=-1)
+
+        self.assertEqual(self.index.search("bus")[0], 1)
+
+    def test_field_weights(self):
+        # "bus" is in the name of document 1 and in the details of document 3
+        self.assertEqual(self.index.search("bus"), [1, 3])
+
+    def test_fuzzy_match(self):
+        self.assertEqual(self.index.search("poplaton"), [])
+        self.assertEqual(self.index.search("populaton"), [3])
+        self.assertEqual(self.index.search("popluation"), [3])
+        self.assertEqual(self.index.search("keollis"), [1])
+
+    def test_short_tokens_are_not_fuzzy_matched(self):
+        self.assertEqual(self.index.search("bis"), [])
+
+    def test_all_query_tokens_must_match(self):
+        self.assertEqual(self.index.search("bus keolis"), [1])
+        self.assertEqual(self.index.search("bus ratp"), [])
+
+    def test_tag_filter(self):
+        self.assertEqual(self.index.search("bus", tag="gtfs"), [1])
+        self.assertEqual(self.index.search("", tag="unknown"), [])
+
+    def test_limit(self):
+        self.assertEqual(self.index.search("", limit=2), [3, 2])
+
+    def test_remove(self):
+        self.index.remove(1)
+
+        self.assertNotIn(1, self.index)
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.search("bus"), [3])
+        self.assertEqual(self.index.search("keolis"), [])
+        self.assertEqual(self.index.search("", tag="gtfs"), [])
+
+    def test_remove_unknown_document(self):
+        self.index.remove(42)
+
+        self.assertEqual(len(self.index), 3)
+
+    def test_readd_replaces_the_document(self):
+        self.index.add(1, {"name": "Arrêts de tram"}, order=2)
+
+        self.assertEqual(self.index.search("bus"), [3])
+        self.assertEqual(self.index.search("tram"), [1])
+        self.assertEqual(self.index.search("keolis"), [])
+
+    def test_readd_after_remove(self):
+        self.index.remove(2)
+        self.index.add(2, {"name": "Lignes de métro"}, order=1)
+
+        self.assertEqual(self.index.search("metr"), [2])
+
+    def test_set_order(self):
+        self.index.set_order(1, -1)
+
+        self.assertEqual(self.index.search(""), [1, 3, 2])
+
+    def test_clear(self):
+        self.index.clear()
+
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(self.index.search("bus"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
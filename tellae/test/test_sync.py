@@ -0,0 +1,101 @@
+# coding=utf-8
+"""Tests of the incremental synchronisation of the catalogs."""
+
+import unittest
+
+from tellae.utils.utils import merge_sorted_items
+from tellae.services.sync import diff_items
+
+
+def _name(item):
+    return item["name"]
+
+
+class DiffItemsTest(unittest.TestCase):
+    """Test the evaluation of catalog changes."""
+
+    def test_no_change(self):
+        items = [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
+        self.assertEqual(diff_items(items, [dict(item) for item in items]), ([], []))
+
+    def test_changed_and_new_items(self):
+        previous = [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
+        items = [{"id": 1, "name": "a"}, {"id": 2, "name": "c"}, {"id": 3, "name": "d"}]
+
+        changed, removed_ids = diff_items(previous, items)
+
+        self.assertEqual(changed, [{"id": 2, "name": "c"}, {"id": 3, "name": "d"}])
+        self.assertEqual(removed_ids, [])
+
+    def test_removed_ids(self):
+        previous = [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}, {"id": 3, "name": "c"}]
+        items = [{"id": 2, "name": "b"}]
+
+        self.assertEqual(diff_items(previous, items), ([], [1, 3]))
+
+    def test_id_key(self):
+        previous = [{"uuid": "x", "name": "a"}]
+        items = [{"uuid": "y", "name": "a"}]
+
+        self.assertEqual(diff_items(previous, items, id_key="uuid"), (items, ["x"]))
+
+
+class MergeSortedItemsTest(unittest.TestCase):
+    """Test the merge of catalog changes into sorted lists."""
+
+    def setUp(self):
+        self.items = [
+            {"id": 1, "name": "a"},
+            {"id": 2, "name": "c"},
+            {"id": 3, "name": "e"},
+        ]
+
+    def test_insert_new_item(self):
+        merged = merge_sorted_items(self.items, [{"id": 4, "name": "d"}], key=_name)
+
+        self.assertEqual([item["id"] for item in merged], [1, 2, 4, 3])
+
+    def test_replace_changed_item_at_its_new_position(self):
+        merged = merge_sorted_items(self.items, [{"id": 1, "name": "z"}], key=_name)
+
+        self.assertEqual([item["id"] for item in merged], [2, 3, 1])
+        self.assertEqual(merged[-1]["name"], "z")
+        self.assertEqual(len(merged), 3)
+
+    def test_remove_ids(self):
+        merged = merge_sorted_items(self.items, [], removed_ids=[2, 5], key=_name)
+
+        self.assertEqual([item["id"] for item in merged], [1, 3])
+
+    def test_changes_and_removals(self):
+        changed = [{"id": 3, "name": "b"}, {"id": 5, "name": "f"}]
+        merged = merge_sorted_items(self.items, changed, removed_ids=[1], key=_name)
+
+        self.assertEqual([item["name"] for item in merged], ["b", "c", "f"])
+
+    def test_input_list_is_not_modified(self):
+        merge_sorted_items(self.items, [{"id": 4, "name": "b"}], removed_ids=[1], key=_name)
+
+        self.assertEqual([item["id"] for item in self.items], [1, 2, 3])
+
+    def test_same_result_as_full_sort(self):
+        previous = [{"id": i, "name": f"n{i * 7 % 10}"} for i in range(10)]
+        previous.sort(key=_name)
+        items = [dict(item) for item in previous if item["id"] not in (2, 5)]
+        items[0]["name"] = "n99"
+        items.append({"id": 10, "name": "n45"})
+
+        changed, removed_ids = diff_items(previous, items)
+        merged = merge_sorted_items(previous, changed, removed_ids, key=_name)
+
+        self.assertEqual(merged, sorted(items, key=_name))
+
+    def test_id_key(self):
+        items = [{"uuid": "a", "name": "a"}]
+        merged = merge_sorted_items(items, [{"uuid": "a", "name": "b"}], key=_name, id_key="uuid")
+
+        self.assertEqual(merged, [{"uuid": "a", "name": "b"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
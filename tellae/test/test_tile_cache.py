@@ -0,0 +1,89 @@
+# coding=utf-8
+"""Tests of the persistent cache of map tiles."""
+
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from tellae.utils.tile_cache import TileCache
+from tellae.utils.settings import TILE_CACHE_TTL_SETTING, TILE_CACHE_BUDGET_SETTING
+
+SETTINGS = {TILE_CACHE_TTL_SETTING: 168, TILE_CACHE_BUDGET_SETTING: 512}
+
+
+class TileCacheTest(unittest.TestCase):
+    """Test the storage of the tiles in an MBTiles-like layout."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        patches = [
+            mock.patch("tellae.utils.tile_cache.get_storage_dir", lambda name: self.directory),
+            mock.patch("tellae.utils.tile_cache.get_setting", SETTINGS.get),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.cache = TileCache()
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory)
+
+    def test_row_flip(self):
+        # rows are numbered from the south, as in MBTiles
+        self.assertEqual(TileCache._tile_row((0, 0, 0)), (0, 0, 0))
+        self.assertEqual(TileCache._tile_row((3, 2, 0)), (3, 2, 7))
+        self.assertEqual(TileCache._tile_row((3, 2, 7)), (3, 2, 0))
+        self.assertEqual(TileCache._tile_row((12, 2074, 1409)), (12, 2074, 2686))
+
+    def test_stored_row(self):
+        self.cache.put("layer", (3, 2, 1), b"content")
+
+        rows = self.cache.connection.execute(
+            "SELECT zoom_level, tile_column, tile_row FROM tiles"
+        ).fetchall()
+        self.assertEqual(rows, [(3, 2, 6)])
+
+    def test_put_get(self):
+        self.cache.put("layer", (3, 2, 1), b"content")
+
+        self.assertTrue(self.cache.contains("layer", (3, 2, 1)))
+        self.assertEqual(self.cache.get("layer", (3, 2, 1)), b"content")
+        self.assertIsNone(self.cache.get("layer", (3, 2, 6)))
+        self.assertIsNone(self.cache.get("other", (3, 2, 1)))
+
+    def test_put_replaces(self):
+        self.cache.put("layer", (1, 0, 0), b"old")
+        self.cache.put("layer", (1, 0, 0), b"new")
+
+        self.assertEqual(self.cache.get("layer", (1, 0, 0)), b"new")
+
+    def test_expired_tiles(self):
+        with mock.patch("tellae.utils.tile_cache.time.time", return_value=0):
+            self.cache.put("layer", (1, 0, 0), b"content")
+
+        self.assertFalse(self.cache.contains("layer", (1, 0, 0)))
+        self.assertIsNone(self.cache.get("layer", (1, 0, 0)))
+
+    def test_evict_least_recently_read(self):
+        for x in range(3):
+            self.cache.put("layer", (2, x, 0), bytes(1000))
+        self.cache.get("layer", (2, 0, 0))
+
+        self.cache.evict(budget=self.cache.usage() - 1)
+
+        self.assertTrue(self.cache.contains("layer", (2, 0, 0)))
+        self.assertFalse(self.cache.contains("layer", (2, 1, 0)))
+        self.assertTrue(self.cache.contains("layer", (2, 2, 0)))
+
+    def test_clear(self):
+        self.cache.put("layer", (1, 0, 0), b"content")
+        self.cache.clear()
+
+        self.assertEqual(self.cache.usage(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
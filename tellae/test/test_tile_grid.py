@@ -0,0 +1,106 @@
+# coding=utf-8
+"""Tests of the quadtree grid of the map."""
+
+import unittest
+
+from tellae.utils.tile_grid import (
+    MAX_ZOOM,
+    grid_zoom,
+    tiles_in_bbox,
+    tile_count,
+    tile_bbox,
+    tile_distance,
+    tiles_around,
+)
+
+
+class TilesInBboxTest(unittest.TestCase):
+    """Test the listing of the tiles intersecting a bounding box."""
+
+    def test_world(self):
+        self.assertEqual(tiles_in_bbox((-180, -90, 180, 90), 0), [(0, 0, 0)])
+        self.assertEqual(len(tiles_in_bbox((-180, -90, 180, 90), 2)), 16)
+
+    def test_quadrants(self):
+        # x grows eastwards and y southwards
+        self.assertEqual(tiles_in_bbox((10, 10, 20, 20), 1), [(1, 1, 0)])
+        self.assertEqual(tiles_in_bbox((-20, -20, -10, -10), 1), [(1, 0, 1)])
+
+    def test_bbox_across_tiles(self):
+        tiles = tiles_in_bbox((-10, -10, 10, 10), 1)
+
+        self.assertEqual(sorted(tiles), [(1, 0, 0), (1, 0, 1), (1, 1, 0), (1, 1, 1)])
+
+    def test_tiles_contain_the_bbox(self):
+        bbox = (2.25, 48.8, 2.42, 48.9)
+        for tile in tiles_in_bbox(bbox, 12):
+            lon_min, lat_min, lon_max, lat_max = tile_bbox(tile)
+            self.assertLess(lon_min, bbox[2])
+            self.assertGreater(lon_max, bbox[0])
+            self.assertLess(lat_min, bbox[3])
+            self.assertGreater(lat_max, bbox[1])
+
+    def test_tile_count(self):
+        bbox = (2.25, 48.8, 2.42, 48.9)
+        for zoom in (0, 5, 10, 14):
+            self.assertEqual(tile_count(bbox, zoom), len(tiles_in_bbox(bbox, zoom)))
+
+    def test_latitudes_are_clamped(self):
+        self.assertEqual(tiles_in_bbox((0, 89, 1, 90), 3), [(3, 4, 0)])
+        self.assertEqual(tiles_in_bbox((0, -90, 1, -89), 3), [(3, 4, 7)])
+
+
+class GridZoomTest(unittest.TestCase):
+    """Test the choice of the grid zoom level."""
+
+    def test_tiles_narrower_than_the_bbox(self):
+        zoom = grid_zoom((0, 0, 1, 1))
+
+        self.assertLessEqual(360 / 2**zoom, 1)
+        self.assertGreater(360 / 2 ** (zoom - 1), 1)
+
+    def test_bounds(self):
+        self.assertEqual(grid_zoom((-180, -90, 180, 90)), 0)
+        self.assertEqual(grid_zoom((-180, -90, 180, 90), cells_per_width=2), 1)
+        self.assertEqual(grid_zoom((0, 0, 0, 0)), MAX_ZOOM)
+
+
+class TilesAroundTest(unittest.TestCase):
+    """Test the listing of the tiles surrounding the visible tiles."""
+
+    def setUp(self):
+        self.tiles = [(4, x, y) for x in (5, 6) for y in (7, 8)]
+
+    def test_one_ring(self):
+        around = tiles_around(self.tiles)
+
+        self.assertEqual(len(around), 12)
+        self.assertTrue(all(tile_distance(tile, (4, 5, 7)) <= 2 for tile in around))
+        self.assertFalse(set(around) & set(self.tiles))
+
+    def test_nearest_first(self):
+        around = tiles_around(self.tiles, rings=2)
+
+        distances = [
+            min(tile_distance(tile, visible) for visible in self.tiles) for tile in around
+        ]
+        self.assertEqual(distances, sorted(distances))
+        self.assertEqual(len(around), 32)
+
+    def test_direction(self):
+        around = tiles_around(self.tiles, direction=(1, 0))
+
+        # one more column eastwards, and the tiles east of the center first
+        self.assertEqual(len(around), 16)
+        self.assertIn((4, 8, 7), around)
+        self.assertNotIn((4, 3, 7), around)
+        self.assertEqual([tile[1] >= 6 for tile in around], [True] * 6 + [False] * 6 + [True] * 4)
+
+    def test_world_edges(self):
+        around = tiles_around([(2, 0, 0)])
+
+        self.assertEqual(sorted(around), [(2, 0, 1), (2, 1, 0), (2, 1, 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
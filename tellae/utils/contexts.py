@@ -98,24 +98,87 @@ class LayerDownloadContext:
         return not self.download_successful
 
 
+# layer download in several requests
+
+
+class LayerDownloadBatch:
+    """
+    Progress and errors of a layer downloaded in several requests.
+
+    The progress bar is displayed once while requests are pending, and the errors
+    of the requests are signaled once, when the last pending request ends.
+    """
+
+    def __init__(self, layer_name):
+
+        self.layer_name = layer_name
+
+        # number of pending requests
+        self.pending = 0
+
+        # errors of the requests since the progress started
+        self._errors = []
+
+    def add_request(self, handler, error_handler=None) -> tuple:
+        """
+        Count a new pending request.
+
+        :param handler: function called with the request result
+        :param error_handler: function called with the request error
+
+        :return: (handler, error_handler) to pass to the request
+        """
+        if self.pending == 0:
+            _start_of_layer_download(self.layer_name)
+        self.pending += 1
+
+        def final_handler(result):
+            self._end_request()
+            handler(result)
+
+        def final_error_handler(result):
+            self._errors.append(result)
+            self._end_request()
+            if error_handler is not None:
+                error_handler(result)
+
+        return final_handler, final_error_handler
+
+    def _end_request(self):
+        self.pending -= 1
+        if self.pending > 0:
+            return
+
+        _end_of_layer_download()
+
+        errors, self._errors = self._errors, []
+        if errors:
+            log(f"{len(errors)} requests failed while downloading '{self.layer_name}'", "WARNING")
+            _signal_layer_download_error(self.layer_name, errors[-1])
+
+
 # utils for layer download context
 
 
+def _signal_layer_download_error(layer_name, result):
+    if isinstance(result, dict):
+        log(f"Error while downloading '{layer_name}': {result['exception']}", "CRITICAL")
+        log(result, "CRITICAL")
+        TELLAE_STORE.main_dialog.display_message_bar(
+            tr("Erreur lors du téléchargement de la couche '{}': {} ({})").format(layer_name, result['status_code'], result['status_message']),
+            level=Qgis.MessageLevel.Critical,
+        )
+    else:
+        log(f"Python error while downloading {layer_name}': {result}", "CRITICAL")
+        TELLAE_STORE.main_dialog.display_message_bar(
+            tr("Erreur interne lors du téléchargement de la couche '{}'").format(layer_name),
+            level=Qgis.MessageLevel.Critical,
+        )
+
+
 def _layer_download_error_handler(layer_name, error_handler=None):
     def final_handler(result):
-        if isinstance(result, dict):
-            log(f"Error while downloading '{layer_name}': {result['exception']}", "CRITICAL")
-            log(result, "CRITICAL")
-            TELLAE_STORE.main_dialog.display_message_bar(
-                tr("Erreur lors du téléchargement de la couche '{}': {} ({})").format(layer_name, result['status_code'], result['status_message']),
-                level=Qgis.MessageLevel.Critical,
-            )
-        else:
-            log(f"Python error while downloading {layer_name}': {result}", "CRITICAL")
-            TELLAE_STORE.main_dialog.display_message_bar(
-                tr("Erreur interne lors du téléchargement de la couche '{}'").format(layer_name),
-                level=Qgis.MessageLevel.Critical,
-            )
+        _signal_layer_download_error(layer_name, result)
 
         _end_of_layer_download()
 
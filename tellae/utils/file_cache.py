@@ -0,0 +1,210 @@
+"""
+Local cache of downloaded layer data.
+
+Cached contents (Shark layers, project binaries) are stored as raw bytes in the
+'cache' directory of the plugin storage, and described by an index kept in the
+local storage. Each entry can carry a version, so that outdated contents are ignored.
+The least recently read contents are evicted when the cache exceeds its disk budget.
+"""
+
+import os
+import time
+import hashlib
+
+from qgis.PyQt.QtCore import QTimer
+
+from tellae.utils.utils import log
+from tellae.utils.local_storage import get_storage_dir, read_json_file, write_json_file
+from tellae.utils.settings import get_setting, FILE_CACHE_BUDGET_SETTING
+
+CACHE_INDEX = "cache_index"
+
+# delay before writing the access times of the read contents (ms)
+INDEX_SAVE_DELAY = 10000
+
+
+class FileCache:
+    """
+    Cache of raw contents, identified by a string key.
+    """
+
+    def __init__(self):
+        # cache index {key: {"file", "size", "version", "last_access"}}, read on first use
+        self._index = None
+
+        # access times are written to the index after a delay, several reads at once
+        self._dirty = False
+        self._save_timer = QTimer()
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(INDEX_SAVE_DELAY)
+        self._save_timer.timeout.connect(self.flush)
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            self._index = read_json_file(CACHE_INDEX) or dict()
+        return self._index
+
+    @property
+    def size(self) -> int:
+        """
+        Total size of the cached contents, in bytes.
+        """
+        return sum(entry["size"] for entry in self.index.values())
+
+    def is_cached(self, key, version=None) -> bool:
+        """
+        Tell if an up-to-date content is cached for the given key.
+
+        :param key: content key
+        :param version: expected content version
+
+        :return: boolean
+        """
+        entry = self.index.get(key)
+
+        return (
+            entry is not None
+            and entry.get("version") == version
+            and os.path.exists(self._file_path(entry["file"]))
+        )
+
+    def get(self, key, version=None) -> bytes | None:
+        """
+        Read a cached content.
+
+        :param key: content key
+        :param version: expected content version
+
+        :return: cached bytes, or None if no up-to-date content is cached
+        """
+        if not self.is_cached(key, version):
+            return None
+
+        entry = self.index[key]
+        try:
+            with open(self._file_path(entry["file"]), "rb") as f:
+                content = f.read()
+        except OSError as e:
+            log(f"Could not read cached content '{key}': {e}", "WARNING")
+            return None
+
+        entry["last_access"] = time.time()
+        if not self._dirty:
+            self._dirty = True
+            self._save_timer.start()
+
+        return content
+
+    def put(self, key, content: bytes, version=None):
+        """
+        Store a content in the cache, replacing the previous one.
+
+        :param key: content key
+        :param content: content bytes
+        :param version: content version
+        """
+        file_name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        path = self._file_path(file_name)
+
+        try:
+            with open(path + ".tmp", "wb") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            log(f"Could not cache content '{key}': {e}", "WARNING")
+            return
+
+        self.index[key] = {
+            "file": file_name,
+            "size": len(content),
+            "version": version,
+            "last_access": time.time(),
+        }
+
+        # make room for the new content, the index is saved by the eviction
+        if not self.evict(keep=key):
+            self._save_index()
+
+    def remove(self, key):
+        """
+        Remove a content from the cache.
+
+        :param key: content key
+        """
+        entry = self.index.pop(key, None)
+        if entry is None:
+            return
+
+        path = self._file_path(entry["file"])
+        if os.path.exists(path):
+            os.remove(path)
+
+        self._save_index()
+
+    def evict(self, budget=None, keep=None) -> bool:
+        """
+        Remove the least recently read contents until the cache fits the budget.
+
+        :param budget: disk budget in bytes, read from the settings by default
+        :param keep: key of a content that must not be evicted
+
+        :return: True if contents were evicted
+        """
+        if budget is None:
+            budget = get_setting(FILE_CACHE_BUDGET_SETTING) * 1024 * 1024
+
+        size = self.size
+        if size <= budget:
+            return False
+
+        entries = sorted(self.index.items(), key=lambda x: x[1]["last_access"])
+        for key, entry in entries:
+            if size <= budget:
+                break
+            if key == keep:
+                continue
+
+            del self.index[key]
+            size -= entry["size"]
+            try:
+                os.remove(self._file_path(entry["file"]))
+            except OSError as e:
+                log(f"Could not remove cached content '{key}': {e}", "WARNING")
+
+        self._save_index()
+
+        return True
+
+    def flush(self):
+        """
+        Write the pending access times to the index.
+        """
+        if self._dirty:
+            self._save_index()
+
+    def clear(self):
+        """
+        Remove all the cached contents.
+        """
+        for key in list(self.index):
+            entry = self.index.pop(key)
+            path = self._file_path(entry["file"])
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError as e:
+                log(f"Could not remove cached content '{key}': {e}", "WARNING")
+
+        self._save_index()
+
+    def _file_path(self, file_name):
+        return os.path.join(get_storage_dir("cache"), file_name)
+
+    def _save_index(self):
+        self._dirty = False
+        self._save_timer.stop()
+        write_json_file(CACHE_INDEX, self.index)
+
+
+FILE_CACHE = FileCache()
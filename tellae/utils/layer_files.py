@@ -0,0 +1,164 @@
+"""
+Managed directory of the files read by the plugin layers.
+
+Layer sources write their data (GeoJSON files and their GeoPackage conversions) in
+the 'layers' directory of the plugin storage, instead of the system temporary
+directory. The directory size is bounded by a disk budget: the least recently
+written files are evicted first, except the ones used by layers of the QGIS project
+and the pinned ones (sources whose layers are being created). The unused files
+created during the session are removed when the plugin is unloaded, the files of
+the previous sessions may still be read by other saved QGIS projects.
+"""
+
+import os
+import uuid
+
+from qgis.core import QgsProject
+
+from tellae.utils.utils import log
+from tellae.utils.local_storage import get_storage_dir
+from tellae.utils.settings import get_setting, LAYER_FILES_BUDGET_SETTING
+
+LAYER_FILES_DIR = "layers"
+
+
+def _file_id(path):
+    # files derived from the same source (.geojson, .gpkg, .gpkg-wal...) share their id
+    return os.path.basename(path).split(".")[0]
+
+
+class LayerFiles:
+    """
+    Size-bounded directory of layer data files.
+    """
+
+    def __init__(self):
+        # ids of the files that must not be evicted
+        self._pinned = set()
+
+        # ids of the files created during the session
+        self._created = set()
+
+    @property
+    def directory(self) -> str:
+        return get_storage_dir(LAYER_FILES_DIR)
+
+    def new_file(self, suffix) -> str:
+        """
+        Get the path of a new file of the directory.
+
+        :param suffix: file suffix, for instance ".geojson"
+
+        :return: file path
+        """
+        file_id = uuid.uuid4().hex
+        self._created.add(file_id)
+
+        return os.path.join(self.directory, f"{file_id}{suffix}")
+
+    def pin(self, path):
+        """
+        Protect a file (and the files derived from it) from eviction.
+
+        :param path: file path
+        """
+        self._pinned.add(_file_id(path))
+
+    def unpin(self, path):
+        """
+        Allow the eviction of a file, once it is not used by the project layers.
+
+        :param path: file path
+        """
+        self._pinned.discard(_file_id(path))
+
+    def usage(self) -> int:
+        """
+        Total size of the directory files, in bytes.
+        """
+        return sum(group["size"] for group in self._file_groups().values())
+
+    def evict(self, budget=None):
+        """
+        Remove the least recently written unused files until the directory fits the budget.
+
+        :param budget: disk budget in bytes, read from the settings by default
+        """
+        if budget is None:
+            budget = get_setting(LAYER_FILES_BUDGET_SETTING) * 1024 * 1024
+
+        groups = self._file_groups()
+        size = sum(group["size"] for group in groups.values())
+        if size <= budget:
+            return
+
+        used = self._used_file_ids()
+        for file_id, group in sorted(groups.items(), key=lambda x: x[1]["mtime"]):
+            if size <= budget:
+                break
+            if file_id in used:
+                continue
+            size -= self._remove_group(group)
+
+    def clear(self):
+        """
+        Remove all the files that are not used.
+        """
+        used = self._used_file_ids()
+        for file_id, group in self._file_groups().items():
+            if file_id not in used:
+                self._remove_group(group)
+
+    def clear_session(self):
+        """
+        Remove the files created during the session that are not used.
+        """
+        used = self._used_file_ids()
+        for file_id, group in self._file_groups().items():
+            if file_id in self._created and file_id not in used:
+                self._remove_group(group)
+
+    def _file_groups(self):
+        # directory files grouped by id {id: {"paths", "size", "mtime"}}
+        groups = dict()
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                group = groups.setdefault(
+                    _file_id(entry.path), {"paths": [], "size": 0, "mtime": 0}
+                )
+                group["paths"].append(entry.path)
+                group["size"] += stat.st_size
+                group["mtime"] = max(group["mtime"], stat.st_mtime)
+
+        return groups
+
+    def _used_file_ids(self):
+        # pinned files and files read by the layers of the project
+        used = set(self._pinned)
+
+        directory = os.path.normcase(os.path.abspath(self.directory))
+        for layer in QgsProject.instance().mapLayers().values():
+            path = layer.source().split("|")[0]
+            if os.path.normcase(os.path.dirname(os.path.abspath(path))) == directory:
+                used.add(_file_id(path))
+
+        return used
+
+    @staticmethod
+    def _remove_group(group):
+        removed = 0
+        for path in group["paths"]:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                removed += size
+            except OSError as e:
+                log(f"Could not remove layer file '{path}': {e}", "WARNING")
+
+        return removed
+
+
+LAYER_FILES = LayerFiles()
@@ -0,0 +1,91 @@
+"""
+Storage of plugin data in the QGIS profile directory.
+
+Files are stored in a 'tellae' folder of the active QGIS profile and survive plugin updates.
+"""
+
+import os
+import json
+
+from qgis.core import QgsApplication
+
+from tellae.utils.utils import log
+
+# version of the stored files format, increment it to invalidate existing files
+STORAGE_VERSION = 1
+
+
+def get_storage_dir(*subdirs) -> str:
+    """
+    Get the path to the plugin storage directory, creating it if necessary.
+
+    :param subdirs: optional sub-directories of the storage directory
+
+    :return: directory path
+    """
+    path = os.path.join(QgsApplication.qgisSettingsDirPath(), "tellae", *subdirs)
+    os.makedirs(path, exist_ok=True)
+
+    return path
+
+
+def _json_file_path(name):
+    return os.path.join(get_storage_dir(), f"{name}.json")
+
+
+def read_json_file(name):
+    """
+    Read the content of a stored json file.
+
+    :param name: name of the stored file (without extension)
+
+    :return: stored content, or None if the file does not exist or is outdated
+    """
+    path = _json_file_path(name)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+    except (OSError, ValueError) as e:
+        log(f"Could not read stored file '{name}': {e}", "WARNING")
+        return None
+
+    # ignore files written with another storage format
+    if not isinstance(stored, dict) or stored.get("version") != STORAGE_VERSION:
+        return None
+
+    return stored.get("content")
+
+
+def write_json_file(name, content):
+    """
+    Store the given content in a json file.
+
+    The file is first written to a temporary path, so that an interrupted write
+    does not corrupt the existing file.
+
+    :param name: name of the stored file (without extension)
+    :param content: json serializable content
+    """
+    path = _json_file_path(name)
+    tmp_path = path + ".tmp"
+
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": STORAGE_VERSION, "content": content}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log(f"Could not write stored file '{name}': {e}", "WARNING")
+
+
+def remove_json_file(name):
+    """
+    Remove a stored json file if it exists.
+
+    :param name: name of the stored file (without extension)
+    """
+    path = _json_file_path(name)
+    if os.path.exists(path):
+        os.remove(path)
@@ -53,6 +53,7 @@ from tellae.utils import (
     UnauthorizedError,
     log,
 )
+from tellae.utils.watchdog import WATCHDOG
 
 # FIXME: ignored
 DEFAULT_MAX_REDIRECTS = 4
@@ -281,7 +282,8 @@ class NetworkAccessManager(object):
 
         # Catch all exceptions (and clean up requests)
         try:
-            self.el.exec(QEventLoop.ProcessEventsFlag.ExcludeUserInputEvents)
+            with WATCHDOG.blocking_section():
+                self.el.exec(QEventLoop.ProcessEventsFlag.ExcludeUserInputEvents)
         except Exception as e:
             raise e
 
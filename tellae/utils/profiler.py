@@ -0,0 +1,231 @@
+"""
+Instrumentation of the plugin startup.
+
+The startup profiler records the wall time and the main thread blocking time of
+the startup phases (plugin load, dialogs creation, login, store initialisation)
+and of the network calls made meanwhile. The last startups are kept in the local
+storage so that they can be compared across plugin versions.
+"""
+
+import time
+import datetime
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from tellae.utils.utils import get_plugin_version
+from tellae.utils.local_storage import read_json_file, write_json_file
+
+STARTUPS_FILE = "startups"
+
+# number of stored startups
+MAX_STARTUPS = 10
+
+# phase going from the first plugin run to the store initialisation
+READY_PHASE = "run -> store initialised"
+
+
+class ProfiledPhase:
+    """
+    A timed phase of the startup.
+
+    The wall time goes from the phase creation to its end, while the blocking time
+    only sums the durations of the blocking sections of the phase.
+    """
+
+    def __init__(self, name, kind, depth, origin, recorded=True):
+        self.name = name
+
+        self.kind = kind
+
+        self.depth = depth
+
+        # whether the phase is part of a profiled startup
+        self.recorded = recorded
+
+        self._origin = origin
+
+        self._start = time.perf_counter()
+
+        self._end = None
+
+        self._blocking_time = 0
+
+    @property
+    def wall_time(self):
+        end = time.perf_counter() if self._end is None else self._end
+        return end - self._start
+
+    @contextmanager
+    def blocking(self):
+        """
+        Context manager measuring a section of the phase that blocks the main thread.
+        """
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self._blocking_time += time.perf_counter() - start
+
+    def end(self):
+        """
+        End the phase. Subsequent calls are ignored.
+        """
+        if self._end is None:
+            self._end = time.perf_counter()
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "depth": self.depth,
+            "start": (self._start - self._origin) * 1000,
+            "wall": self.wall_time * 1000,
+            "blocking": self._blocking_time * 1000,
+        }
+
+
+class StartupProfiler:
+    """
+    Profiler of the plugin startup, from the plugin load to the store initialisation.
+    """
+
+    def __init__(self):
+        # current startup record, None if no startup is being profiled
+        self._startup = None
+
+        self._phases = []
+
+        self._depth = 0
+
+        self._origin = time.perf_counter()
+
+        self._stored_startups = None
+
+    @property
+    def in_progress(self):
+        return self._startup is not None
+
+    @property
+    def startups(self) -> list:
+        """
+        Stored startups, most recent first.
+        """
+        if self._stored_startups is None:
+            self._stored_startups = read_json_file(STARTUPS_FILE) or []
+        return self._stored_startups
+
+    def begin(self):
+        """
+        Start profiling a new startup.
+        """
+        self._startup = {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "plugin_version": get_plugin_version(),
+            "notes": [],
+        }
+        self._phases = []
+        self._depth = 0
+        self._origin = time.perf_counter()
+
+    def start_phase(self, name, kind="phase") -> ProfiledPhase:
+        """
+        Start an asynchronous phase, ended by calling its end method.
+
+        Phases started while no startup is profiled are not recorded.
+
+        :param name: phase name
+        :param kind: phase kind ("phase" or "network")
+
+        :return: ProfiledPhase instance
+        """
+        phase = ProfiledPhase(name, kind, self._depth, self._origin, recorded=self.in_progress)
+        if phase.recorded:
+            self._phases.append(phase)
+
+        return phase
+
+    def end_phase(self, name):
+        """
+        End the recorded phases with the given name.
+
+        :param name: phase name
+        """
+        for phase in self._phases:
+            if phase.name == name:
+                phase.end()
+
+    def start_network_call(self, method, url) -> ProfiledPhase:
+        """
+        Start a phase describing a network call.
+
+        :param method: request method
+        :param url: request url
+
+        :return: ProfiledPhase instance
+        """
+        return self.start_phase(f"{method.upper()} {urlsplit(url).path}", kind="network")
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Context manager profiling a synchronous phase, which blocks the main thread.
+
+        :param name: phase name
+        """
+        phase = self.start_phase(name)
+        self._depth += 1
+        try:
+            with phase.blocking():
+                yield phase
+        finally:
+            self._depth -= 1
+            phase.end()
+
+    def add_note(self, note):
+        """
+        Add a text note to the profiled startup.
+
+        :param note: note text
+        """
+        if self.in_progress:
+            self._startup["notes"].append(note)
+
+    def end(self):
+        """
+        End the profiled startup and store it.
+        """
+        if not self.in_progress:
+            return
+
+        self._startup["phases"] = [phase.to_dict() for phase in self._phases]
+
+        self.startups.insert(0, self._startup)
+        del self.startups[MAX_STARTUPS:]
+        write_json_file(STARTUPS_FILE, self.startups)
+
+        self._startup = None
+        self._phases = []
+
+    def report(self) -> str:
+        """
+        Describe the stored startups.
+
+        :return: report text
+        """
+        lines = []
+        for startup in self.startups:
+            lines.append(f"{startup['date']} - version {startup['plugin_version']}")
+            lines.append(f"  {'':<50}{'wall (ms)':>12}{'blocking (ms)':>16}")
+            for phase in startup["phases"]:
+                name = "  " * phase["depth"] + phase["name"]
+                if len(name) > 48:
+                    name = name[:45] + "..."
+                lines.append(f"  {name:<50}{phase['wall']:>12.1f}{phase['blocking']:>16.1f}")
+            for note in startup["notes"]:
+                lines.append(f"  {note}")
+            lines.append("")
+
+        return "\n".join(lines)
+
+
+STARTUP_PROFILER = StartupProfiler()
@@ -1,9 +1,16 @@
 from tellae.utils.network_access_manager import NetworkAccessManager, RequestsException
 from tellae.utils.utils import log
+from tellae.utils.profiler import STARTUP_PROFILER
 from tellae.tellae_store import TELLAE_STORE
 import json
 from urllib.parse import quote_plus
 
+# HTTP status of conditional requests whose resource did not change
+NOT_MODIFIED_STATUS = 304
+
+# handlers of the pending shared requests {url: [(handler, error_handler)]}
+_SHARED_REQUESTS = dict()
+
 
 def request(
     url,
@@ -36,17 +43,23 @@ def request(
     # create a network access manager instance
     nam = NetworkAccessManager(authid=auth_cfg, debug=TELLAE_STORE.network_debug, timeout=0)
 
+    # profile the call if made during the plugin startup
+    call_phase = STARTUP_PROFILER.start_network_call(method, url)
+
     # create callback function for async requests
     def on_finished():
-        process_call_result(
-            nam.httpResult(), to_json=to_json, handler=handler, error_handler=error_handler
-        )
+        call_phase.end()
+        with call_phase.blocking():
+            process_call_result(
+                nam.httpResult(), to_json=to_json, handler=handler, error_handler=error_handler
+            )
 
     try:
         # make request
-        call_result, _ = nam.request(
-            url, method=method, body=body, headers=headers, blocking=blocking
-        )
+        with call_phase.blocking():
+            call_result, _ = nam.request(
+                url, method=method, body=body, headers=headers, blocking=blocking
+            )
 
         if not blocking:
             # add callback for asynchronous requests
@@ -62,11 +75,14 @@ def request(
             "reason": "Python error while making request",
             "exception": e,
         }
+        call_phase.end()
         # call error handler on exception
         if not blocking and error_handler:
             error_handler(call_result)
 
     if blocking:
+        call_phase.end()
+
         if call_result["ok"]:
             return process_call_result(call_result, to_json=to_json)
         else:
@@ -97,6 +113,49 @@ def request_whale(url, **kwargs):
     # make the request using the AWS authentication
     return request(whale_url, auth_cfg=TELLAE_STORE.authCfg, **kwargs)
 
+
+def request_whale_shared(url, handler, error_handler=None):
+    """
+    Make an asynchronous Whale request, shared with the other callers of the same url.
+
+    If the url is already being requested, no new request is made: the handlers are
+    called with the response of the pending request. Response contents are not
+    converted to json.
+
+    :param url: requested whale service (url without the whale address)
+    :param handler: handler called on request success
+    :param error_handler: handler called on request fail
+    """
+    callbacks = _SHARED_REQUESTS.get(url)
+    if callbacks is not None:
+        callbacks.append((handler, error_handler))
+        return
+
+    _SHARED_REQUESTS[url] = [(handler, error_handler)]
+
+    def dispatch(result, success):
+        for callback in _SHARED_REQUESTS.pop(url, []):
+            callback = callback[0] if success else callback[1]
+            if callback is None:
+                continue
+            # a failing handler does not prevent the others from being called
+            try:
+                callback(result)
+            except Exception as e:
+                log(f"Error in handler of shared request '{url}': {e}", "CRITICAL")
+
+    try:
+        request_whale(
+            url,
+            handler=lambda result: dispatch(result, True),
+            error_handler=lambda result: dispatch(result, False),
+            to_json=False,
+        )
+    except Exception:
+        _SHARED_REQUESTS.pop(url, None)
+        raise
+
+
 def request_whale_with_continuation_token(url, max_calls=10, **kwargs):
     """
     Whale request for results with more than 1000 items.
@@ -147,8 +206,8 @@ def process_call_result(call_result, to_json, handler=None, error_handler=None):
     """
     # call handler depending on request success
     if call_result["ok"]:
-        # convert request result to json
-        if to_json:
+        # convert request result to json (not modified responses have no content)
+        if to_json and call_result["status_code"] != NOT_MODIFIED_STATUS:
             call_result["content"] = json.loads(call_result["content"])
 
         # call handler if provided
@@ -160,6 +219,25 @@ def process_call_result(call_result, to_json, handler=None, error_handler=None):
     return call_result
 
 
+def cached_result(content):
+    """
+    Build a successful request result from a cached content.
+
+    :param content: cached content
+    :return: result dict, similar to NetworkAccessManager return value
+    """
+    return {
+        "status": 200,
+        "status_code": 200,
+        "status_message": "OK (cache)",
+        "content": content,
+        "ok": True,
+        "headers": dict(),
+        "reason": None,
+        "exception": None,
+    }
+
+
 def message_from_request_error(result):
     status = result["status"]
     status_code = result["status_code"]
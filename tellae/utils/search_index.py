@@ -0,0 +1,248 @@
+"""
+In-memory full text search index.
+
+Texts are normalized (lower case, accents removed) and split into tokens.
+Query tokens match indexed tokens exactly, by prefix (using a sorted vocabulary)
+or approximately (one typo, using a deletion neighbourhood of the vocabulary).
+Documents must match all query tokens, and are ranked by the weights of the
+fields where the tokens were found.
+"""
+
+import re
+import bisect
+import unicodedata
+
+# score factors of the token match types
+EXACT_MATCH = 1
+PREFIX_MATCH = 0.8
+FUZZY_MATCH = 0.5
+
+# minimum length of the query tokens matched approximately
+FUZZY_MIN_LENGTH = 4
+
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_text(text) -> str:
+    """
+    Normalize a text for search: lower case, without accents and punctuation.
+
+    :param text: text to normalize
+
+    :return: normalized text
+    """
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+
+    return _NON_ALPHANUMERIC.sub(" ", text.lower()).strip()
+
+
+def tokenize(text) -> list:
+    """
+    Split a text in normalized tokens.
+
+    :param text: text to tokenize
+
+    :return: list of tokens
+    """
+    return normalize_text(text).split()
+
+
+def _deletions(token) -> set:
+    # variants of the token with one character removed
+    return {token[:i] + token[i + 1 :] for i in range(len(token))}
+
+
+class SearchIndex:
+    """
+    Search index of documents made of weighted text fields and tags.
+
+    Documents can be added and removed incrementally.
+    """
+
+    def __init__(self, field_weights):
+        """
+        :param field_weights: dict {field name: weight} of the indexed fields
+        """
+        self.field_weights = field_weights
+
+        # indexed documents {doc_id: {"order", "tokens", "tags"}}
+        self._documents = dict()
+
+        # documents containing each token {token: {doc_id: weight}}
+        self._postings = dict()
+
+        # documents with each tag {tag: set of doc ids}
+        self._tags = dict()
+
+        # tokens matching each deletion variant {variant: set of tokens}
+        self._deletions = dict()
+
+        # sorted list of the indexed tokens, evaluated on search if outdated
+        self._vocabulary = []
+        self._vocabulary_outdated = False
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._documents
+
+    def add(self, doc_id, fields, tags=(), order=0):
+        """
+        Add a document to the index, replacing the document with the same id.
+
+        :param doc_id: document id (hashable)
+        :param fields: dict {field name: text}
+        :param tags: document tags, used to filter the results
+        :param order: rank of the document among results with the same score
+        """
+        if doc_id in self._documents:
+            self.remove(doc_id)
+
+        # evaluate the weight of each token (best field containing it)
+        tokens = dict()
+        for field, text in fields.items():
+            weight = self.field_weights[field]
+            for token in tokenize(text or ""):
+                tokens[token] = max(weight, tokens.get(token, 0))
+
+        for token, weight in tokens.items():
+            if token not in self._postings:
+                self._add_token(token)
+            self._postings[token][doc_id] = weight
+
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(doc_id)
+
+        self._documents[doc_id] = {"order": order, "tokens": tokens, "tags": set(tags)}
+
+    def remove(self, doc_id):
+        """
+        Remove a document from the index.
+
+        :param doc_id: document id
+        """
+        document = self._documents.pop(doc_id, None)
+        if document is None:
+            return
+
+        for token in document["tokens"]:
+            postings = self._postings[token]
+            del postings[doc_id]
+            if not postings:
+                self._remove_token(token)
+
+        for tag in document["tags"]:
+            self._tags[tag].discard(doc_id)
+            if not self._tags[tag]:
+                del self._tags[tag]
+
+    def set_order(self, doc_id, order):
+        """
+        Change the rank of an indexed document, without indexing its fields again.
+
+        :param doc_id: document id
+        :param order: rank of the document among results with the same score
+        """
+        self._documents[doc_id]["order"] = order
+
+    def clear(self):
+        self.__init__(self.field_weights)
+
+    def search(self, query, tag=None, limit=None) -> list:
+        """
+        Search the documents matching the query.
+
+        :param query: query text, an empty query matches all documents
+        :param tag: only return documents with this tag
+        :param limit: maximum number of results
+
+        :return: list of matching document ids, by decreasing score and increasing order
+        """
+        query_tokens = tokenize(query)
+
+        candidates = self._documents.keys() if tag is None else self._tags.get(tag, set())
+
+        if not query_tokens:
+            results = sorted(candidates, key=lambda doc_id: self._documents[doc_id]["order"])
+            return results[:limit]
+
+        # documents must match all the query tokens
+        scores = None
+        for query_token in sorted(set(query_tokens), key=len, reverse=True):
+            token_scores = self._score_token(query_token)
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    doc_id: score + token_scores[doc_id]
+                    for doc_id, score in scores.items()
+                    if doc_id in token_scores
+                }
+            if not scores:
+                return []
+
+        if tag is not None:
+            scores = {doc_id: score for doc_id, score in scores.items() if doc_id in candidates}
+
+        results = sorted(
+            scores, key=lambda doc_id: (-scores[doc_id], self._documents[doc_id]["order"])
+        )
+
+        return results[:limit]
+
+    def _score_token(self, query_token):
+        # best score of each document for the query token
+        scores = dict()
+        for token, factor in self._match_token(query_token).items():
+            for doc_id, weight in self._postings[token].items():
+                score = weight * factor
+                if score > scores.get(doc_id, 0):
+                    scores[doc_id] = score
+
+        return scores
+
+    def _match_token(self, query_token):
+        # indexed tokens matching the query token, with their match factor
+        if self._vocabulary_outdated:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_outdated = False
+
+        matches = dict()
+
+        # tokens starting with the query token
+        start = bisect.bisect_left(self._vocabulary, query_token)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(query_token):
+                break
+            matches[token] = EXACT_MATCH if token == query_token else PREFIX_MATCH
+
+        # tokens at one typo from the query token
+        if len(query_token) >= FUZZY_MIN_LENGTH:
+            variants = _deletions(query_token) | {query_token}
+            for variant in variants:
+                for token in self._deletions.get(variant, ()):
+                    matches.setdefault(token, FUZZY_MATCH)
+                if variant in self._postings:
+                    matches.setdefault(variant, FUZZY_MATCH)
+
+        return matches
+
+    def _add_token(self, token):
+        self._postings[token] = dict()
+        self._vocabulary_outdated = True
+
+        if len(token) >= FUZZY_MIN_LENGTH:
+            for variant in _deletions(token):
+                self._deletions.setdefault(variant, set()).add(token)
+
+    def _remove_token(self, token):
+        del self._postings[token]
+        self._vocabulary_outdated = True
+
+        if len(token) >= FUZZY_MIN_LENGTH:
+            for variant in _deletions(token):
+                self._deletions[variant].discard(token)
+                if not self._deletions[variant]:
+                    del self._deletions[variant]
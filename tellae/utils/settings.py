@@ -0,0 +1,61 @@
+"""
+User settings of the plugin, stored in the QGIS settings.
+"""
+
+from qgis.core import QgsSettings
+
+SETTINGS_PREFIX = "tellae"
+
+# download the binaries of the selected project in background
+PREFETCH_PROJECT_SETTING = "prefetch_project_binaries"
+
+# background refresh intervals of the catalogs and of the current project (minutes, 0 to disable)
+CATALOG_REFRESH_SETTING = "catalog_refresh_interval"
+PROJECT_REFRESH_SETTING = "project_refresh_interval"
+
+# record the call sites blocking the QGIS main thread
+STALL_WATCHDOG_SETTING = "stall_watchdog"
+
+# disk budget of the layer files directory (MB)
+LAYER_FILES_BUDGET_SETTING = "layer_files_budget"
+
+# disk budget of the downloaded data cache (MB)
+FILE_CACHE_BUDGET_SETTING = "file_cache_budget"
+
+# time to live (hours) and disk budget (MB) of the tile cache
+TILE_CACHE_TTL_SETTING = "tile_cache_ttl"
+TILE_CACHE_BUDGET_SETTING = "tile_cache_budget"
+
+DEFAULT_SETTINGS = {
+    PREFETCH_PROJECT_SETTING: False,
+    CATALOG_REFRESH_SETTING: 30,
+    PROJECT_REFRESH_SETTING: 10,
+    STALL_WATCHDOG_SETTING: False,
+    LAYER_FILES_BUDGET_SETTING: 2048,
+    FILE_CACHE_BUDGET_SETTING: 2048,
+    TILE_CACHE_TTL_SETTING: 168,
+    TILE_CACHE_BUDGET_SETTING: 512,
+}
+
+
+def get_setting(name):
+    """
+    Read a plugin setting.
+
+    :param name: setting name
+
+    :return: setting value, or its default value if it is not set
+    """
+    default = DEFAULT_SETTINGS[name]
+
+    return QgsSettings().value(f"{SETTINGS_PREFIX}/{name}", default, type=type(default))
+
+
+def set_setting(name, value):
+    """
+    Write a plugin setting.
+
+    :param name: setting name
+    :param value: setting value
+    """
+    QgsSettings().setValue(f"{SETTINGS_PREFIX}/{name}", value)
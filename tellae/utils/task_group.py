@@ -0,0 +1,135 @@
+import time
+
+from tellae.utils.utils import log
+
+
+class TaskGroup:
+    """
+    Group of concurrent asynchronous tasks (typically network requests).
+
+    Tasks are registered with start_task, which returns the callback that ends the task.
+    Once the group is closed and all its tasks have ended, the on_finished callback is called.
+
+    The duration of each task is recorded in order to evaluate the critical path of the group,
+    i.e. the task that determines the total duration.
+    """
+
+    def __init__(self, name, on_finished=None, on_task_error=None):
+        """
+        :param name: group name, used in logs
+        :param on_finished: callback called with the group when all tasks have ended
+        :param on_task_error: callback called with the exception of each failed task
+        """
+        self.name = name
+
+        self.on_finished = on_finished
+
+        self.on_task_error = on_task_error
+
+        # task timings, in seconds relative to the group start: {name: [start, end]}
+        self.timings = dict()
+
+        # exceptions of the failed tasks
+        self.errors = dict()
+
+        self._pending = set()
+
+        self._closed = False
+
+        self._start_time = time.perf_counter()
+
+        self._end_time = None
+
+    @property
+    def finished(self):
+        return self._end_time is not None
+
+    @property
+    def duration(self):
+        end_time = time.perf_counter() if self._end_time is None else self._end_time
+        return end_time - self._start_time
+
+    @property
+    def critical_path(self):
+        """
+        Name and duration of the last task to end, or None if no task has ended.
+        """
+        ended = [(name, timing) for name, timing in self.timings.items() if timing[1] is not None]
+        if not ended:
+            return None
+
+        name, timing = max(ended, key=lambda x: x[1][1])
+        return name, timing[1] - timing[0]
+
+    def start_task(self, name, error_message=None):
+        """
+        Register a new task in the group.
+
+        :param name: task name, unique in the group
+        :param error_message: message of the exception signaled if the task fails
+
+        :return: callback ending the task, taking the exception that made the task fail as optional parameter
+        """
+        if self.finished:
+            raise RuntimeError(f"Cannot start task '{name}' in finished group '{self.name}'")
+
+        self._pending.add(name)
+        self.timings[name] = [self.duration, None]
+
+        def end_task(exception=None):
+            self._end_task(name, exception, error_message)
+
+        return end_task
+
+    def close(self):
+        """
+        Signal that all the tasks of the group have been started.
+        """
+        self._closed = True
+        self._check_finished()
+
+    def summary(self) -> str:
+        """
+        Describe the group timings.
+
+        :return: summary text
+        """
+        text = f"Tasks '{self.name}' ended in {self.duration * 1000:.0f} ms"
+        critical_path = self.critical_path
+        if critical_path is not None:
+            text += f", critical path: {critical_path[0]} ({critical_path[1] * 1000:.0f} ms)"
+
+        return text
+
+    def _end_task(self, name, exception, error_message):
+        # ignore tasks that already ended
+        if name not in self._pending:
+            return
+
+        self._pending.remove(name)
+        self.timings[name][1] = self.duration
+
+        if exception is not None:
+            # signal error with the task message
+            if error_message is not None:
+                cause = exception
+                exception = ValueError(error_message)
+                exception.__cause__ = cause
+
+            self.errors[name] = exception
+
+            if self.on_task_error is not None:
+                self.on_task_error(exception)
+
+        self._check_finished()
+
+    def _check_finished(self):
+        if not self._closed or self._pending or self.finished:
+            return
+
+        self._end_time = time.perf_counter()
+
+        log(self.summary())
+
+        if self.on_finished is not None:
+            self.on_finished(self)
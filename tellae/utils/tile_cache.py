@@ -0,0 +1,222 @@
+"""
+Persistent cache of map tiles.
+
+Tile responses are stored in a SQLite database of the plugin storage, with a layout
+close to the MBTiles 'tiles' table (zoom_level, tile_column, tile_row, tile_data,
+rows numbered from the south). It is not an MBTiles file: the tiles are identified
+by an additional column describing the requested layer (table, selected properties
+and filter), and contain compressed GeoJSON. Cached tiles expire after a time to
+live, and the least recently read tiles are evicted when the database exceeds its
+disk budget. The settings are read once per session.
+"""
+
+import os
+import time
+import zlib
+import sqlite3
+
+from tellae.utils.utils import log
+from tellae.utils.local_storage import get_storage_dir
+from tellae.utils.settings import get_setting, TILE_CACHE_TTL_SETTING, TILE_CACHE_BUDGET_SETTING
+
+TILE_CACHE_FILE = "tile_cache.sqlite"
+
+# number of stored tiles between two evictions
+EVICTION_INTERVAL = 50
+
+
+class TileCache:
+    """
+    Cache of tile contents, identified by a layer key and a (z, x, y) tile.
+    """
+
+    def __init__(self):
+        # database connection, opened on first use
+        self._connection = None
+
+        # number of tiles stored since the last eviction
+        self._puts = 0
+
+        # time to live of the tiles (seconds), read on first use
+        self._ttl = None
+
+    @property
+    def ttl(self) -> float:
+        if self._ttl is None:
+            self._ttl = get_setting(TILE_CACHE_TTL_SETTING) * 3600
+        return self._ttl
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            path = os.path.join(get_storage_dir("tiles"), TILE_CACHE_FILE)
+            connection = sqlite3.connect(path)
+            # let the deleted pages be reclaimed, must be set before creating the tables
+            connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS tiles ("
+                "layer TEXT, zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, "
+                "tile_data BLOB, fetched_at REAL, last_access REAL, "
+                "PRIMARY KEY (layer, zoom_level, tile_column, tile_row))"
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO metadata VALUES ('name', 'tellae'), ('format', 'json')"
+            )
+            connection.commit()
+            self._connection = connection
+
+        return self._connection
+
+    @staticmethod
+    def _tile_row(tile):
+        # rows are numbered from the south, as in MBTiles
+        z, x, y = tile
+        return z, x, 2**z - 1 - y
+
+    def contains(self, layer, tile) -> bool:
+        """
+        Tell if a tile is cached and not expired, without reading it.
+
+        :param layer: layer key
+        :param tile: (z, x, y) tile
+
+        :return: boolean
+        """
+        z, column, row = self._tile_row(tile)
+        ttl = self.ttl
+
+        try:
+            found = self.connection.execute(
+                "SELECT 1 FROM tiles WHERE layer = ? AND zoom_level = ? AND tile_column = ? "
+                "AND tile_row = ? AND fetched_at >= ?",
+                (layer, z, column, row, time.time() - ttl),
+            ).fetchone()
+        except sqlite3.Error:
+            return False
+
+        return found is not None
+
+    def get(self, layer, tile) -> bytes | None:
+        """
+        Read a cached tile.
+
+        :param layer: layer key
+        :param tile: (z, x, y) tile
+
+        :return: tile content, or None if the tile is not cached or expired
+        """
+        z, column, row = self._tile_row(tile)
+        ttl = self.ttl
+
+        try:
+            found = self.connection.execute(
+                "SELECT tile_data, fetched_at FROM tiles "
+                "WHERE layer = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (layer, z, column, row),
+            ).fetchone()
+
+            if found is None or time.time() - found[1] > ttl:
+                return None
+
+            self.connection.execute(
+                "UPDATE tiles SET last_access = ? "
+                "WHERE layer = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (time.time(), layer, z, column, row),
+            )
+            self.connection.commit()
+
+            return zlib.decompress(found[0])
+        except (sqlite3.Error, zlib.error) as e:
+            log(f"Could not read cached tile {tile} of '{layer}': {e}", "WARNING")
+            return None
+
+    def put(self, layer, tile, content: bytes):
+        """
+        Store a tile in the cache, replacing the previous one.
+
+        :param layer: layer key
+        :param tile: (z, x, y) tile
+        :param content: tile content
+        """
+        z, column, row = self._tile_row(tile)
+        now = time.time()
+
+        try:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (layer, z, column, row, zlib.compress(content), now, now),
+            )
+            self.connection.commit()
+        except sqlite3.Error as e:
+            log(f"Could not cache tile {tile} of '{layer}': {e}", "WARNING")
+            return
+
+        self._puts += 1
+        if self._puts >= EVICTION_INTERVAL:
+            self.evict()
+
+    def usage(self) -> int:
+        """
+        Size of the cached tiles, in bytes.
+        """
+        try:
+            size = self.connection.execute("SELECT SUM(LENGTH(tile_data)) FROM tiles").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+        return size or 0
+
+    def evict(self, budget=None):
+        """
+        Remove the expired tiles, then the least recently read ones until the cache fits the budget.
+
+        :param budget: disk budget in bytes, read from the settings by default
+        """
+        if budget is None:
+            budget = get_setting(TILE_CACHE_BUDGET_SETTING) * 1024 * 1024
+        ttl = self.ttl
+
+        self._puts = 0
+
+        try:
+            connection = self.connection
+            connection.execute("DELETE FROM tiles WHERE fetched_at < ?", (time.time() - ttl,))
+
+            size = self.usage()
+            if size > budget:
+                removed = []
+                for rowid, length in connection.execute(
+                    "SELECT rowid, LENGTH(tile_data) FROM tiles ORDER BY last_access"
+                ):
+                    if size <= budget:
+                        break
+                    removed.append((rowid,))
+                    size -= length
+                connection.executemany("DELETE FROM tiles WHERE rowid = ?", removed)
+
+            connection.commit()
+            connection.execute("PRAGMA incremental_vacuum")
+        except sqlite3.Error as e:
+            log(f"Could not evict cached tiles: {e}", "WARNING")
+
+    def clear(self):
+        """
+        Remove all the cached tiles.
+        """
+        try:
+            self.connection.execute("DELETE FROM tiles")
+            self.connection.commit()
+            self.connection.execute("VACUUM")
+        except sqlite3.Error as e:
+            log(f"Could not clear the tile cache: {e}", "WARNING")
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+TILE_CACHE = TileCache()
@@ -0,0 +1,155 @@
+"""
+Quadtree grid of the map, in XYZ tiles.
+
+Tiles are identified by (z, x, y) tuples, following the web map tiling scheme:
+at zoom z, the world is divided into 2^z x 2^z tiles, x growing eastwards and
+y southwards. Bounding boxes are (lon_min, lat_min, lon_max, lat_max) in EPSG:4326.
+"""
+
+import math
+
+# latitude limit of the web map tiling scheme (degrees)
+MAX_LATITUDE = 85.0511287798
+
+# maximum zoom level of the grids
+MAX_ZOOM = 18
+
+
+def _tile_x(lon, n):
+    return min(n - 1, max(0, math.floor((lon + 180) / 360 * n)))
+
+
+def _tile_y(lat, n):
+    lat = math.radians(min(MAX_LATITUDE, max(-MAX_LATITUDE, lat)))
+    return min(n - 1, max(0, math.floor((1 - math.asinh(math.tan(lat)) / math.pi) / 2 * n)))
+
+
+def _tile_lat(y, n):
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+
+
+def grid_zoom(bbox, cells_per_width=1) -> int:
+    """
+    Zoom level of the grid whose tiles are at most a fraction of the bbox width.
+
+    :param bbox: (lon_min, lat_min, lon_max, lat_max)
+    :param cells_per_width: minimum number of tiles across the bbox width
+
+    :return: zoom level
+    """
+    width = max(bbox[2] - bbox[0], 1e-9)
+
+    return min(MAX_ZOOM, max(0, math.ceil(math.log2(360 * cells_per_width / width))))
+
+
+def tiles_in_bbox(bbox, zoom) -> list:
+    """
+    List the tiles intersecting a bounding box.
+
+    :param bbox: (lon_min, lat_min, lon_max, lat_max)
+    :param zoom: zoom level
+
+    :return: list of (z, x, y) tiles
+    """
+    n = 2**zoom
+
+    x_min, x_max = _tile_x(bbox[0], n), _tile_x(bbox[2], n)
+    y_min, y_max = _tile_y(bbox[3], n), _tile_y(bbox[1], n)
+
+    return [(zoom, x, y) for x in range(x_min, x_max + 1) for y in range(y_min, y_max + 1)]
+
+
+def tile_count(bbox, zoom) -> int:
+    """
+    Count the tiles intersecting a bounding box, without listing them.
+
+    :param bbox: (lon_min, lat_min, lon_max, lat_max)
+    :param zoom: zoom level
+
+    :return: number of tiles
+    """
+    n = 2**zoom
+
+    width = _tile_x(bbox[2], n) - _tile_x(bbox[0], n) + 1
+    height = _tile_y(bbox[1], n) - _tile_y(bbox[3], n) + 1
+
+    return width * height
+
+
+def tile_bbox(tile) -> tuple:
+    """
+    Bounding box of a tile.
+
+    :param tile: (z, x, y) tile
+
+    :return: (lon_min, lat_min, lon_max, lat_max)
+    """
+    z, x, y = tile
+    n = 2**z
+
+    return x / n * 360 - 180, _tile_lat(y + 1, n), (x + 1) / n * 360 - 180, _tile_lat(y, n)
+
+
+def bbox_intersects(bbox, other) -> bool:
+    """
+    Tell if two bounding boxes intersect.
+
+    :param bbox: (lon_min, lat_min, lon_max, lat_max)
+    :param other: (lon_min, lat_min, lon_max, lat_max)
+
+    :return: boolean
+    """
+    return (
+        bbox[0] <= other[2] and other[0] <= bbox[2] and bbox[1] <= other[3] and other[1] <= bbox[3]
+    )
+
+
+def tile_distance(tile, other) -> int:
+    """
+    Number of tile rings between two tiles of the same zoom level.
+
+    :param tile: (z, x, y) tile
+    :param other: (z, x, y) tile
+
+    :return: Chebyshev distance between the tiles
+    """
+    return max(abs(tile[1] - other[1]), abs(tile[2] - other[2]))
+
+
+def tiles_around(tiles, rings=1, direction=(0, 0)) -> list:
+    """
+    List the tiles surrounding a rectangle of tiles, nearest first.
+
+    One more ring is listed in the given direction, and the tiles lying in
+    that direction come before the other tiles at the same distance.
+
+    :param tiles: (z, x, y) tiles of the rectangle
+    :param rings: number of tile rings around the rectangle
+    :param direction: (dx, dy) direction, each component being -1, 0 or 1
+
+    :return: list of (z, x, y) tiles
+    """
+    zoom = tiles[0][0]
+    n = 2**zoom
+    dx, dy = direction
+
+    x_min, x_max = min(tile[1] for tile in tiles), max(tile[1] for tile in tiles)
+    y_min, y_max = min(tile[2] for tile in tiles), max(tile[2] for tile in tiles)
+    center_x, center_y = (x_min + x_max) / 2, (y_min + y_max) / 2
+
+    around = []
+    for x in range(max(0, x_min - rings - (dx < 0)), min(n, x_max + rings + (dx > 0) + 1)):
+        for y in range(max(0, y_min - rings - (dy < 0)), min(n, y_max + rings + (dy > 0) + 1)):
+            distance = max(x_min - x, x - x_max, y_min - y, y - y_max)
+            if distance <= 0:
+                continue
+
+            ahead = (x - center_x) * dx + (y - center_y) * dy > 0
+            if distance > rings and not ahead:
+                continue
+
+            around.append((distance - ahead, (zoom, x, y)))
+
+    around.sort(key=lambda x: x[0])
+
+    return [tile for _, tile in around]
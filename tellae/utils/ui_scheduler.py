@@ -0,0 +1,175 @@
+"""
+Cooperative scheduler of the work that must run on the GUI thread.
+
+Tasks are generators, each iteration doing a small unit of work (adding a layer,
+building a renderer...). The scheduler runs units of work for a limited time per
+event loop iteration, then gives the control back to Qt so that QGIS keeps
+repainting and handling user input. Pending tasks are run in turn.
+"""
+
+import time
+from collections import deque
+
+from qgis.PyQt.QtCore import QTimer
+
+from tellae.utils.utils import log
+
+# time spent running tasks per event loop iteration (seconds)
+FRAME_BUDGET = 0.008
+
+# number of finished tasks kept in the statistics
+STATS_SIZE = 20
+
+
+class UiTask:
+    """
+    A task run by slices on the GUI thread.
+    """
+
+    def __init__(self, name, steps, on_done=None, on_error=None):
+        """
+        :param name: task name, used in logs
+        :param steps: iterable whose iterations are the units of work
+        :param on_done: function called once all the steps are done
+        :param on_error: function called with the exception raised by a step
+        """
+        self.name = name
+        self.steps = iter(steps)
+        self.on_done = on_done
+        self.on_error = on_error
+
+        # number of units of work done
+        self.step_count = 0
+
+        # number of event loop iterations in which the task ran
+        self.slice_count = 0
+
+        # time spent running the task (seconds)
+        self.duration = 0
+
+
+class UiScheduler:
+    """
+    Time-sliced scheduler of tasks running on the GUI thread.
+    """
+
+    def __init__(self, frame_budget=FRAME_BUDGET):
+        self.frame_budget = frame_budget
+
+        # pending tasks, the first one runs next
+        self._tasks = deque()
+
+        # statistics of the last finished tasks
+        self.stats = deque(maxlen=STATS_SIZE)
+
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._run_slice)
+
+    def submit(self, name, steps, on_done=None, on_error=None) -> UiTask:
+        """
+        Schedule a task.
+
+        Its steps start running at the next event loop iteration.
+
+        :param name: task name, used in logs
+        :param steps: iterable whose iterations are the units of work
+        :param on_done: function called once all the steps are done
+        :param on_error: function called with the exception raised by a step,
+            the exception is logged if None
+
+        :return: scheduled UiTask
+        """
+        task = UiTask(name, steps, on_done, on_error)
+        self._tasks.append(task)
+
+        if not self._timer.isActive():
+            self._timer.start()
+
+        return task
+
+    def _run_slice(self):
+        slice_start = time.perf_counter()
+
+        # run tasks in turn, until the time budget is spent
+        try:
+            while self._tasks and time.perf_counter() - slice_start < self.frame_budget:
+                task = self._tasks.popleft()
+                task.slice_count += 1
+
+                step_start = time.perf_counter()
+                try:
+                    finished = self._run_steps(task, slice_start)
+                except Exception as e:
+                    task.duration += time.perf_counter() - step_start
+                    self._on_task_error(task, e)
+                    continue
+
+                task.duration += time.perf_counter() - step_start
+
+                if finished:
+                    self._on_task_done(task)
+                else:
+                    self._tasks.append(task)
+        finally:
+            # keep running the other tasks, even if a callback failed
+            if self._tasks:
+                self._timer.start()
+
+    def _run_steps(self, task, slice_start):
+        # run steps of the task until it ends or the budget is spent
+        while time.perf_counter() - slice_start < self.frame_budget:
+            try:
+                next(task.steps)
+            except StopIteration:
+                return True
+            task.step_count += 1
+
+        return False
+
+    def _on_task_done(self, task):
+        self._add_stats(task, "done")
+
+        if task.on_done is not None:
+            try:
+                task.on_done()
+            except Exception as e:
+                log(f"Error after UI task '{task.name}': {e}", "CRITICAL")
+
+    def _on_task_error(self, task, exception):
+        self._add_stats(task, "error")
+
+        if task.on_error is not None:
+            try:
+                task.on_error(exception)
+            except Exception as e:
+                log(f"Error after UI task '{task.name}': {e}", "CRITICAL")
+        else:
+            log(f"Error in UI task '{task.name}': {exception}", "CRITICAL")
+
+    def _add_stats(self, task, status):
+        stats = {
+            "name": task.name,
+            "status": status,
+            "steps": task.step_count,
+            "slices": task.slice_count,
+            "duration": task.duration,
+        }
+        # displayed in the diagnostics, not logged as there is a task per viewport cell
+        self.stats.append(stats)
+
+    def report(self) -> str:
+        """
+        Describe the last finished tasks.
+
+        :return: multiline text
+        """
+        return "\n".join(
+            f"{stats['name']}: {stats['steps']} steps, {stats['slices']} slices, "
+            f"{stats['duration'] * 1000:.0f} ms ({stats['status']})"
+            for stats in self.stats
+        )
+
+
+UI_SCHEDULER = UiScheduler()
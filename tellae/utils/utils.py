@@ -1,5 +1,7 @@
 import os
 import json
+import bisect
+import configparser
 from qgis.core import QgsMessageLog, Qgis
 
 
@@ -19,6 +21,18 @@ def log(message, level: Qgis.MessageLevel | str = Qgis.MessageLevel.Info):
     QgsMessageLog.logMessage(str(message), level=level, tag="Tellae")
 
 
+def get_plugin_version():
+    """
+    Read the plugin version from the metadata file.
+
+    :return: version string, or None if it could not be read
+    """
+    metadata = configparser.ConfigParser()
+    metadata.read(os.path.join(os.path.dirname(os.path.dirname(__file__)), "metadata.txt"))
+
+    return metadata.get("general", "version", fallback=None)
+
+
 def read_local_config(plugin_dir):
     config = None
     path = plugin_dir + "/local.config.json"
@@ -105,6 +119,33 @@ def get_binary_name(binary, with_extension=True):
     return name
 
 
+def merge_sorted_items(items, changed, removed_ids=(), key=None, id_key="id"):
+    """
+    Apply changes to a sorted list of items without sorting the whole list again.
+
+    Changed items replace the items with the same id (or are added if new),
+    and are inserted at their sorted position.
+
+    :param items: list of items, sorted using the given key
+    :param changed: list of new or updated items
+    :param removed_ids: ids of the items to remove
+    :param key: sort key of the list
+    :param id_key: item property containing its id
+
+    :return: new sorted list of items
+    """
+    discarded_ids = {item[id_key] for item in changed} | set(removed_ids)
+
+    # remove updated and deleted items
+    merged = [item for item in items if item[id_key] not in discarded_ids]
+
+    # insert new versions of the updated items at their position
+    for item in changed:
+        bisect.insort(merged, item, key=key)
+
+    return merged
+
+
 # def prepare_layer_style(layer, layer_info):
 #
 #     renderer = layer.renderer()
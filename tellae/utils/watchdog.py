@@ -0,0 +1,226 @@
+"""
+Detection of the main thread stalls.
+
+A QTimer on the main thread beats at a regular interval, and a background thread
+checks that the beats are not late. When the main thread is blocked for longer than
+a threshold, the background thread captures its Python stack, and the stall is
+attributed to the blocking call site once the main thread is responsive again.
+
+Nested event loops excluding user input (blocking network requests) do not delay
+the beats, so they are declared as blocking sections.
+"""
+
+import os
+import sys
+import time
+import threading
+import traceback
+from contextlib import contextmanager
+
+from qgis.PyQt.QtCore import QTimer
+
+from tellae.utils.utils import log
+
+# interval between two beats of the main thread (seconds)
+HEARTBEAT_INTERVAL = 0.1
+
+# interval between two checks of the background thread (seconds)
+POLL_INTERVAL = 0.05
+
+# maximum wait for the background thread when stopping (seconds)
+STOP_TIMEOUT = 1
+
+# minimum duration of a recorded stall (seconds)
+STALL_THRESHOLD = 0.5
+
+# number of offenders listed in the report
+REPORT_SIZE = 15
+
+_PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _frame_label(frame_summary):
+    return f"{os.path.basename(frame_summary.filename)}:{frame_summary.lineno} {frame_summary.name}"
+
+
+def blocking_call_site(stack) -> str:
+    """
+    Describe the call site of a stack: its innermost frame, and the innermost
+    frame of the plugin if it is a different one.
+
+    :param stack: traceback.StackSummary, outermost frame first
+
+    :return: call site description
+    """
+    if not stack:
+        return "unknown"
+
+    innermost = stack[-1]
+    plugin_frames = [frame for frame in stack if frame.filename.startswith(_PLUGIN_DIR)]
+
+    site = _frame_label(innermost)
+    if plugin_frames and plugin_frames[-1] is not innermost:
+        site = f"{site} <- {_frame_label(plugin_frames[-1])}"
+
+    return site
+
+
+class StallWatchdog:
+    """
+    Watchdog measuring the event loop lag of the main thread.
+    """
+
+    def __init__(self, threshold=STALL_THRESHOLD):
+        self.threshold = threshold
+
+        self._lock = threading.Lock()
+
+        # background thread, and the event stopping it (one per run)
+        self._thread = None
+        self._stop_event = None
+        self._main_thread_id = None
+
+        self._timer = QTimer()
+        self._timer.setInterval(int(HEARTBEAT_INTERVAL * 1000))
+        self._timer.timeout.connect(self._beat)
+
+        # time of the last beat
+        self._last_beat = time.monotonic()
+
+        # start of the current blocking section, and number of nested sections
+        self._blocked_since = None
+        self._blocking_depth = 0
+
+        # stack captured during the current stall {"start", "stack"}
+        self._stall = None
+
+        # stall statistics by call site {site: {"count", "total", "max", "stack"}}
+        self.offenders = dict()
+
+    @property
+    def running(self):
+        return self._stop_event is not None
+
+    def start(self):
+        if self.running:
+            return
+
+        self._main_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._timer.start()
+
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._watch, args=(self._stop_event,), name="tellae-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+
+        self._timer.stop()
+
+        self._stop_event.set()
+        self._thread.join(STOP_TIMEOUT)
+        self._stop_event = None
+        self._thread = None
+
+    @contextmanager
+    def blocking_section(self):
+        """
+        Context manager declaring a section of the main thread that blocks user input
+        while still processing events (for instance a nested QEventLoop).
+        """
+        with self._lock:
+            if self._blocking_depth == 0:
+                self._blocked_since = time.monotonic()
+            self._blocking_depth += 1
+        try:
+            yield
+        finally:
+            stall = None
+            with self._lock:
+                self._blocking_depth -= 1
+                if self._blocking_depth == 0:
+                    self._blocked_since = None
+                    self._last_beat = time.monotonic()
+                    stall = self._stall
+                    self._stall = None
+            if stall is not None:
+                self._record_stall(stall)
+
+    def _beat(self):
+        with self._lock:
+            self._last_beat = time.monotonic()
+            if self._blocked_since is not None:
+                return
+            stall = self._stall
+            self._stall = None
+
+        if stall is not None:
+            self._record_stall(stall)
+
+    def _watch(self, stop_event):
+        # background thread loop, until the event of its run is set
+        while not stop_event.wait(POLL_INTERVAL):
+            with self._lock:
+                if self._stall is not None:
+                    continue
+
+                if self._blocked_since is not None:
+                    stall_start = self._blocked_since
+                else:
+                    stall_start = self._last_beat + HEARTBEAT_INTERVAL
+
+                if time.monotonic() - stall_start < self.threshold:
+                    continue
+
+                state = (self._last_beat, self._blocked_since)
+                frame = sys._current_frames().get(self._main_thread_id)
+
+            # format the stack without blocking the main thread
+            stack = traceback.extract_stack(frame) if frame is not None else []
+            del frame
+
+            with self._lock:
+                # ignore the stack if the stall ended meanwhile
+                if self._stall is None and state == (self._last_beat, self._blocked_since):
+                    self._stall = {"start": stall_start, "stack": stack}
+
+    def _record_stall(self, stall):
+        duration = time.monotonic() - stall["start"]
+        site = blocking_call_site(stall["stack"])
+
+        offender = self.offenders.setdefault(
+            site, {"count": 0, "total": 0, "max": 0, "stack": stall["stack"]}
+        )
+        offender["count"] += 1
+        offender["total"] += duration
+        offender["max"] = max(offender["max"], duration)
+
+        log(f"Main thread blocked for {duration:.2f}s at {site}", "WARNING")
+
+    def report(self) -> str:
+        """
+        List the call sites that blocked the main thread, by total stall time.
+
+        :return: multiline text
+        """
+        if not self.offenders:
+            return "No main thread stall recorded"
+
+        offenders = sorted(self.offenders.items(), key=lambda x: x[1]["total"], reverse=True)
+
+        lines = []
+        for site, offender in offenders[:REPORT_SIZE]:
+            lines.append(
+                f"{offender['total']:7.2f}s total  {offender['count']:4d} stalls  "
+                f"{offender['max']:6.2f}s max  {site}"
+            )
+            lines += [f"      {_frame_label(frame)}" for frame in offender["stack"][-6:]]
+
+        return "\n".join(lines)
+
+
+WATCHDOG = StallWatchdog()